@@ -0,0 +1,249 @@
+"""
+Admission.py - Per-session Admission Control for Screenshot Uploads
+
+Without admission control every upload was queued, so when the backend
+fell behind, latency grew without bound and readings arrived stale. Each
+session now has:
+
+- one frame in flight at a time
+- at most one frame waiting behind it; a newer frame replaces the
+  waiting one, which is dropped (the caller answers 429)
+
+Processing times feed an estimate of the capture interval the server can
+sustain for the sessions currently active. It is returned with every
+upload response and with 429s (as suggested_interval_ms and Retry-After),
+and the extension stretches or shrinks its capture interval to match.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+# A session counts as active for this long after its last frame
+ACTIVE_WINDOW_SECONDS = 60.0
+
+# Longest interval ever suggested to a client
+MAX_INTERVAL_MS = 60_000
+
+# Suggested intervals leave this much spare capacity
+HEADROOM = 1.25
+
+# Weight of the newest processing time in the running average
+SERVICE_TIME_ALPHA = 0.2
+
+
+class FrameDropped(Exception):
+    """
+    A frame was not processed.
+
+    Attributes:
+        reason (str): 'superseded' (a newer frame of the session replaced
+                      it), 'timeout' (it waited too long) or 'overloaded'
+    """
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+
+class _SessionSlot:
+    __slots__ = ('in_flight', 'pending', 'last_seen')
+
+    def __init__(self):
+        self.in_flight = False
+        self.pending = None  # Future of the frame waiting for the slot
+        self.last_seen = time.monotonic()
+
+
+class FrameAdmission:
+    """
+    Per-session in-flight limit with newest-frame-wins replacement.
+
+    Attributes:
+        workers (int): Frames the server processes in parallel (used for
+                       the suggested interval)
+        min_interval_ms (int): Shortest interval ever suggested (the
+                               extension's normal capture interval)
+        wait_timeout (float): Longest a frame waits for its session's slot
+    """
+
+    def __init__(self, workers=1, min_interval_ms=3000, wait_timeout=10.0):
+        self.workers = max(1, workers)
+        self.min_interval_ms = min_interval_ms
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._last_prune = time.monotonic()
+        self._service_seconds = None
+        self.admitted = 0
+        self.dropped = {}
+
+    def _count_drop(self, reason):
+        self.dropped[reason] = self.dropped.get(reason, 0) + 1
+
+    def _admit(self, token):
+        """
+        Claim the session's slot or queue for it.
+
+        Returns:
+            Future: Resolved with True once the frame holds the slot, or
+                    failed with FrameDropped if a newer frame replaces it
+        """
+        future = Future()
+        with self._lock:
+            self._prune()
+            slot = self._sessions.get(token)
+            if slot is None:
+                slot = self._sessions[token] = _SessionSlot()
+            slot.last_seen = time.monotonic()
+            if not slot.in_flight:
+                slot.in_flight = True
+                self.admitted += 1
+                future.set_result(True)
+                return future
+            if slot.pending is not None:
+                # Newest frame wins: the waiting one is stale now
+                self._count_drop('superseded')
+                slot.pending.set_exception(
+                    FrameDropped('superseded', "Replaced by a newer frame of the same session")
+                )
+            slot.pending = future
+            return future
+
+    def _abandon(self, token, future):
+        """Give up waiting; hand the slot on if it was granted meanwhile."""
+        with self._lock:
+            slot = self._sessions.get(token)
+            if slot is not None and slot.pending is future:
+                slot.pending = None
+                self._count_drop('timeout')
+                return
+        if future.done() and future.exception() is None:
+            self.release(token)
+
+    def acquire(self, token):
+        """
+        Wait until the session's frame slot is free.
+
+        Args:
+            token (str): Client session token
+
+        Raises:
+            FrameDropped: If a newer frame replaced this one, or the slot
+                          did not free up within wait_timeout
+        """
+        future = self._admit(token)
+        try:
+            future.result(timeout=self.wait_timeout)
+        except FutureTimeoutError:
+            self._abandon(token, future)
+            raise FrameDropped('timeout', "Previous frame of this session is still processing")
+
+    async def acquire_async(self, token):
+        """acquire() for async views; waits without blocking the event loop."""
+        future = self._admit(token)
+        try:
+            # shield: a timeout or client disconnect must not cancel the
+            # future itself, _abandon() settles it
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), self.wait_timeout)
+        except asyncio.TimeoutError:
+            self._abandon(token, future)
+            raise FrameDropped('timeout', "Previous frame of this session is still processing")
+        except asyncio.CancelledError:
+            self._abandon(token, future)
+            raise
+
+    def release(self, token, service_seconds=None):
+        """
+        Free the session's slot, handing it to the waiting frame if any.
+
+        Args:
+            token (str): Client session token
+            service_seconds (float): How long the frame took to process
+        """
+        with self._lock:
+            if service_seconds is not None:
+                if self._service_seconds is None:
+                    self._service_seconds = service_seconds
+                else:
+                    self._service_seconds += SERVICE_TIME_ALPHA * (service_seconds - self._service_seconds)
+            slot = self._sessions.get(token)
+            if slot is None:
+                return
+            if slot.pending is not None:
+                future, slot.pending = slot.pending, None
+                self.admitted += 1
+                future.set_result(True)
+            else:
+                slot.in_flight = False
+
+    def reject(self, reason, message):
+        """Count a frame refused for another reason and build its error."""
+        with self._lock:
+            self._count_drop(reason)
+        return FrameDropped(reason, message)
+
+    def _prune(self):
+        """Forget idle sessions (called with the lock held)."""
+        now = time.monotonic()
+        if now - self._last_prune < ACTIVE_WINDOW_SECONDS / 4:
+            return
+        self._last_prune = now
+        for token in [
+            token for token, slot in self._sessions.items()
+            if not slot.in_flight and now - slot.last_seen > ACTIVE_WINDOW_SECONDS
+        ]:
+            del self._sessions[token]
+
+    def suggested_interval_ms(self):
+        """
+        Capture interval each client should use so the server keeps up.
+
+        Returns:
+            int: Milliseconds, at least min_interval_ms
+        """
+        with self._lock:
+            now = time.monotonic()
+            active = sum(1 for slot in self._sessions.values()
+                         if slot.in_flight or now - slot.last_seen <= ACTIVE_WINDOW_SECONDS)
+            service_seconds = self._service_seconds or 0.0
+        needed_ms = service_seconds * max(active, 1) / self.workers * HEADROOM * 1000
+        return int(min(MAX_INTERVAL_MS, max(self.min_interval_ms, math.ceil(needed_ms))))
+
+    def get_stats(self):
+        """Admitted and dropped frame counts, active sessions and the average processing time."""
+        with self._lock:
+            return {
+                'admitted': self.admitted,
+                'dropped': dict(self.dropped),
+                'sessions': len(self._sessions),
+                'in_flight': sum(1 for slot in self._sessions.values() if slot.in_flight),
+                'service_seconds': self._service_seconds or 0.0
+            }
+
+
+_frame_admission = None
+_frame_admission_lock = threading.Lock()
+
+
+def get_frame_admission():
+    """
+    Get the process-wide admission controller.
+
+    Returns:
+        FrameAdmission: Controller configured from the Django settings
+    """
+    global _frame_admission
+    if _frame_admission is None:
+        with _frame_admission_lock:
+            if _frame_admission is None:
+                from django.conf import settings
+                from APicalls.UploadPipeline import get_upload_pool
+                _frame_admission = FrameAdmission(
+                    workers=get_upload_pool().workers,
+                    min_interval_ms=settings.MOODLINK_MIN_CAPTURE_INTERVAL_MS,
+                    wait_timeout=settings.MOODLINK_FRAME_WAIT_TIMEOUT
+                )
+    return _frame_admission
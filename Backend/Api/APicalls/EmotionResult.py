@@ -0,0 +1,98 @@
+"""
+EmotionResult.py - Structured Emotion Classification Results
+
+Classifier output flows through the tracker and the meeting session as
+compact EmotionResult records. Display strings such as
+"Person 1: 😊 happy (85.3%)" are produced only at the JSON/report boundary
+with format_emotion(), so nothing downstream has to parse them back.
+"""
+
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+
+# Emoji shown next to each emotion label
+EMOTION_EMOJIS = {
+    "happy": "😊",
+    "sad": "😢",
+    "angry": "😠",
+    "fear": "😨",
+    "surprise": "😲",
+    "disgust": "🤢",
+    "neutral": "😐"
+}
+
+
+class EmotionResult(NamedTuple):
+    """
+    Emotion predicted for one face.
+
+    Attributes:
+        label_id (int): Index of the predicted class (-1 if not from the model)
+        label (str): Predicted emotion label
+        confidence (float): Probability of the predicted class (0-1)
+        probabilities (np.ndarray): Full class probability vector, or None
+        face_index (int): Participant number (1-based), or None for a whole frame
+        bbox (tuple): Face rectangle as (x, y, w, h) in the screenshot, or None
+    """
+    label_id: int
+    label: str
+    confidence: float
+    probabilities: Optional[np.ndarray] = None
+    face_index: Optional[int] = None
+    bbox: Optional[tuple] = None
+
+    def to_dict(self):
+        """Compact JSON-serializable form (without the probability vector)."""
+        return {
+            'label': self.label,
+            'confidence': round(self.confidence, 4),
+            'person': self.face_index,
+            'bbox': [int(v) for v in self.bbox] if self.bbox is not None else None
+        }
+
+
+def result_from_probabilities(probabilities, class_names, face_index=None, bbox=None):
+    """
+    Build an EmotionResult from one row of class probabilities.
+
+    Args:
+        probabilities (np.ndarray): Class probabilities for one image
+        class_names (list): Labels in model output order
+        face_index (int): Participant number, if known
+        bbox (tuple): Face rectangle, if known
+
+    Returns:
+        EmotionResult: Result for the most likely class
+    """
+    # Get the class with highest probability
+    label_id = int(np.argmax(probabilities))
+    confidence = float(probabilities[label_id])
+
+    if label_id < len(class_names):
+        label = class_names[label_id]
+    else:
+        label = "unknown"
+
+    return EmotionResult(label_id, label, confidence, probabilities, face_index, bbox)
+
+
+def format_emotion(result):
+    """
+    Format a result for display, e.g. "Person 1: 😊 happy (85.3%)".
+
+    The "Person N: " prefix is only added when the result belongs to a face.
+
+    Args:
+        result (EmotionResult): Result to format
+
+    Returns:
+        str: Emotion with emoji and percentage
+    """
+    # Get emoji for the emotion
+    emoji = EMOTION_EMOJIS.get(result.label.lower(), "🤔")
+    text = f"{emoji} {result.label} ({result.confidence * 100:.1f}%)"
+    if result.face_index is not None:
+        return f"Person {result.face_index}: {text}"
+    return text
@@ -0,0 +1,215 @@
+"""
+EmotionTimeline.py - Columnar Emotion Reading Store
+
+A meeting session records one reading per face per screenshot. Instead of
+a list of dicts, readings are kept in parallel typed NumPy arrays that grow
+geometrically (amortized O(1) appends):
+
+- timestamps:   float64 seconds since the epoch
+- labels:       uint8 code into label_names
+- confidences:  float32 (NaN when unknown)
+- participants: uint16 participant number (0 for a whole-frame reading)
+- files/paths:  int32 index into an interned string table (-1 for none)
+
+Summaries (counts, percentages, time buckets) are computed with vectorized
+NumPy operations over these columns.
+"""
+
+from datetime import datetime
+
+import numpy as np
+
+
+class EmotionTimeline:
+    """
+    Append-only columnar store of emotion readings for one session.
+
+    Attributes:
+        label_names (list): Label for each label code, in first-seen order
+        strings (list): Interned file names and paths
+    """
+
+    def __init__(self, initial_capacity=256):
+        self.label_names = []
+        self._label_codes = {}
+        self.strings = []
+        self._string_ids = {}
+        self._size = 0
+        self._allocate(initial_capacity)
+
+    def _allocate(self, capacity):
+        """Allocate empty columns with the given capacity."""
+        self._timestamps = np.empty(capacity, dtype=np.float64)
+        self._labels = np.empty(capacity, dtype=np.uint8)
+        self._confidences = np.empty(capacity, dtype=np.float32)
+        self._participants = np.empty(capacity, dtype=np.uint16)
+        self._files = np.empty(capacity, dtype=np.int32)
+        self._paths = np.empty(capacity, dtype=np.int32)
+
+    def _grow(self):
+        """Double the capacity of every column."""
+        size = self._size
+        old = (self._timestamps, self._labels, self._confidences,
+               self._participants, self._files, self._paths)
+        self._allocate(max(16, len(self._timestamps) * 2))
+        for new_column, old_column in zip(
+                (self._timestamps, self._labels, self._confidences,
+                 self._participants, self._files, self._paths), old):
+            new_column[:size] = old_column[:size]
+
+    def _intern(self, value):
+        """Store a string once and return its id (-1 for None)."""
+        if value is None:
+            return -1
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings.append(value)
+            self._string_ids[value] = string_id
+        return string_id
+
+    def label_code(self, label):
+        """Get the code of a label, registering it on first use."""
+        code = self._label_codes.get(label)
+        if code is None:
+            if len(self.label_names) >= 255:
+                raise ValueError("EmotionTimeline supports at most 255 distinct labels")
+            code = len(self.label_names)
+            self.label_names.append(label)
+            self._label_codes[label] = code
+        return code
+
+    def append(self, timestamp, label, confidence=None, participant=None,
+               filename=None, sanitized_path=None):
+        """
+        Add one reading.
+
+        Args:
+            timestamp (float): Seconds since the epoch
+            label (str): Emotion label
+            confidence (float): Confidence of the label (0-1), if known
+            participant (int): Participant number, or None for a whole frame
+            filename (str): Screenshot file name
+            sanitized_path (str): Path of the saved face crop, if any
+        """
+        if self._size == len(self._timestamps):
+            self._grow()
+
+        i = self._size
+        self._timestamps[i] = timestamp
+        self._labels[i] = self.label_code(label)
+        self._confidences[i] = np.nan if confidence is None else confidence
+        self._participants[i] = participant or 0
+        self._files[i] = self._intern(filename)
+        self._paths[i] = self._intern(sanitized_path)
+        self._size += 1
+
+    def __len__(self):
+        return self._size
+
+    def clear(self):
+        """Drop all readings, interned strings and spare capacity."""
+        self.label_names = []
+        self._label_codes = {}
+        self.strings = []
+        self._string_ids = {}
+        self._size = 0
+        self._allocate(256)
+
+    # Read-only views of the filled part of each column
+    @property
+    def timestamps(self):
+        return self._timestamps[:self._size]
+
+    @property
+    def labels(self):
+        return self._labels[:self._size]
+
+    @property
+    def confidences(self):
+        return self._confidences[:self._size]
+
+    @property
+    def participants(self):
+        return self._participants[:self._size]
+
+    def nbytes(self):
+        """Approximate memory used by the columns and interned strings."""
+        columns = sum(column.nbytes for column in (
+            self._timestamps, self._labels, self._confidences,
+            self._participants, self._files, self._paths))
+        return columns + sum(len(value) for value in self.strings)
+
+    def label_counts(self):
+        """
+        Count readings per label.
+
+        Returns:
+            dict: Label -> number of readings, for labels seen at least once
+        """
+        counts = np.bincount(self.labels, minlength=len(self.label_names))
+        return {label: int(count) for label, count in zip(self.label_names, counts) if count}
+
+    def label_percentages(self):
+        """
+        Share of readings per label.
+
+        Returns:
+            dict: Label -> percentage of all readings (0-100)
+        """
+        total = self._size
+        if not total:
+            return {}
+        return {label: count / total * 100 for label, count in self.label_counts().items()}
+
+    def time_buckets(self, bucket_seconds, start_timestamp):
+        """
+        Count readings per label in fixed-width time buckets.
+
+        Args:
+            bucket_seconds (float): Width of each bucket
+            start_timestamp (float): Timestamp of the start of the first bucket
+
+        Returns:
+            np.ndarray: Int64 array of shape (num_buckets, len(label_names))
+        """
+        num_labels = len(self.label_names)
+        if not self._size:
+            return np.zeros((0, num_labels), dtype=np.int64)
+        buckets = ((self.timestamps - start_timestamp) // bucket_seconds).astype(np.int64)
+        buckets = np.maximum(buckets, 0)
+        num_buckets = int(buckets.max()) + 1
+        flat = np.bincount(buckets * num_labels + self.labels, minlength=num_buckets * num_labels)
+        return flat.reshape(num_buckets, num_labels)
+
+    def records(self, start=0, stop=None, start_timestamp=None):
+        """
+        Materialize readings as dicts for JSON responses.
+
+        Args:
+            start (int): First reading to include
+            stop (int): Reading to stop before (defaults to the end)
+            start_timestamp (float): Session start, used for elapsed_minutes
+
+        Returns:
+            list: List of reading dicts
+        """
+        stop = self._size if stop is None else min(stop, self._size)
+        records = []
+        for i in range(start, stop):
+            confidence = float(self._confidences[i])
+            file_id = int(self._files[i])
+            path_id = int(self._paths[i])
+            timestamp = float(self._timestamps[i])
+            record = {
+                'timestamp': datetime.fromtimestamp(timestamp).isoformat(),
+                'label': self.label_names[self._labels[i]],
+                'confidence': None if np.isnan(confidence) else confidence,
+                'participant': int(self._participants[i]) or None,
+                'filename': self.strings[file_id] if file_id >= 0 else None,
+                'sanitized_path': self.strings[path_id] if path_id >= 0 else None
+            }
+            if start_timestamp is not None:
+                record['elapsed_minutes'] = (timestamp - start_timestamp) / 60
+            records.append(record)
+        return records
@@ -29,6 +29,181 @@ import cv2
 import numpy as np
 from PIL import Image
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+
+# Cascade files to try, in order of preference
+CASCADE_PATHS = [
+    # Local project path
+    os.path.join(os.path.dirname(__file__), 'haarcascade_frontalface_default.xml'),
+    # OpenCV's built-in cascades
+    cv2.data.haarcascades + 'haarcascade_frontalface_default.xml',
+    cv2.data.haarcascades + 'haarcascade_frontalface_alt.xml',
+    cv2.data.haarcascades + 'haarcascade_frontalface_alt2.xml'
+]
+
+# cv2.CascadeClassifier is not safe to share across threads, so each thread
+# lazily loads its own copy and reuses it for every later request
+_cascade_local = threading.local()
+_cascade_lock = threading.Lock()
+_cascade_path = None
+_cascade_metrics = {
+    'loads': 0,
+    'last_load_seconds': None,
+    'total_load_seconds': 0.0,
+    'cascade_path': None
+}
+
+
+def _load_face_cascade():
+    """
+    Load a face cascade for the calling thread.
+    
+    The first load probes CASCADE_PATHS; later loads reuse the path that worked.
+    
+    Returns:
+        cv2.CascadeClassifier: Loaded cascade classifier
+    """
+    global _cascade_path
+    start = time.perf_counter()
+    
+    candidate_paths = [_cascade_path] if _cascade_path else CASCADE_PATHS
+    face_cascade = None
+    for cascade_path in candidate_paths:
+        if os.path.exists(cascade_path):
+            temp_cascade = cv2.CascadeClassifier(cascade_path)
+            if not temp_cascade.empty():
+                face_cascade = temp_cascade
+                break
+    
+    if face_cascade is None:
+        raise RuntimeError("Could not load any face detection cascade file")
+    
+    load_seconds = time.perf_counter() - start
+    with _cascade_lock:
+        _cascade_path = cascade_path
+        _cascade_metrics['loads'] += 1
+        _cascade_metrics['last_load_seconds'] = load_seconds
+        _cascade_metrics['total_load_seconds'] += load_seconds
+        _cascade_metrics['cascade_path'] = cascade_path
+    
+    print(f"Face detection loaded from: {cascade_path} ({load_seconds * 1000:.1f}ms)")
+    return face_cascade
+
+
+def get_face_cascade():
+    """
+    Get the calling thread's face cascade, loading it on first use.
+    
+    Returns:
+        cv2.CascadeClassifier: Cascade owned by the calling thread
+    """
+    face_cascade = getattr(_cascade_local, 'face_cascade', None)
+    if face_cascade is None:
+        face_cascade = _load_face_cascade()
+        _cascade_local.face_cascade = face_cascade
+    return face_cascade
+
+
+def get_detector_metrics():
+    """
+    Get cascade load statistics across all threads.
+    
+    Returns:
+        dict: Number of loads, last and total load time, and cascade path
+    """
+    with _cascade_lock:
+        return dict(_cascade_metrics)
+
+
+# Downscaled detection defaults. Video-call tiles put the smallest faces at
+# roughly 4% of the frame's shorter side (a 5x5 gallery); the largest
+# (a speaker view) rarely exceed 90% of it.
+MIN_FACE_FRACTION = 0.04
+MAX_FACE_FRACTION = 0.9
+PYRAMID_LEVELS = 24
+CASCADE_WINDOW = 24
+
+
+def adaptive_detection_params(height, width, min_face_fraction=MIN_FACE_FRACTION,
+                              max_face_fraction=MAX_FACE_FRACTION, pyramid_levels=PYRAMID_LEVELS):
+    """
+    Choose detectMultiScale parameters from the expected face sizes.
+    
+    minSize and maxSize bound the pyramid to the face sizes a video-call
+    tile can produce, and scaleFactor spreads a fixed number of pyramid
+    levels across that range.
+    
+    Args:
+        height (int): Height of the image the cascade runs on
+        width (int): Width of the image the cascade runs on
+        min_face_fraction (float): Smallest face as a fraction of the shorter side
+        max_face_fraction (float): Largest face as a fraction of the shorter side
+        pyramid_levels (int): Target number of pyramid levels
+    
+    Returns:
+        dict: scaleFactor, minSize and maxSize keyword arguments
+    """
+    shorter_side = min(height, width)
+    min_side = max(CASCADE_WINDOW, int(shorter_side * min_face_fraction))
+    max_side = max(min_side + 1, int(shorter_side * max_face_fraction))
+    
+    # Spread the levels evenly (in log space) between min and max face size
+    scale_factor = (max_side / min_side) ** (1.0 / pyramid_levels)
+    scale_factor = min(1.2, max(1.05, scale_factor))
+    
+    return {
+        'scaleFactor': scale_factor,
+        'minSize': (min_side, min_side),
+        'maxSize': (max_side, max_side)
+    }
+
+
+# Video-call layout detection. Gutters between participant tiles are rows
+# or columns of near-constant colour; tiles smaller than MIN_TILE_FRACTION
+# of the frame are ignored. Inside a tile a face is at least
+# TILE_MIN_FACE_FRACTION of the tile's shorter side.
+LAYOUT_MAX_SIDE = 640
+GUTTER_TOLERANCE = 3.0
+MIN_TILE_FRACTION = 0.08
+TILE_MIN_FACE_FRACTION = 0.15
+
+_tile_executor = None
+_tile_executor_lock = threading.Lock()
+
+
+def _get_tile_executor():
+    """Get the shared thread pool used for per-tile detection."""
+    global _tile_executor
+    if _tile_executor is None:
+        with _tile_executor_lock:
+            if _tile_executor is None:
+                _tile_executor = ThreadPoolExecutor(
+                    max_workers=os.cpu_count() or 4,
+                    thread_name_prefix='face-tiles'
+                )
+    return _tile_executor
+
+
+def _content_runs(is_content, min_length):
+    """
+    Find runs of content between gutters along one axis.
+    
+    Args:
+        is_content (np.ndarray): Boolean mask, True where the line is not a gutter
+        min_length (int): Shortest run to keep
+    
+    Returns:
+        list: (start, end) pairs of each run, end exclusive
+    """
+    padded = np.concatenate(([False], is_content, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    starts, ends = edges[0::2], edges[1::2]
+    keep = (ends - starts) >= min_length
+    return list(zip(starts[keep].tolist(), ends[keep].tolist()))
 
 
 class FaceSanitizer:
@@ -41,6 +216,9 @@ class FaceSanitizer:
     - Handle multiple faces in a single image
     - Save sanitized images to organized directory structures
     
+    Instances are cheap and safe to share: the cascade is looked up per
+    thread from a pool of lazily loaded classifiers.
+    
     Attributes:
         face_cascade (cv2.CascadeClassifier): OpenCV cascade classifier for face detection
     """
@@ -56,29 +234,144 @@ class FaceSanitizer:
         - OpenCV's built-in Haar cascades: cv2.data.haarcascades
         - Viola-Jones face detection algorithm (2001)
         """
-        import os
+        # Fail early if no cascade can be loaded
+        get_face_cascade()
+    
+    @property
+    def face_cascade(self):
+        """The calling thread's cascade classifier."""
+        return get_face_cascade()
+    
+    def detect_faces(self, image, max_side=None, min_face_fraction=MIN_FACE_FRACTION):
+        """
+        Detect all faces in a decoded image.
+        
+        With max_side set, the cascade runs on a grayscale copy whose longer
+        side is at most max_side pixels, using adaptive pyramid parameters.
+        Rectangles are mapped back to full-resolution coordinates so crops
+        keep their original quality.
+        
+        Args:
+            image (np.ndarray): BGR image
+            max_side (int): Longest side to run detection at (None for full resolution)
+            min_face_fraction (float): Smallest expected face, as a fraction of the shorter side
+        
+        Returns:
+            list: Face rectangles as (x, y, w, h), empty if none found
+        """
+        # Convert to grayscale for face detection
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        
+        if not max_side:
+            faces = self.face_cascade.detectMultiScale(
+                gray,
+                scaleFactor=1.1,
+                minNeighbors=5,
+                minSize=(30, 30)
+            )
+            return list(faces) if len(faces) else []
+        
+        # Shrink the frame so the pyramid stays shallow
+        height, width = gray.shape
+        scale = min(1.0, max_side / max(height, width))
+        if scale < 1.0:
+            gray = cv2.resize(gray, (max(1, int(round(width * scale))), max(1, int(round(height * scale)))),
+                              interpolation=cv2.INTER_AREA)
+        
+        faces = self.face_cascade.detectMultiScale(
+            gray,
+            minNeighbors=5,
+            **adaptive_detection_params(gray.shape[0], gray.shape[1], min_face_fraction)
+        )
+        if len(faces) == 0:
+            return []
+        
+        # Map rectangles back to full-resolution coordinates
+        faces = np.round(np.asarray(faces, dtype=np.float64) / scale).astype(np.int32)
+        faces[:, 2] = np.minimum(faces[:, 2], width - faces[:, 0])
+        faces[:, 3] = np.minimum(faces[:, 3], height - faces[:, 1])
+        return list(faces)
+    
+    def find_tiles(self, image, min_tile_fraction=MIN_TILE_FRACTION):
+        """
+        Segment a meeting screenshot into participant tiles.
         
-        # Try multiple cascade paths in order of preference
-        cascade_paths = [
-            # Local project path
-            os.path.join(os.path.dirname(__file__), 'haarcascade_frontalface_default.xml'),
-            # OpenCV's built-in cascades
-            cv2.data.haarcascades + 'haarcascade_frontalface_default.xml',
-            cv2.data.haarcascades + 'haarcascade_frontalface_alt.xml',
-            cv2.data.haarcascades + 'haarcascade_frontalface_alt2.xml'
-        ]
+        Meet, Zoom and Teams lay participants out in a grid separated by
+        uniform gutters. Rows whose pixels are (nearly) constant split the
+        frame into bands, then columns are split the same way within each
+        band, which also handles a shorter, centred last row.
         
-        self.face_cascade = None
-        for cascade_path in cascade_paths:
-            if os.path.exists(cascade_path):
-                temp_cascade = cv2.CascadeClassifier(cascade_path)
-                if not temp_cascade.empty():
-                    self.face_cascade = temp_cascade
-                    print(f"Face detection loaded from: {cascade_path}")
-                    break
+        Args:
+            image (np.ndarray): BGR image
+            min_tile_fraction (float): Smallest tile side, as a fraction of the frame side
+        
+        Returns:
+            list: Tile rectangles as (x, y, w, h) in row-major order; empty
+                  if the frame does not look like a grid of two or more tiles
+        """
+        height, width = image.shape[:2]
+        
+        # Work on a small grayscale copy; gutters survive downscaling
+        scale = min(1.0, LAYOUT_MAX_SIDE / max(height, width))
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        if scale < 1.0:
+            gray = cv2.resize(gray, (max(1, int(width * scale)), max(1, int(height * scale))),
+                              interpolation=cv2.INTER_AREA)
+        gray = gray.astype(np.float32)
+        small_height, small_width = gray.shape
+        
+        row_bands = _content_runs(gray.std(axis=1) > GUTTER_TOLERANCE,
+                                  max(1, int(small_height * min_tile_fraction)))
+        tiles = []
+        for y1, y2 in row_bands:
+            band = gray[y1:y2]
+            for x1, x2 in _content_runs(band.std(axis=0) > GUTTER_TOLERANCE,
+                                        max(1, int(small_width * min_tile_fraction))):
+                tiles.append((
+                    int(x1 / scale), int(y1 / scale),
+                    min(width, int(np.ceil(x2 / scale))) - int(x1 / scale),
+                    min(height, int(np.ceil(y2 / scale))) - int(y1 / scale)
+                ))
         
-        if self.face_cascade is None or self.face_cascade.empty():
-            raise RuntimeError("Could not load any face detection cascade file")
+        return tiles if len(tiles) >= 2 else []
+    
+    def detect_faces_in_tiles(self, image, tiles, max_side=None):
+        """
+        Detect faces tile by tile, in parallel.
+        
+        Each tile gets its own small search window sized for a single
+        participant. Workers use their own thread's cascade.
+        
+        Args:
+            image (np.ndarray): BGR image
+            tiles (list): Tile rectangles from find_tiles
+            max_side (int): Longest side the whole frame would be detected at
+                            (None for full resolution); tiles are scaled to match
+        
+        Returns:
+            tuple: (faces, tile_indices) with faces as full-frame (x, y, w, h)
+                   rectangles and the index of the tile each face was found in
+        """
+        height, width = image.shape[:2]
+        frame_side = max(height, width)
+        
+        def detect_tile(tile):
+            x, y, w, h = tile
+            tile_side = max(w, h)
+            if max_side:
+                tile_side = max(CASCADE_WINDOW * 4, int(max_side * tile_side / frame_side))
+            faces = self.detect_faces(image[y:y + h, x:x + w], max_side=tile_side,
+                                      min_face_fraction=TILE_MIN_FACE_FRACTION)
+            return [(fx + x, fy + y, fw, fh) for fx, fy, fw, fh in faces]
+        
+        faces = []
+        tile_indices = []
+        for tile_index, tile_faces in enumerate(_get_tile_executor().map(detect_tile, tiles)):
+            # Largest face first within a tile
+            for face in sorted(tile_faces, key=lambda face: face[2] * face[3], reverse=True):
+                faces.append(face)
+                tile_indices.append(tile_index)
+        return faces, tile_indices
     
     def detect_and_crop_face(self, image_path, output_path=None, padding=0.2):
         """
@@ -237,6 +530,22 @@ class FaceSanitizer:
             return []
 
 
+_default_sanitizer = None
+
+
+def get_face_sanitizer():
+    """
+    Get a shared FaceSanitizer for the module-level helpers.
+    
+    Returns:
+        FaceSanitizer: Shared sanitizer instance
+    """
+    global _default_sanitizer
+    if _default_sanitizer is None:
+        _default_sanitizer = FaceSanitizer()
+    return _default_sanitizer
+
+
 # Utility function for easy import
 def sanitize_image_for_emotion_detection(image_path):
     """
@@ -248,8 +557,7 @@ def sanitize_image_for_emotion_detection(image_path):
     Returns:
         str: Path to the sanitized image (cropped to face)
     """
-    sanitizer = FaceSanitizer()
-    return sanitizer.sanitize_image(image_path)
+    return get_face_sanitizer().sanitize_image(image_path)
 
 
 def sanitize_all_faces_for_emotion_detection(image_path):
@@ -262,66 +570,236 @@ def sanitize_all_faces_for_emotion_detection(image_path):
     Returns:
         list: List of paths to all cropped face images
     """
-    sanitizer = FaceSanitizer()
-    
     try:
         # Read the image
         image = cv2.imread(image_path)
         if image is None:
             return []
         
-        # Convert to grayscale for face detection
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        
-        # Detect faces
-        faces = sanitizer.face_cascade.detectMultiScale(
-            gray,
-            scaleFactor=1.1,
-            minNeighbors=5,
-            minSize=(30, 30)
-        )
-        
-        if len(faces) == 0:
+        face_crops = crop_all_faces(image)
+        if not face_crops:
             return []
         
-        # Create sanitized directory
+        # Save the cropped faces next to the original in a Sanitized folder
         original_dir = os.path.dirname(image_path)
         sanitized_dir = os.path.join(original_dir, "Sanitized")
-        os.makedirs(sanitized_dir, exist_ok=True)
-        
-        cropped_faces = []
         base_name = os.path.splitext(os.path.basename(image_path))[0]
         extension = os.path.splitext(image_path)[1]
         
-        # Sort faces by size (largest first) to maintain consistency
-        faces_sorted = sorted(faces, key=lambda face: face[2] * face[3], reverse=True)
-        
-        # Crop each detected face
-        for i, (x, y, w, h) in enumerate(faces_sorted):
-            # Add padding around the face
-            padding_x = int(w * 0.2)
-            padding_y = int(h * 0.2)
-            
-            # Calculate crop coordinates with padding
-            x1 = max(0, x - padding_x)
-            y1 = max(0, y - padding_y)
-            x2 = min(image.shape[1], x + w + padding_x)
-            y2 = min(image.shape[0], y + h + padding_y)
-            
-            # Crop the face
-            face_crop = image[y1:y2, x1:x2]
-            
-            # Save the cropped face
-            output_path = os.path.join(sanitized_dir, f"{base_name}_face_{i+1}{extension}")
-            cv2.imwrite(output_path, face_crop)
-            cropped_faces.append(output_path)
-        
-        return cropped_faces
+        return save_face_crops(face_crops, sanitized_dir, base_name, extension)
         
     except Exception as e:
         return []
 
 
+# In-memory pipeline: decode once, crop views, write only when asked to
+def sniff_image_format(data):
+    """
+    Identify an encoded image by its leading bytes.
+    
+    Args:
+        data (bytes or memoryview): Encoded image data
+    
+    Returns:
+        str: 'png', 'jpeg' or 'webp', or None for anything else
+    """
+    header = bytes(data[:12])
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if header.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def decode_image(data):
+    """
+    Decode encoded image bytes (PNG, JPEG, WebP) into a BGR array.
+    
+    The encoded data is wrapped, not copied, before decoding.
+    
+    Args:
+        data (bytes or memoryview): Encoded image data
+    
+    Returns:
+        np.ndarray: Decoded BGR image, or None if decoding fails
+    """
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    if buffer.size == 0:
+        return None
+    return cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+
+
+def _padded_box(face, padding, image_shape):
+    """
+    Expand a face rectangle by a relative padding, clipped to the image.
+    
+    Returns:
+        tuple: (x1, y1, x2, y2) crop coordinates
+    """
+    x, y, w, h = face
+    padding_x = int(w * padding)
+    padding_y = int(h * padding)
+    x1 = max(0, x - padding_x)
+    y1 = max(0, y - padding_y)
+    x2 = min(image_shape[1], x + w + padding_x)
+    y2 = min(image_shape[0], y + h + padding_y)
+    return x1, y1, x2, y2
+
+
+class FaceDetection(NamedTuple):
+    """
+    Result of a single detection pass over a screenshot.
+    
+    Carried through the whole request so the cascade never runs twice on
+    the same frame, including when it found nothing.
+    
+    Attributes:
+        faces (list): Face rectangles as (x, y, w, h), largest first
+                      (tile by tile when the tile layout was used)
+        crops (list): Padded BGR face crops (views into the image), same order
+        tile_indices (list): Participant tile of each face, or None without tile layout
+    """
+    faces: list
+    crops: list
+    tile_indices: list = None
+    
+    @property
+    def face_count(self):
+        return len(self.faces)
+
+
+def crop_faces(image, faces, padding=0.2):
+    """
+    Crop already detected faces out of an image as array views.
+    
+    Args:
+        image (np.ndarray): BGR image
+        faces (list): Face rectangles as (x, y, w, h)
+        padding (float): Extra padding around each face (0.0 to 1.0)
+    
+    Returns:
+        list: List of BGR face crops (views into image), same order as faces
+    """
+    face_crops = []
+    for face in faces:
+        x1, y1, x2, y2 = _padded_box(face, padding, image.shape)
+        face_crops.append(image[y1:y2, x1:x2])
+    return face_crops
+
+
+def detect_all_faces(image, padding=0.2, max_side=None, use_tiles=False):
+    """
+    Run one detection pass and crop every face found.
+    
+    Args:
+        image (np.ndarray): BGR image
+        padding (float): Extra padding around each face (0.0 to 1.0)
+        max_side (int): Longest side to run detection at (None for full resolution)
+        use_tiles (bool): Search participant tiles of a video-call grid separately,
+                          falling back to the whole frame if no grid is found
+    
+    Returns:
+        FaceDetection: Faces (largest first) and their crops; empty if none found
+    """
+    sanitizer = get_face_sanitizer()
+    
+    if use_tiles:
+        tiles = sanitizer.find_tiles(image)
+        if tiles:
+            faces, tile_indices = sanitizer.detect_faces_in_tiles(image, tiles, max_side=max_side)
+            return FaceDetection(faces, crop_faces(image, faces, padding), tile_indices)
+    
+    faces = sanitizer.detect_faces(image, max_side=max_side)
+    
+    # Sort faces by size (largest first) to maintain consistency
+    faces_sorted = sorted(faces, key=lambda face: face[2] * face[3], reverse=True)
+    return FaceDetection(faces_sorted, crop_faces(image, faces_sorted, padding))
+
+
+def crop_all_faces(image, padding=0.2):
+    """
+    Detect all faces in a decoded image and return crops as array views.
+    
+    Crops are ordered by face size (largest first), matching
+    sanitize_all_faces_for_emotion_detection. No pixels are copied.
+    
+    Args:
+        image (np.ndarray): BGR image
+        padding (float): Extra padding around each face (0.0 to 1.0)
+    
+    Returns:
+        list: List of BGR face crops (views into image)
+    """
+    return detect_all_faces(image, padding).crops
+
+
+def downscale_frame(image, max_side=448):
+    """
+    Shrink a full frame for classification when no face was found.
+    
+    The classifier resizes to 224x224 anyway, so area-averaging the frame
+    down first is much cheaper than resampling the full resolution.
+    
+    Args:
+        image (np.ndarray): BGR image
+        max_side (int): Maximum width or height of the result
+    
+    Returns:
+        np.ndarray: Downscaled BGR image (the input itself if already small)
+    """
+    height, width = image.shape[:2]
+    scale = max_side / max(height, width)
+    if scale >= 1.0:
+        return image
+    size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
+def crop_largest_face(image, padding=0.2):
+    """
+    In-memory counterpart of sanitize_image_for_emotion_detection.
+    
+    Args:
+        image (np.ndarray): BGR image
+        padding (float): Extra padding around the face (0.0 to 1.0)
+    
+    Returns:
+        np.ndarray: View of the largest face, or the whole image if none found
+    """
+    faces = get_face_sanitizer().detect_faces(image)
+    if len(faces) == 0:
+        return image
+    
+    largest_face = max(faces, key=lambda face: face[2] * face[3])
+    x1, y1, x2, y2 = _padded_box(largest_face, padding, image.shape)
+    return image[y1:y2, x1:x2]
+
+
+def save_face_crops(face_crops, sanitized_dir, base_name, extension=".png"):
+    """
+    Write face crops to disk, e.g. for debugging.
+    
+    Args:
+        face_crops (list): BGR face crops
+        sanitized_dir (str): Directory to save the crops in
+        base_name (str): File name prefix, usually the screenshot name
+        extension (str): Image file extension
+    
+    Returns:
+        list: List of paths to the saved crops
+    """
+    os.makedirs(sanitized_dir, exist_ok=True)
+    
+    output_paths = []
+    for i, face_crop in enumerate(face_crops):
+        output_path = os.path.join(sanitized_dir, f"{base_name}_face_{i+1}{extension}")
+        cv2.imwrite(output_path, face_crop)
+        output_paths.append(output_path)
+    return output_paths
+
+
 # Test function
 def test_face_sanitizer(image_path):
     """
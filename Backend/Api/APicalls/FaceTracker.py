@@ -0,0 +1,340 @@
+"""
+FaceTracker.py - Temporal Face Tracking Between Screenshots
+
+Consecutive screenshots of a meeting arrive every few seconds from the same
+layout, so faces rarely move far. This module remembers the face boxes of
+the previous frame and first looks for each face only in an expanded region
+of interest (ROI) around it. A full-frame scan runs every K frames, when a
+tracked face is lost, or when nothing is being tracked.
+
+Tracked faces keep a stable track id across frames, which replaces the
+size-sorted "Person N" ordering. Each track also remembers a small
+thumbnail of the face as it was last classified, so faces that have not
+visibly changed can reuse their previous emotion instead of running the
+model again.
+"""
+
+import threading
+from collections import Counter
+
+import cv2
+import numpy as np
+
+from APicalls.FaceSanitizer import (
+    FaceDetection, crop_faces, detect_all_faces, get_face_sanitizer
+)
+
+
+class TrackedFace:
+    """
+    A face followed across frames.
+
+    Attributes:
+        track_id (int): Stable participant id within the session (1-based)
+        box (tuple): Last known face rectangle as (x, y, w, h)
+        tile_index (int): Participant tile from the last full scan, if known
+        thumbnail (np.ndarray): Face thumbnail when the emotion was last classified
+        emotion: Emotion result from that classification
+        reuse_count (int): Frames the emotion has been reused since then
+    """
+
+    __slots__ = ('track_id', 'box', 'tile_index', 'thumbnail', 'emotion', 'reuse_count')
+
+    def __init__(self, track_id, box, tile_index=None):
+        self.track_id = track_id
+        self.box = tuple(int(v) for v in box)
+        self.tile_index = tile_index
+        self.thumbnail = None
+        self.emotion = None
+        self.reuse_count = 0
+
+
+# Side of the grayscale thumbnail used for change detection
+THUMBNAIL_SIZE = 16
+
+
+def face_thumbnail(face_crop):
+    """
+    Shrink a face crop to a small grayscale thumbnail for change detection.
+
+    Args:
+        face_crop (np.ndarray): BGR face crop
+
+    Returns:
+        np.ndarray: Float32 array of shape (16, 16)
+    """
+    gray = cv2.cvtColor(face_crop, cv2.COLOR_BGR2GRAY)
+    thumbnail = cv2.resize(gray, (THUMBNAIL_SIZE, THUMBNAIL_SIZE), interpolation=cv2.INTER_AREA)
+    return thumbnail.astype(np.float32)
+
+
+def label_distribution_distance(labels_a, labels_b):
+    """
+    Total variation distance between the label frequencies of two emotion streams.
+
+    Args:
+        labels_a (list): Emotion labels of one stream
+        labels_b (list): Emotion labels of the other stream
+
+    Returns:
+        float: 0 for identical distributions, 1 for disjoint ones
+    """
+    counts_a = Counter(labels_a)
+    counts_b = Counter(labels_b)
+    return 0.5 * sum(
+        abs(counts_a[label] / max(1, len(labels_a)) - counts_b[label] / max(1, len(labels_b)))
+        for label in set(counts_a) | set(counts_b)
+    )
+
+
+def box_iou(box_a, box_b):
+    """Intersection over union of two (x, y, w, h) rectangles."""
+    ax, ay, aw, ah = box_a
+    bx, by, bw, bh = box_b
+    inter_w = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    inter_h = max(0, min(ay + ah, by + bh) - max(ay, by))
+    intersection = inter_w * inter_h
+    union = aw * ah + bw * bh - intersection
+    return intersection / union if union else 0.0
+
+
+class FaceTracker:
+    """
+    Tracks faces of one meeting session across screenshots.
+
+    Calls are serialized with a lock, since uploads for the same session
+    may overlap.
+
+    Attributes:
+        full_scan_interval (int): Run a full-frame scan at least every this many frames
+        roi_expand (float): ROI margin on each side, as a fraction of the face size
+        match_iou (float): Minimum IoU to match a detection to an existing track
+        change_threshold (float): Mean absolute thumbnail difference (0-255 scale)
+                                  below which a face counts as unchanged; 0 disables reuse
+        max_reuse (int): Reclassify a face after reusing its emotion this many times
+        frames (int): Frames processed so far
+        full_scans (int): Frames that needed a full-frame scan
+        classified_faces (int): Faces sent to the classifier
+        reused_faces (int): Faces that reused their previous emotion
+    """
+
+    # Inside an ROI the face fills a large part of the search window
+    ROI_MIN_FACE_FRACTION = 0.3
+
+    def __init__(self, full_scan_interval=10, roi_expand=0.5, match_iou=0.3,
+                 change_threshold=4.0, max_reuse=10):
+        self.full_scan_interval = full_scan_interval
+        self.roi_expand = roi_expand
+        self.match_iou = match_iou
+        self.change_threshold = change_threshold
+        self.max_reuse = max_reuse
+        self.tracks = []
+        self.next_track_id = 1
+        self.frames = 0
+        self.full_scans = 0
+        self.classified_faces = 0
+        self.reused_faces = 0
+        self._lock = threading.Lock()
+
+    def track(self, image, padding=0.2, max_side=None, use_tiles=False):
+        """
+        Find faces in a new frame, reusing the previous frame's boxes.
+
+        Args:
+            image (np.ndarray): BGR image
+            padding (float): Extra padding around each face crop
+            max_side (int): Longest side for full-frame detection (None for full resolution)
+            use_tiles (bool): Use the tile layout for full-frame scans
+
+        Returns:
+            tuple: (detection, track_ids) where detection is a FaceDetection
+                   ordered by track id and track_ids gives each face's track
+        """
+        with self._lock:
+            self.frames += 1
+
+            faces = None
+            if self.tracks and self.frames % max(1, self.full_scan_interval) != 0:
+                faces = self._search_rois(image, max_side)
+
+            if faces is None:
+                # Nothing tracked, periodic refresh, or a tracked face was lost
+                self.full_scans += 1
+                detection = detect_all_faces(image, padding, max_side=max_side, use_tiles=use_tiles)
+                self._update_tracks(detection.faces, detection.tile_indices)
+            else:
+                for tracked, face in zip(self.tracks, faces):
+                    tracked.box = tuple(int(v) for v in face)
+
+            faces = [tracked.box for tracked in self.tracks]
+            tile_indices = None
+            if any(tracked.tile_index is not None for tracked in self.tracks):
+                tile_indices = [tracked.tile_index for tracked in self.tracks]
+
+            detection = FaceDetection(faces, crop_faces(image, faces, padding), tile_indices)
+            return detection, [tracked.track_id for tracked in self.tracks]
+
+    def reuse_unchanged(self, face_crops, track_ids):
+        """
+        Reuse previous emotions for faces that have not visibly changed.
+
+        Each crop is compared with the thumbnail its track had when it was
+        last classified. Comparing against that thumbnail, rather than the
+        previous frame, keeps slow drift from accumulating.
+
+        Args:
+            face_crops (list): BGR face crops of the current frame
+            track_ids (list): Track id of each crop
+
+        Returns:
+            tuple: (emotions, thumbnails) where emotions holds the reused
+                   result per face, or None where the face must be classified
+        """
+        with self._lock:
+            tracks = {tracked.track_id: tracked for tracked in self.tracks}
+            emotions = []
+            thumbnails = []
+            for face_crop, track_id in zip(face_crops, track_ids):
+                thumbnail = face_thumbnail(face_crop)
+                thumbnails.append(thumbnail)
+
+                tracked = tracks.get(track_id)
+                emotion = None
+                if (tracked is not None and tracked.thumbnail is not None
+                        and self.change_threshold > 0 and tracked.reuse_count < self.max_reuse):
+                    change = float(np.mean(np.abs(thumbnail - tracked.thumbnail)))
+                    if change < self.change_threshold:
+                        emotion = tracked.emotion
+                        tracked.reuse_count += 1
+                        self.reused_faces += 1
+                emotions.append(emotion)
+            return emotions, thumbnails
+
+    def remember_emotions(self, track_ids, emotions, thumbnails):
+        """
+        Store freshly classified emotions with the thumbnails they came from.
+
+        Args:
+            track_ids (list): Track id of each classified face
+            emotions (list): Classification result of each face
+            thumbnails (list): Thumbnail of each face from reuse_unchanged
+        """
+        with self._lock:
+            tracks = {tracked.track_id: tracked for tracked in self.tracks}
+            for track_id, emotion, thumbnail in zip(track_ids, emotions, thumbnails):
+                self.classified_faces += 1
+                tracked = tracks.get(track_id)
+                if tracked is not None:
+                    tracked.thumbnail = thumbnail
+                    tracked.emotion = emotion
+                    tracked.reuse_count = 0
+
+    def _roi(self, box, image_shape):
+        """Expand a face box into a search region, clipped to the image."""
+        x, y, w, h = box
+        margin_x = int(w * self.roi_expand)
+        margin_y = int(h * self.roi_expand)
+        x1 = max(0, x - margin_x)
+        y1 = max(0, y - margin_y)
+        x2 = min(image_shape[1], x + w + margin_x)
+        y2 = min(image_shape[0], y + h + margin_y)
+        return x1, y1, x2, y2
+
+    def _search_rois(self, image, max_side):
+        """
+        Look for each tracked face near its previous position.
+
+        Returns:
+            list: New box for every track, or None if any face was lost
+        """
+        sanitizer = get_face_sanitizer()
+        frame_side = max(image.shape[:2])
+
+        new_boxes = []
+        for tracked in self.tracks:
+            x1, y1, x2, y2 = self._roi(tracked.box, image.shape)
+            roi_side = max(x2 - x1, y2 - y1)
+            if max_side:
+                # Match the resolution full-frame detection would use
+                roi_side = max(96, int(max_side * roi_side / frame_side))
+
+            candidates = sanitizer.detect_faces(
+                image[y1:y2, x1:x2],
+                max_side=roi_side,
+                min_face_fraction=self.ROI_MIN_FACE_FRACTION
+            )
+            if len(candidates) == 0:
+                return None
+
+            # Keep the candidate closest to where the face was
+            candidates = [(fx + x1, fy + y1, fw, fh) for fx, fy, fw, fh in candidates]
+            best = max(candidates, key=lambda box: box_iou(box, tracked.box))
+            if box_iou(best, tracked.box) < self.match_iou:
+                return None
+            new_boxes.append(best)
+
+        return new_boxes
+
+    def _update_tracks(self, faces, tile_indices=None):
+        """
+        Match full-scan detections to existing tracks by IoU.
+
+        Matched tracks keep their id, unmatched detections start new tracks
+        and tracks without a detection are dropped.
+        """
+        if tile_indices is None:
+            tile_indices = [None] * len(faces)
+
+        # Greedy matching, best overlaps first
+        pairs = []
+        for track_index, tracked in enumerate(self.tracks):
+            for face_index, face in enumerate(faces):
+                iou = box_iou(tracked.box, face)
+                if iou >= self.match_iou:
+                    pairs.append((iou, track_index, face_index))
+        pairs.sort(reverse=True)
+
+        matched_tracks = {}
+        used_faces = set()
+        for _, track_index, face_index in pairs:
+            if track_index in matched_tracks or face_index in used_faces:
+                continue
+            matched_tracks[track_index] = face_index
+            used_faces.add(face_index)
+
+        tracks = []
+        for track_index, face_index in matched_tracks.items():
+            tracked = self.tracks[track_index]
+            tracked.box = tuple(int(v) for v in faces[face_index])
+            tracked.tile_index = tile_indices[face_index]
+            tracks.append(tracked)
+
+        for face_index, face in enumerate(faces):
+            if face_index not in used_faces:
+                tracks.append(TrackedFace(self.next_track_id, face, tile_indices[face_index]))
+                self.next_track_id += 1
+
+        # Stable participant order: by track id
+        tracks.sort(key=lambda tracked: tracked.track_id)
+        self.tracks = tracks
+
+    def get_stats(self):
+        """
+        Get tracking statistics.
+
+        Returns:
+            dict: Frames processed, full scans, the fraction of frames
+                  served from ROIs alone, and the fraction of faces whose
+                  classification was skipped (skip ratio)
+        """
+        with self._lock:
+            roi_frames = self.frames - self.full_scans
+            total_faces = self.classified_faces + self.reused_faces
+            return {
+                'frames': self.frames,
+                'full_scans': self.full_scans,
+                'roi_only_ratio': roi_frames / self.frames if self.frames else 0.0,
+                'tracked_faces': len(self.tracks),
+                'change_threshold': self.change_threshold,
+                'skip_ratio': self.reused_faces / total_faces if total_faces else 0.0
+            }
@@ -1,137 +1,202 @@
-import tensorflow as tf
+import cv2
 import numpy as np
 from PIL import Image
-import requests
-import json
+import random
 
+from APicalls.ModelRegistry import get_emotion_model, MODEL_INPUT_SIZE
+from APicalls.InferenceBatcher import get_inference_batcher
+from APicalls.EmotionResult import EmotionResult, result_from_probabilities, format_emotion
 
-def identify(image_path):
+
+def _random_test_result(face_index=None, bbox=None):
+    """Return a random emotion result, used when classification fails."""
+    test_emotions = ["happy", "sad", "angry", "neutral", "surprise"]
+    test_emotion = random.choice(test_emotions)
+    test_confidence = random.uniform(0.70, 0.95)
+    return EmotionResult(-1, test_emotion, test_confidence, None, face_index, bbox)
+
+
+def _open_face(face):
+    """Open a face given as a file path or a BGR array (e.g. a crop view)."""
+    if isinstance(face, np.ndarray):
+        # OpenCV crops are BGR; the model was trained on RGB
+        return Image.fromarray(cv2.cvtColor(face, cv2.COLOR_BGR2RGB))
+    return Image.open(face)
+
+
+def preprocess_face(face, out):
     """
-    Identify emotion from image using Teachable Machine model and return the predicted emotion as a string.
+    Load one face image and write it into a preallocated batch slot.
+
+    Args:
+        face (str or np.ndarray): Path to the face image, or a BGR face crop
+        out (np.ndarray): Float32 slot of shape (224, 224, 3) to fill
     """
-    try:
-        # Teachable Machine model URL
-        model_url = "https://teachablemachine.withgoogle.com/models/30ExGCQQo/"
-        
-        # Get model metadata
-        try:
-            metadata_response = requests.get(model_url + "metadata.json")
-            metadata = metadata_response.json()
-            class_names = metadata.get('labels', [
-                "angry", "disgust", "fear", "happy", "sad", "surprise", "neutral"
-            ])
-        except:
-            # Fallback class names
-            class_names = ["angry", "disgust", "fear", "happy", "sad", "surprise", "neutral"]
-        
-        # Load model from Teachable Machine
-        try:
-            model = tf.keras.models.load_model(
-                tf.keras.utils.get_file(
-                    "teachable_machine_model",
-                    model_url + "model.json",
-                    cache_dir="/tmp"
-                )
-            )
-        except:
-            # Alternative approach - load model components separately
-            model_json_response = requests.get(model_url + "model.json")
-            model_json = model_json_response.json()
-            
-            # Create a simple model for testing
-            model = tf.keras.Sequential([
-                tf.keras.layers.Input(shape=(224, 224, 3)),
-                tf.keras.layers.GlobalAveragePooling2D(),
-                tf.keras.layers.Dense(len(class_names), activation='softmax')
-            ])
-            model.compile(optimizer='adam', loss='categorical_crossentropy')
-
-        # Load and preprocess the image
-        image = Image.open(image_path)
-        
+    with _open_face(face) as image:
         # Convert to RGB if needed
         if image.mode != 'RGB':
             image = image.convert('RGB')
-        
+
         # Resize image to 224x224 (standard for Teachable Machine)
-        image = image.resize((224, 224))
-        
-        # Convert to numpy array and normalize (0-1 range)
-        image_array = np.array(image).astype(np.float32)
-        image_array = image_array / 255.0
-        
-        # Add batch dimension
-        image_array = np.expand_dims(image_array, axis=0)
-        
-        # Make prediction
-        predictions = model.predict(image_array, verbose=0)
-        
-        # Get the class with highest probability
-        predicted_class_id = np.argmax(predictions[0])
-        confidence = float(predictions[0][predicted_class_id])
-        
-        # Get emotion name and add emoji
-        emotion_emojis = {
-            "happy": "😊",
-            "sad": "😢", 
-            "angry": "😠",
-            "fear": "😨",
-            "surprise": "😲",
-            "disgust": "🤢",
-            "neutral": "😐"
-        }
-        
-        if predicted_class_id < len(class_names):
-            predicted_emotion = class_names[predicted_class_id]
-        else:
-            predicted_emotion = "unknown"
-        
-        # Get emoji for the emotion
-        emoji = emotion_emojis.get(predicted_emotion.lower(), "🤔")
-        
-        # Return emotion with emoji and percentage
-        percentage = confidence * 100
-        return f"{emoji} {predicted_emotion} ({percentage:.1f}%)"
-        
-    except Exception as e:
-        # Return a random emotion for testing with emoji
-        import random
-        test_emotions = [
-            ("😊", "happy"), ("😢", "sad"), ("😠", "angry"), 
-            ("😐", "neutral"), ("😲", "surprise")
+        image = image.resize((MODEL_INPUT_SIZE, MODEL_INPUT_SIZE))
+
+        # Normalize to the 0-1 range directly into the batch slot
+        np.divide(np.asarray(image), np.float32(255.0), out=out)
+
+
+def preprocess_faces(face_image_paths):
+    """
+    Preprocess face images into a single contiguous batch.
+
+    Args:
+        face_image_paths (list): List of paths to face images or BGR face crops
+
+    Returns:
+        tuple: (batch, failed) where batch is a float32 array of shape
+               (N, 224, 224, 3) and failed is a list of indices that
+               could not be loaded (left as zeros in the batch)
+    """
+    batch = np.zeros((len(face_image_paths), MODEL_INPUT_SIZE, MODEL_INPUT_SIZE, 3), dtype=np.float32)
+    failed = []
+    for i, face_path in enumerate(face_image_paths):
+        try:
+            preprocess_face(face_path, batch[i])
+        except Exception:
+            failed.append(i)
+    return batch, failed
+
+
+def classify_faces(faces, face_indices=None, bboxes=None):
+    """
+    Classify faces in a single batched forward pass, shared with faces
+    from concurrent requests by the inference batcher.
+
+    Args:
+        faces (list): List of paths to face images or BGR face crops
+        face_indices (list): Participant number of each face (defaults to 1..N)
+        bboxes (list): Face rectangle of each face in the screenshot, if known
+
+    Returns:
+        list: EmotionResult for each face, in input order
+    """
+    if not faces:
+        return []
+    if face_indices is None:
+        face_indices = range(1, len(faces) + 1)
+    if bboxes is None:
+        bboxes = [None] * len(faces)
+
+    try:
+        emotion_model = get_emotion_model()
+        batch, failed = preprocess_faces(faces)
+        # Shares a forward pass with concurrent requests
+        predictions = get_inference_batcher().predict(batch)
+        results = [
+            result_from_probabilities(row, emotion_model.class_names, face_index, bbox)
+            for row, face_index, bbox in zip(predictions, face_indices, bboxes)
         ]
-        emoji, test_emotion = random.choice(test_emotions)
-        test_percentage = random.uniform(70, 95)
-        return f"{emoji} {test_emotion} ({test_percentage:.1f}%)"
+    except Exception as e:
+        failed = range(len(faces))
+        results = [None] * len(faces)
+
+    # Fallback for individual face processing errors
+    for i in failed:
+        results[i] = _random_test_result(face_indices[i], bboxes[i])
+
+    return results
 
 
-def identify_multiple_faces(face_image_paths):
+def classify_image(image_path):
+    """
+    Classify a single image that is not tied to a participant.
+
+    Args:
+        image_path (str or np.ndarray): Path to an image, or a BGR image array
+
+    Returns:
+        EmotionResult: Result without a face index
+    """
+    try:
+        # Shared classifier, loaded once per worker process
+        emotion_model = get_emotion_model()
+
+        # Load and preprocess the image into a batch of one
+        batch = np.empty((1, MODEL_INPUT_SIZE, MODEL_INPUT_SIZE, 3), dtype=np.float32)
+        preprocess_face(image_path, batch[0])
+
+        # Make prediction (batched with concurrent requests)
+        predictions = get_inference_batcher().predict(batch)
+
+        return result_from_probabilities(predictions[0], emotion_model.class_names)
+
+    except Exception as e:
+        # Return a random emotion for testing
+        return _random_test_result()
+
+
+def identify(image_path):
+    """
+    Identify emotion from image using Teachable Machine model and return the predicted emotion as a string.
+
+    image_path may also be a decoded BGR image array.
+    """
+    return format_emotion(classify_image(image_path))
+
+
+def identify_multiple_faces(face_image_paths, person_ids=None):
     """
     Identify emotions from multiple face images and return all results.
-    
+
+    All faces are preprocessed into one batch and classified with a single
+    forward pass. Results keep the order of face_image_paths.
+
     Args:
-        face_image_paths (list): List of paths to face images
-        
+        face_image_paths (list): List of paths to face images or BGR face crops
+        person_ids (list): Stable participant number for each face
+                           (defaults to 1..N in list order)
+
     Returns:
         list: List of emotion strings for each face
     """
-    if not face_image_paths:
-        return []
-    
-    emotions = []
-    for i, face_path in enumerate(face_image_paths):
-        try:
-            emotion = identify(face_path)
-            emotions.append(f"Person {i+1}: {emotion}")
-        except Exception as e:
-            # Fallback for individual face processing errors
-            import random
-            test_emotions = [
-                ("😊", "happy"), ("😢", "sad"), ("😠", "angry"), 
-                ("😐", "neutral"), ("😲", "surprise")
-            ]
-            emoji, test_emotion = random.choice(test_emotions)
-            test_percentage = random.uniform(70, 95)
-            emotions.append(f"Person {i+1}: {emoji} {test_emotion} ({test_percentage:.1f}%)")
-    
-    return emotions
\ No newline at end of file
+    return [format_emotion(result) for result in classify_faces(face_image_paths, person_ids)]
+
+
+def classify_tracked_faces(face_tracker, face_crops, track_ids, bboxes=None):
+    """
+    Classify tracked faces, skipping faces that have not changed.
+
+    Faces whose crop barely differs from when they were last classified
+    reuse that result; the rest are classified in one batch.
+
+    Args:
+        face_tracker (FaceTracker): Tracker of the current session
+        face_crops (list): BGR face crops, ordered like track_ids
+        track_ids (list): Track id of each face
+        bboxes (list): Face rectangle of each face in the screenshot
+
+    Returns:
+        list: EmotionResult for each face
+    """
+    if bboxes is None:
+        bboxes = [None] * len(face_crops)
+
+    results, thumbnails = face_tracker.reuse_unchanged(face_crops, track_ids)
+    changed = []
+    for i, result in enumerate(results):
+        if result is None:
+            changed.append(i)
+        else:
+            # Reused result, but the face may have moved
+            results[i] = result._replace(bbox=bboxes[i])
+
+    if changed:
+        changed_ids = [track_ids[i] for i in changed]
+        new_results = classify_faces(
+            [face_crops[i] for i in changed],
+            face_indices=changed_ids,
+            bboxes=[bboxes[i] for i in changed]
+        )
+        for i, result in zip(changed, new_results):
+            results[i] = result
+        face_tracker.remember_emotions(changed_ids, new_results, [thumbnails[i] for i in changed])
+    return results
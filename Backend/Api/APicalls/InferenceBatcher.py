@@ -0,0 +1,231 @@
+"""
+InferenceBatcher.py - Cross-request Micro-batching for the Emotion Classifier
+
+With many meetings uploading at once, each request used to run its own
+small forward pass, one after another behind the model lock. The batcher
+sits in front of EmotionModel.predict():
+
+1. Callers hand in their preprocessed face batch and block on a future.
+2. A single scheduler thread takes the first waiting batch and keeps
+   collecting batches from other requests until max_batch_size faces are
+   gathered or max_wait_ms has passed since the first one arrived.
+3. It runs one forward pass over all of them and hands each caller back
+   its own rows.
+
+A lone request waits at most max_wait_ms extra; under load, per-pass
+overhead is shared by every face in the batch. Batch sizes and queue
+delays are recorded in histograms (get_stats()).
+
+Configured with MOODLINK_BATCH_MAX_WAIT_MS (0 disables batching) and
+MOODLINK_BATCH_MAX_SIZE.
+"""
+
+import bisect
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import NamedTuple
+
+import numpy as np
+
+from APicalls.ModelRegistry import MODEL_INPUT_SIZE, get_emotion_model
+
+# Histogram bucket upper bounds
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+QUEUE_DELAY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram.
+
+    Attributes:
+        bounds (tuple): Inclusive upper bound of each bucket; values above
+                        the last bound go to an overflow bucket
+    """
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def to_dict(self):
+        """Bucket counts keyed "<=bound" (plus ">last"), count and mean."""
+        buckets = {f"<={bound:g}": count for bound, count in zip(self.bounds, self.counts)}
+        buckets[f">{self.bounds[-1]:g}"] = self.counts[-1]
+        return {
+            'buckets': buckets,
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0
+        }
+
+
+class _PendingBatch(NamedTuple):
+    batch: np.ndarray
+    future: Future
+    enqueued: float
+
+
+class InferenceBatcher:
+    """
+    Dynamic batching scheduler in front of the emotion classifier.
+
+    Attributes:
+        model_getter (callable): Returns the EmotionModel to predict with
+        max_batch_size (int): Most faces per forward pass
+        max_wait_ms (float): Longest a request waits for others to join
+                             its batch; 0 calls the model directly
+    """
+
+    def __init__(self, model_getter=get_emotion_model, max_batch_size=32, max_wait_ms=5.0):
+        self.model_getter = model_getter
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max_wait_ms
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        # Reused input buffer, only touched by the scheduler thread
+        self._buffer = None
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.requests_per_batch = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_delays_ms = Histogram(QUEUE_DELAY_BUCKETS_MS)
+
+    def predict(self, batch):
+        """
+        Classify a batch of preprocessed faces, sharing a forward pass with
+        concurrent callers.
+
+        Args:
+            batch (np.ndarray): Float32 array of shape (N, 224, 224, 3)
+
+        Returns:
+            np.ndarray: Class probabilities of shape (N, num_classes)
+        """
+        batch = np.asarray(batch, dtype=np.float32)
+        if batch.ndim == 3:
+            batch = np.expand_dims(batch, axis=0)
+        if self.max_wait_ms <= 0 or len(batch) >= self.max_batch_size:
+            # Batching disabled, or the request fills a batch on its own
+            return self.model_getter().predict(batch)
+
+        self._ensure_started()
+        future = Future()
+        self._queue.put(_PendingBatch(batch, future, time.monotonic()))
+        return future.result()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._schedule, name="inference-batcher",
+                                                daemon=True)
+                self._thread.start()
+
+    def _schedule(self):
+        carry = None
+        while True:
+            first = carry or self._queue.get()
+            carry = None
+            pending = [first]
+            rows = len(first.batch)
+            deadline = first.enqueued + self.max_wait_ms / 1000
+
+            while rows < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if rows + len(item.batch) > self.max_batch_size:
+                    # Does not fit: it opens the next batch
+                    carry = item
+                    break
+                pending.append(item)
+                rows += len(item.batch)
+
+            self._run_batch(pending, rows)
+
+    def _run_batch(self, pending, rows):
+        """Run one forward pass over the pending requests and route the rows back."""
+        started = time.monotonic()
+        with self._stats_lock:
+            self.batch_sizes.observe(rows)
+            self.requests_per_batch.observe(len(pending))
+            for item in pending:
+                self.queue_delays_ms.observe((started - item.enqueued) * 1000)
+
+        try:
+            if len(pending) == 1:
+                batch = pending[0].batch
+            else:
+                if self._buffer is None:
+                    self._buffer = np.empty(
+                        (self.max_batch_size, MODEL_INPUT_SIZE, MODEL_INPUT_SIZE, 3), dtype=np.float32
+                    )
+                offset = 0
+                for item in pending:
+                    self._buffer[offset:offset + len(item.batch)] = item.batch
+                    offset += len(item.batch)
+                batch = self._buffer[:rows]
+            predictions = self.model_getter().predict(batch)
+        except Exception as e:
+            for item in pending:
+                item.future.set_exception(e)
+            return
+
+        offset = 0
+        for item in pending:
+            item.future.set_result(predictions[offset:offset + len(item.batch)])
+            offset += len(item.batch)
+
+    def get_stats(self):
+        """
+        Get batching histograms.
+
+        Returns:
+            dict: Configuration plus histograms of faces per forward pass,
+                  requests per forward pass and queue delay in milliseconds
+        """
+        with self._stats_lock:
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait_ms,
+                'queue_depth': self._queue.qsize(),
+                'batch_size': self.batch_sizes.to_dict(),
+                'requests_per_batch': self.requests_per_batch.to_dict(),
+                'queue_delay_ms': self.queue_delays_ms.to_dict()
+            }
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_inference_batcher():
+    """
+    Get the process-wide inference batcher.
+
+    Returns:
+        InferenceBatcher: Batcher configured from the Django settings
+    """
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                from django.conf import settings
+                _batcher = InferenceBatcher(
+                    max_batch_size=settings.MOODLINK_BATCH_MAX_SIZE,
+                    max_wait_ms=settings.MOODLINK_BATCH_MAX_WAIT_MS
+                )
+    return _batcher
@@ -8,10 +8,21 @@ provides meeting summary functionality, and manages cleanup operations.
 import json
 import os
 import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime
 from typing import Dict, List, Any
-from APicalls.gemini import gemini
-from APicalls.html_template import HTML_TEMPLATE
+
+import numpy as np
+
+from APicalls.FaceTracker import FaceTracker
+from APicalls.EmotionResult import EmotionResult
+from APicalls.EmotionTimeline import EmotionTimeline
+from APicalls.SessionStats import SessionStats
+from APicalls.ReportRenderer import build_analysis_prompt, render_report
+from APicalls.TimelineSegments import TimelineSegment, summarize_timeline
 
 
 class MeetingSession:
@@ -29,47 +40,61 @@ class MeetingSession:
         self.session_id = session_id or self._generate_session_id()
         self.start_time = datetime.now()
         self.end_time = None
-        self.emotion_data = []  # List of {timestamp, emotion, confidence, filename}
-        self.image_paths = []   # List of all image file paths for cleanup
+        self.emotion_data = EmotionTimeline()  # Columnar store of emotion readings
+        self.stats = SessionStats()  # Running aggregates, updated per reading
+        self.image_paths = {}   # Image file paths for cleanup (insertion-ordered set)
         self.is_active = True
+        self.face_tracker = FaceTracker()  # Face boxes carried between screenshots
+        self.last_activity = time.monotonic()  # For idle eviction
+        self._lock = threading.Lock()  # Guards the timeline and image paths
         
     def _generate_session_id(self) -> str:
         """Generate a unique session ID based on timestamp."""
-        return f"meeting_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        # Random suffix: several sessions can start within the same second
+        return f"meeting_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+    
+    def touch(self):
+        """Record activity on the session."""
+        self.last_activity = time.monotonic()
     
-    def add_emotion_data(self, emotion: str, confidence: float = None, 
-                        filename: str = None, sanitized_path: str = None):
+    def idle_seconds(self) -> float:
+        """Seconds since the session was last used."""
+        return time.monotonic() - self.last_activity
+    
+    def add_emotion_data(self, result: EmotionResult, filename: str = None,
+                        sanitized_path: str = None):
         """
         Add emotion data point to the session.
         
         Args:
-            emotion (str): Detected emotion with emoji
-            confidence (float): Confidence score
+            result (EmotionResult): Classified emotion for one face
             filename (str): Original screenshot filename
             sanitized_path (str): Path to sanitized face image
         """
-        if not self.is_active:
-            return
+        with self._lock:
+            # Checked under the lock: once the session has ended and been
+            # cleaned up, no reading may slip in
+            if not self.is_active:
+                return
+            self.last_activity = time.monotonic()
+            timestamp = datetime.now().timestamp()
+            self.emotion_data.append(
+                timestamp,
+                result.label,
+                confidence=result.confidence,
+                participant=result.face_index,
+                filename=filename,
+                sanitized_path=sanitized_path
+            )
+            self.stats.add(timestamp, result.label, result.confidence, result.face_index)
             
-        emotion_entry = {
-            'timestamp': datetime.now().isoformat(),
-            'emotion': emotion,
-            'confidence': confidence,
-            'filename': filename,
-            'sanitized_path': sanitized_path,
-            'elapsed_minutes': self._get_elapsed_minutes()
-        }
-        
-        self.emotion_data.append(emotion_entry)
-        
-        # Track image paths for cleanup (avoid duplicates)
-        if filename:
-            original_path = f"/Users/alvishprasla/Code/JS/Moodlink/MoodLink/Testimages/{filename}"
-            if original_path not in self.image_paths:
-                self.image_paths.append(original_path)
-                
-        if sanitized_path and sanitized_path not in self.image_paths:
-            self.image_paths.append(sanitized_path)
+            # Track image paths for cleanup (avoid duplicates)
+            if filename:
+                original_path = f"/Users/alvishprasla/Code/JS/Moodlink/MoodLink/Testimages/{filename}"
+                self.image_paths.setdefault(original_path, None)
+                    
+            if sanitized_path:
+                self.image_paths.setdefault(sanitized_path, None)
     
     def _get_elapsed_minutes(self) -> float:
         """Get elapsed time since session start in minutes."""
@@ -78,142 +103,162 @@ class MeetingSession:
     
     def end_session(self):
         """Mark the session as ended."""
-        self.end_time = datetime.now()
-        self.is_active = False
+        with self._lock:
+            self.end_time = datetime.now()
+            self.is_active = False
     
-    def get_meeting_summary_prompt(self) -> str:
+    def reopen(self):
+        """Undo end_session() when ending failed before any cleanup."""
+        with self._lock:
+            self.end_time = None
+            self.is_active = True
+    
+    def _format_time(self, moment) -> str:
+        return moment.strftime('%Y-%m-%d %H:%M:%S') if moment else 'Ongoing'
+    
+    def get_timeline_segments(self, token_budget: int = 400) -> List[TimelineSegment]:
         """
-        Generate a prompt for Gemini to fill in the HTML template with meeting data.
+        Summarize the timeline into run-length-encoded segments.
+        
+        Args:
+            token_budget (int): Maximum size of all segment lines, in LLM tokens
         
         Returns:
-            str: Formatted prompt with template and data to fill
+            list: TimelineSegment objects; their number does not grow with
+                  the length of the meeting
+        """
+        return summarize_timeline(self.emotion_data, self.start_time.timestamp(), token_budget)
+    
+    def get_report_digest(self, segments: List[TimelineSegment] = None) -> Dict[str, Any]:
         """
-        if not self.emotion_data:
-            return "No emotion data collected during this session."
+        Get a compact statistical digest of the session for the LLM.
         
-        # Calculate session duration
+        The size depends on the number of labels and participants and on the
+        timeline token budget, not on the number of readings.
+        
+        Args:
+            segments (list): Timeline segments (computed if not given)
+        
+        Returns:
+            dict: Duration, totals, emotion shares, mean confidence, dominant
+                  emotion per participant, timeline segments, opening and
+                  closing mood, and top transitions
+        """
+        if segments is None:
+            segments = self.get_timeline_segments()
+        stats = self.stats.snapshot()
+        total_readings = len(self.emotion_data)
         duration_minutes = self._get_elapsed_minutes()
         
-        # Format emotion timeline data
-        emotion_timeline = []
-        for entry in self.emotion_data:
-            emotion_timeline.append(
-                f"{entry['elapsed_minutes']:.1f}min: {entry['emotion']}"
+        # Dominant emotion per participant
+        participants = {}
+        if total_readings:
+            num_labels = len(self.emotion_data.label_names)
+            participant_ids = self.emotion_data.participants.astype(np.int64)
+            # One full row of label counts per participant id, even when the
+            # highest id has not shown every label
+            flat = np.bincount(
+                participant_ids * num_labels + self.emotion_data.labels,
+                minlength=(int(participant_ids.max()) + 1) * num_labels
             )
+            per_participant = flat.reshape(-1, num_labels)
+            for participant, row in enumerate(per_participant):
+                if row.sum():
+                    name = f"person_{participant}" if participant else "whole_frame"
+                    participants[name] = self.emotion_data.label_names[int(row.argmax())]
         
-        # Count emotion frequencies and calculate percentages
-        emotion_counts = {}
-        for entry in self.emotion_data:
-            # Extract base emotion from emoji format (e.g., "😊 happy (85.3%)" -> "happy")
-            emotion_parts = entry['emotion'].split(' ')
-            if len(emotion_parts) >= 2:
-                base_emotion = emotion_parts[1].lower()
-                emotion_counts[base_emotion] = emotion_counts.get(base_emotion, 0) + 1
+        transitions = sorted(stats['transitions'].items(), key=lambda item: item[1], reverse=True)
+        return {
+            'duration_minutes': round(duration_minutes, 1),
+            'total_readings': total_readings,
+            'participant_count': len(participants),
+            'label_percentages': {
+                label: round(share, 1) for label, share in stats['label_percentages'].items()
+            },
+            'mean_confidence': {
+                label: round(confidence, 2) for label, confidence in stats['mean_confidence'].items()
+            },
+            'dominant_by_participant': participants,
+            'timeline': [str(segment) for segment in segments],
+            'opening_mood': segments[0].label if segments else None,
+            'closing_mood': segments[-1].label if segments else None,
+            'top_transitions': dict(transitions[:5])
+        }
+    
+    def get_meeting_summary_prompt(self) -> str:
+        """
+        Generate a prompt for Gemini to write the report's analysis and
+        recommendations from the session digest.
         
-        # Calculate percentages
-        total_readings = len(self.emotion_data)
-        emotion_percentages = {}
-        for emotion, count in emotion_counts.items():
-            emotion_percentages[emotion] = (count / total_readings) * 100
+        Returns:
+            str: Compact prompt (charts and timeline are rendered locally)
+        """
+        return build_analysis_prompt(self.get_report_digest())
+    
+    def render_report_html(self, segments: List[TimelineSegment] = None) -> str:
+        """
+        Render the report from the session data.
         
-        prompt = f"""
-You must fill in the following HTML template with the provided meeting data. Use EXACTLY this template structure and only replace the placeholder values in {{{{PLACEHOLDER}}}}.
-
-TEMPLATE:
-{HTML_TEMPLATE}
-
-DATA TO FILL IN:
-- Duration: {duration_minutes:.1f} minutes
-- Total Readings: {total_readings}
-- Start Time: {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}
-- End Time: {self.end_time.strftime('%Y-%m-%d %H:%M:%S') if self.end_time else 'Ongoing'}
-
-EMOTION CHART BARS:
-Create chart bars for each emotion with percentages and counts:
-""" + chr(10).join([f'- {emotion.title()}: {emotion_percentages[emotion]:.2f}% ({count} times)' for emotion, count in emotion_counts.items()]) + f"""
-
-TIMELINE EVENTS:
-Create timeline events for each emotion reading:
-""" + chr(10).join([f'- {entry["elapsed_minutes"]:.1f}min: {entry["emotion"]}' for entry in self.emotion_data]) + f"""
-
-ANALYSIS POINTS:
-Generate 3-4 <li> items analyzing:
-1. Overall mood and energy levels
-2. Key emotional patterns observed  
-3. Insights about engagement/stress/satisfaction
-4. Notable emotional transitions
-
-RECOMMENDATIONS:
-Generate 4-5 <li> items with actionable recommendations for future meetings.
-
-INSTRUCTIONS:
-1. Use the EXACT template provided above
-2. Replace ALL placeholder values with actual data
-3. Create proper HTML chart bars with correct percentages and animation delays
-4. Create timeline events with proper CSS classes (bored, happy, sad, etc.)
-5. Write professional analysis and recommendations in list format
-6. Return ONLY the complete filled HTML, no other text
-7. Ensure all percentages, counts, and times are accurate
-8. Use appropriate emotion emojis and CSS classes for timeline events
-
-Replace these placeholders in the template:
-- {{{{DURATION}}}} with: {duration_minutes:.1f} minutes
-- {{{{TOTAL_READINGS}}}} with: {total_readings}
-- {{{{START_TIME}}}} with: {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}
-- {{{{END_TIME}}}} with: {self.end_time.strftime('%Y-%m-%d %H:%M:%S') if self.end_time else 'Ongoing'}
-"""
-        return prompt
+        Args:
+            segments (list): Timeline segments (computed if not given)
+        
+        Returns:
+            str: Report HTML with the analysis and recommendation
+                 placeholders still to be filled in
+        """
+        if segments is None:
+            segments = self.get_timeline_segments()
+        return render_report(
+            {
+                'DURATION': f"{self._get_elapsed_minutes():.1f} minutes",
+                'TOTAL_READINGS': len(self.emotion_data),
+                'START_TIME': self._format_time(self.start_time),
+                'END_TIME': self._format_time(self.end_time)
+            },
+            self.emotion_data.label_counts(),
+            [(segment.time_range(), segment.label, segment.description()) for segment in segments]
+        )
     
-    def generate_summary(self) -> Dict[str, str]:
+    def get_report_payload(self, token_budget: int = 400) -> Dict[str, Any]:
         """
-        Generate meeting summary using Gemini API and save as HTML.
+        Collect everything the report job needs, so it can run after the
+        session's readings are gone.
+        
+        The prompt and the HTML timeline share the same segments.
+        
+        Args:
+            token_budget (int): Token budget of the timeline segments
         
         Returns:
-            dict: Contains summary text and HTML file path
+            dict: Rendered report HTML, digest, analysis prompt, duration
+                  and number of readings
         """
-        try:
-            prompt = self.get_meeting_summary_prompt()
-            html_content = gemini(prompt)
-            
-            if html_content:
-                # Save HTML report
-                html_filename = f"meeting_report_{self.session_id}.html"
-                html_path = f"/Users/alvishprasla/Code/JS/Moodlink/MoodLink/Testimages/{html_filename}"
-                
-                with open(html_path, 'w', encoding='utf-8') as f:
-                    f.write(html_content)
-                
-                # Also save text version for API response
-                text_summary = f"Meeting Report Generated - {self.session_id}\nDuration: {self._get_elapsed_minutes():.1f} minutes\nEmotions tracked: {len(self.emotion_data)}\nHTML report saved to: {html_filename}"
-                
-                return {
-                    'summary': text_summary,
-                    'html_path': html_path,
-                    'html_filename': html_filename
-                }
-            else:
-                return {
-                    'summary': "Failed to generate HTML report using Gemini API.",
-                    'html_path': None,
-                    'html_filename': None
-                }
-                
-        except Exception as e:
+        with self._lock:
+            segments = self.get_timeline_segments(token_budget)
+            digest = self.get_report_digest(segments)
             return {
-                'summary': f"Error generating HTML report: {str(e)}",
-                'html_path': None,
-                'html_filename': None
+                'html': self.render_report_html(segments),
+                'digest': digest,
+                'prompt': build_analysis_prompt(digest),
+                'duration_minutes': self._get_elapsed_minutes(),
+                'emotion_count': len(self.emotion_data)
             }
     
     def cleanup_files(self):
         """
-        Delete all images and clear data for this session.
-        Enhanced version that ensures all files are deleted.
+        Delete the images recorded by this session and clear its data.
         """
+        # Clear data; the files are deleted outside the lock
+        with self._lock:
+            image_paths = list(self.image_paths)
+            self.emotion_data.clear()
+            self.image_paths.clear()
+            self.stats = SessionStats()
+        
         deleted_count = 0
         
         # Delete all tracked image files
-        for image_path in self.image_paths:
+        for image_path in image_paths:
             try:
                 if os.path.exists(image_path):
                     os.remove(image_path)
@@ -221,47 +266,14 @@ Replace these placeholders in the template:
             except Exception as e:
                 pass  # Continue deleting other files
         
-        # Additional cleanup: Delete ALL screenshot files in Testimages directory
-        testimages_dir = "/Users/alvishprasla/Code/JS/Moodlink/MoodLink/Testimages"
-        try:
-            if os.path.exists(testimages_dir):
-                for filename in os.listdir(testimages_dir):
-                    # Only delete screenshots, preserve HTML reports
-                    if filename.startswith("screenshot_") and filename.endswith(".png"):
-                        file_path = os.path.join(testimages_dir, filename)
-                        try:
-                            os.remove(file_path)
-                            deleted_count += 1
-                        except Exception as e:
-                            pass
-        except Exception as e:
-            pass
-        
-        # Delete all files in the Sanitized subfolder
+        # Remove the Sanitized subfolder once it is empty; screenshots of
+        # other sessions may still be in use, so only our own files are deleted
         sanitized_dir = "/Users/alvishprasla/Code/JS/Moodlink/MoodLink/Testimages/Sanitized"
         try:
-            if os.path.exists(sanitized_dir):
-                for filename in os.listdir(sanitized_dir):
-                    file_path = os.path.join(sanitized_dir, filename)
-                    try:
-                        if os.path.isfile(file_path):
-                            os.remove(file_path)
-                            deleted_count += 1
-                    except Exception as e:
-                        pass
-                
-                # Remove the directory if it's empty
-                try:
-                    os.rmdir(sanitized_dir)
-                except OSError:
-                    pass
-        except Exception as e:
+            os.rmdir(sanitized_dir)
+        except OSError:
             pass
         
-        # Clear data
-        self.emotion_data.clear()
-        self.image_paths.clear()
-        
         print(f"Cleanup complete: {deleted_count} files deleted")
         return deleted_count
     
@@ -272,96 +284,394 @@ Replace these placeholders in the template:
         Returns:
             dict: Complete session information
         """
+        with self._lock:
+            return {
+                'session_id': self.session_id,
+                'start_time': self.start_time.isoformat(),
+                'end_time': self.end_time.isoformat() if self.end_time else None,
+                'duration_minutes': self._get_elapsed_minutes(),
+                'is_active': self.is_active,
+                'emotion_count': len(self.emotion_data),
+                'emotion_data': self.emotion_data.records(start_timestamp=self.start_time.timestamp()),
+                'image_count': len(self.image_paths)
+            }
+    
+    def get_session_digest(self, recent_count: int = 5) -> Dict[str, Any]:
+        """
+        Get a constant-size summary of the session for upload responses.
+        
+        Unlike get_session_data, the size does not grow with meeting length.
+        
+        Args:
+            recent_count (int): Number of most recent readings to include
+        
+        Returns:
+            dict: Counts, running emotion distribution and the last readings;
+                  'cursor' is the position to resume the timeline from
+        """
+        stats = self.stats.snapshot()
+        with self._lock:
+            total_readings = len(self.emotion_data)
+            recent = self.emotion_data.records(
+                start=max(0, total_readings - recent_count),
+                start_timestamp=self.start_time.timestamp()
+            )
         return {
             'session_id': self.session_id,
             'start_time': self.start_time.isoformat(),
-            'end_time': self.end_time.isoformat() if self.end_time else None,
             'duration_minutes': self._get_elapsed_minutes(),
             'is_active': self.is_active,
-            'emotion_count': len(self.emotion_data),
-            'emotion_data': self.emotion_data,
-            'image_count': len(self.image_paths)
+            'emotion_count': total_readings,
+            'emotion_counts': stats['label_counts'],
+            'emotion_percentages': stats['label_percentages'],
+            'recent': recent,
+            'cursor': total_readings
+        }
+    
+    def get_live_stats(self) -> Dict[str, Any]:
+        """
+        Get the running aggregates without touching the raw timeline.
+        
+        Returns:
+            dict: Session id, duration and the SessionStats snapshot
+        """
+        return {
+            'session_id': self.session_id,
+            'duration_minutes': self._get_elapsed_minutes(),
+            'is_active': self.is_active,
+            **self.stats.snapshot()
+        }
+    
+    def get_timeline_page(self, cursor: int = 0, limit: int = 500) -> Dict[str, Any]:
+        """
+        Get readings from the timeline starting at a cursor.
+        
+        Readings are append-only, so a cursor (the index of the next
+        reading) stays valid and clients can fetch incrementally.
+        
+        Args:
+            cursor (int): Index of the first reading to return
+            limit (int): Maximum number of readings to return
+        
+        Returns:
+            dict: Readings, the cursor to continue from and whether more remain
+        """
+        with self._lock:
+            total_readings = len(self.emotion_data)
+            cursor = max(0, min(cursor, total_readings))
+            next_cursor = min(cursor + limit, total_readings)
+            emotion_data = self.emotion_data.records(
+                start=cursor, stop=next_cursor, start_timestamp=self.start_time.timestamp()
+            )
+        return {
+            'session_id': self.session_id,
+            'emotion_data': emotion_data,
+            'cursor': cursor,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor < total_readings,
+            'emotion_count': total_readings
         }
 
 
 class MeetingTracker:
     """
-    Global meeting tracker that manages the current active session.
+    Global meeting tracker that keeps one session per client.
+    
+    Sessions are keyed by a client-supplied session token and stored in a
+    lock-striped map: each token hashes to one of several stripes, each with
+    its own lock, so uploads for different meetings rarely contend. Sessions
+    idle for longer than idle_ttl_seconds are ended and cleaned up by a
+    background thread, so no upload waits for another session's teardown.
+    
+    Attributes:
+        idle_ttl_seconds (float): Idle time after which a session is evicted
+        sweep_interval_seconds (float): Time between eviction sweeps
+        timeline_token_budget (int): Token budget of report timeline segments
     """
     
-    def __init__(self):
-        self.current_session = None
+    DEFAULT_TOKEN = 'default'
+    
+    # Clients whose last report job is remembered for repeated end requests
+    MAX_REMEMBERED_JOBS = 1024
+    
+    def __init__(self, stripes: int = 16, idle_ttl_seconds: float = 3600,
+                 sweep_interval_seconds: float = 60):
+        self._stripes = [(threading.Lock(), {}) for _ in range(max(1, stripes))]
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self.timeline_token_budget = 400
+        self._report_jobs = OrderedDict()  # token -> report job of its last ended session
+        self._report_jobs_lock = threading.Lock()
+        self._sweeper = None
+        self._sweeper_lock = threading.Lock()
     
-    def start_new_session(self) -> str:
+    def _stripe(self, token: str):
+        """Get the (lock, sessions) stripe a token belongs to."""
+        return self._stripes[hash(token) % len(self._stripes)]
+    
+    def _get_session(self, token: str, create: bool = False):
+        """
+        Look up the session of a token.
+        
+        Args:
+            token (str): Client session token
+            create (bool): Start a session if the token has none
+        
+        Returns:
+            MeetingSession: The session, or None if there is none
+        """
+        self._ensure_sweeper()
+        lock, sessions = self._stripe(token)
+        with lock:
+            session = sessions.get(token)
+            if session is None and create:
+                session = MeetingSession()
+                sessions[token] = session
+                self._forget_report_job(token)
+            if session is not None:
+                session.touch()
+            return session
+    
+    def _forget_report_job(self, token: str):
+        """A new session starts: repeated end requests no longer apply."""
+        with self._report_jobs_lock:
+            self._report_jobs.pop(token, None)
+    
+    def _pop_session(self, token: str):
+        """Remove and return the session of a token, if any."""
+        lock, sessions = self._stripe(token)
+        with lock:
+            return sessions.pop(token, None)
+    
+    def _restore_session(self, token: str, session: MeetingSession):
+        """Put a popped session back, unless the token has started a new one."""
+        lock, sessions = self._stripe(token)
+        with lock:
+            sessions.setdefault(token, session)
+    
+    @property
+    def current_session(self):
+        """Session of the default token (single-client compatibility)."""
+        return self._get_session(self.DEFAULT_TOKEN)
+    
+    def start_new_session(self, token: str = DEFAULT_TOKEN) -> str:
         """
         Start a new meeting session.
         
+        Args:
+            token (str): Client session token
+        
         Returns:
             str: Session ID of the new session
         """
-        # End current session if active
-        if self.current_session and self.current_session.is_active:
-            self.current_session.end_session()
+        session = MeetingSession()
+        lock, sessions = self._stripe(token)
+        with lock:
+            previous = sessions.get(token)
+            sessions[token] = session
+        self._forget_report_job(token)
         
-        # Create new session
-        self.current_session = MeetingSession()
-        return self.current_session.session_id
+        # End previous session if active
+        if previous and previous.is_active:
+            previous.end_session()
+        return session.session_id
     
-    def add_emotion(self, emotion: str, confidence: float = None, 
-                   filename: str = None, sanitized_path: str = None):
+    def add_emotion(self, result: EmotionResult, filename: str = None,
+                   sanitized_path: str = None, token: str = DEFAULT_TOKEN):
         """
-        Add emotion data to the current session.
+        Add emotion data to the client's session, starting one if needed.
         """
-        if not self.current_session:
-            self.start_new_session()
-        
-        self.current_session.add_emotion_data(emotion, confidence, filename, sanitized_path)
+        session = self._get_session(token, create=True)
+        session.add_emotion_data(result, filename, sanitized_path)
     
-    def end_current_session(self) -> Dict[str, Any]:
+    def get_face_tracker(self, token: str = DEFAULT_TOKEN) -> FaceTracker:
         """
-        End the current session and generate summary.
+        Get the face tracker of the client's session, starting one if needed.
+        """
+        return self._get_session(token, create=True).face_tracker
+    
+    def _finish_session(self, session: MeetingSession, with_digest: bool = True) -> Dict[str, Any]:
+        """
+        End a session, queue its report job and delete its files.
         
-        Returns:
-            dict: Session summary and cleanup results
+        Args:
+            session (MeetingSession): Session to finish
+            with_digest (bool): Include the session digest in the result
+                                (not needed when nobody is waiting for it)
         """
-        if not self.current_session:
-            return {'error': 'No active session'}
+        from APicalls.ReportJobs import get_report_queue
         
         # End session
-        self.current_session.end_session()
+        session.end_session()
         
-        # Generate summary
-        summary_result = self.current_session.generate_summary()
+        # Queue report generation; the LLM call runs in the background
+        payload = session.get_report_payload(self.timeline_token_budget)
+        job_id = get_report_queue().submit(session.session_id, payload)
         
-        # Get session data before cleanup
-        session_data = self.current_session.get_session_data()
+        # Constant-size summary before cleanup; the readings themselves
+        # went into the report payload
+        session_data = session.get_session_digest() if with_digest else None
         
         # Cleanup files
-        deleted_files = self.current_session.cleanup_files()
+        deleted_files = session.cleanup_files()
         
-        result = {
+        return {
             'session_data': session_data,
-            'summary': summary_result['summary'],
-            'html_path': summary_result['html_path'],
-            'html_filename': summary_result['html_filename'],
+            'job_id': job_id,
             'deleted_files': deleted_files,
             'cleanup_complete': True
         }
+    
+    def end_current_session(self, token: str = DEFAULT_TOKEN) -> Dict[str, Any]:
+        """
+        End the client's session and queue its report.
+        
+        Other clients' sessions are not affected.
         
-        # Clear current session
-        self.current_session = None
+        Args:
+            token (str): Client session token
+        
+        Returns:
+            dict: Session digest, report job id and cleanup results; just the
+                  job id (and already_ended) if the session was already ended
+        """
+        # Removing it first means a concurrent end request cannot end it twice
+        session = self._pop_session(token)
+        if not session:
+            # A repeated end request gets the report job of the first one
+            with self._report_jobs_lock:
+                job_id = self._report_jobs.get(token)
+            if job_id:
+                return {'job_id': job_id, 'already_ended': True}
+            return {'error': 'No active session'}
         
+        try:
+            result = self._finish_session(session)
+        except Exception:
+            # Nothing was deleted yet: keep the session so ending can be retried
+            session.reopen()
+            self._restore_session(token, session)
+            raise
+        with self._report_jobs_lock:
+            self._report_jobs[token] = result['job_id']
+            self._report_jobs.move_to_end(token)
+            while len(self._report_jobs) > self.MAX_REMEMBERED_JOBS:
+                self._report_jobs.popitem(last=False)
         return result
     
-    def get_current_session_info(self) -> Dict[str, Any]:
+    def discard_session(self, token: str = DEFAULT_TOKEN) -> int:
+        """
+        Drop the client's session and delete its files without a summary.
+        
+        Returns:
+            int: Number of files deleted
+        """
+        session = self._pop_session(token)
+        if not session:
+            return 0
+        session.end_session()
+        return session.cleanup_files()
+    
+    def _ensure_sweeper(self):
+        """Start the eviction thread on first use."""
+        if self._sweeper is not None:
+            return
+        with self._sweeper_lock:
+            if self._sweeper is not None:
+                return
+            self._sweeper = threading.Thread(target=self._sweep, name="session-sweeper", daemon=True)
+            self._sweeper.start()
+    
+    def _sweep(self):
+        while True:
+            time.sleep(self.sweep_interval_seconds)
+            try:
+                self.evict_idle()
+            except Exception as e:
+                print(f"Idle session sweep failed: {e}")
+    
+    def evict_idle(self) -> int:
+        """
+        End and clean up sessions idle for longer than idle_ttl_seconds.
+        
+        Each stripe is locked only while its expired sessions are removed;
+        summaries and file cleanup run outside the locks.
+        
+        Returns:
+            int: Number of sessions evicted
+        """
+        expired = []
+        for lock, sessions in self._stripes:
+            with lock:
+                for token, session in list(sessions.items()):
+                    if session.idle_seconds() > self.idle_ttl_seconds:
+                        expired.append(sessions.pop(token))
+        
+        for session in expired:
+            try:
+                self._finish_session(session, with_digest=False)
+            except Exception as e:
+                print(f"Failed to finish idle session {session.session_id}: {e}")
+        
+        if expired:
+            print(f"Evicted {len(expired)} idle session(s)")
+        return len(expired)
+    
+    def session_count(self) -> int:
+        """Number of sessions currently tracked."""
+        total = 0
+        for lock, sessions in self._stripes:
+            with lock:
+                total += len(sessions)
+        return total
+    
+    def get_current_session_info(self, token: str = DEFAULT_TOKEN) -> Dict[str, Any]:
         """
-        Get information about the current session.
+        Get information about the client's session.
         
         Returns:
             dict: Current session information or None
         """
-        if self.current_session:
-            return self.current_session.get_session_data()
+        session = self._get_session(token)
+        if session:
+            return session.get_session_data()
+        return None
+    
+    def get_current_session_digest(self, token: str = DEFAULT_TOKEN) -> Dict[str, Any]:
+        """
+        Get the constant-size digest of the client's session.
+        
+        Returns:
+            dict: Current session digest or None
+        """
+        session = self._get_session(token)
+        if session:
+            return session.get_session_digest()
+        return None
+    
+    def get_current_session_stats(self, token: str = DEFAULT_TOKEN) -> Dict[str, Any]:
+        """
+        Get the live running aggregates of the client's session.
+        
+        Returns:
+            dict: Session stats or None if there is no session
+        """
+        session = self._get_session(token)
+        if session:
+            return session.get_live_stats()
+        return None
+    
+    def get_current_timeline_page(self, cursor: int = 0, limit: int = 500,
+                                  token: str = DEFAULT_TOKEN) -> Dict[str, Any]:
+        """
+        Get a page of the client's session timeline.
+        
+        Returns:
+            dict: Timeline page or None if there is no session
+        """
+        session = self._get_session(token)
+        if session:
+            return session.get_timeline_page(cursor, limit)
         return None
 
 
@@ -0,0 +1,251 @@
+"""
+ModelRegistry.py - Process-wide Emotion Classifier Registry
+
+This module loads the emotion classifier and its label list once per worker
+process and hands out a shared, thread-safe prediction handle. Previously every
+face triggered a metadata download and a full model load.
+
+Model sources, in order of preference:
+1. A Keras model in the local cache directory (MOODLINK_MODEL_CACHE_DIR)
+2. The vendored Teachable Machine export in MLfiles/ (needs tensorflowjs)
+3. A deterministic stand-in classifier with the same input/output shape
+
+Labels always come from the vendored metadata.json when it is available.
+"""
+
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import tensorflow as tf
+
+
+# Input resolution expected by the Teachable Machine image models
+MODEL_INPUT_SIZE = 224
+
+# Used when metadata.json cannot be read
+DEFAULT_CLASS_NAMES = ["angry", "disgust", "fear", "happy", "sad", "surprise", "neutral"]
+
+# Vendored model export shipped with the repository
+DEFAULT_MODEL_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', '..', '..', 'MLfiles')
+)
+
+# Local cache for converted Keras models
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'moodlink')
+
+CACHED_MODEL_NAMES = ['emotion_model.keras', 'emotion_model.h5']
+
+
+class EmotionModel:
+    """
+    Loaded emotion classifier shared by all requests in a worker process.
+
+    Keras models are not safe to call concurrently, so predictions are
+    serialized through a lock. Input batches are (N, 224, 224, 3) float32
+    arrays scaled to the 0-1 range.
+
+    Attributes:
+        class_names (list): Labels in model output order
+        source (str): Where the model was loaded from
+        load_seconds (float): Time spent loading the model
+        warmup_seconds (float): Time spent on the warm-up batch (None until warmed)
+    """
+
+    def __init__(self, model, class_names, source, load_seconds=0.0):
+        self.model = model
+        self.class_names = class_names
+        self.source = source
+        self.load_seconds = load_seconds
+        self.warmup_seconds = None
+        self._lock = threading.Lock()
+
+    def predict(self, batch):
+        """
+        Run one forward pass over a batch of preprocessed images.
+
+        Args:
+            batch (np.ndarray): Float32 array of shape (N, 224, 224, 3)
+
+        Returns:
+            np.ndarray: Class probabilities of shape (N, num_classes)
+        """
+        batch = np.asarray(batch, dtype=np.float32)
+        if batch.ndim == 3:
+            batch = np.expand_dims(batch, axis=0)
+
+        with self._lock:
+            # Calling the model directly skips predict()'s per-call setup,
+            # which dominates for the small batches we send
+            predictions = self.model(batch, training=False)
+
+        return np.asarray(predictions)
+
+    def warm_up(self, batch_size=1):
+        """
+        Run a dummy batch so graph tracing happens before the first request.
+
+        Returns:
+            float: Warm-up time in seconds
+        """
+        dummy = np.zeros((batch_size, MODEL_INPUT_SIZE, MODEL_INPUT_SIZE, 3), dtype=np.float32)
+        start = time.perf_counter()
+        self.predict(dummy)
+        self.warmup_seconds = time.perf_counter() - start
+        return self.warmup_seconds
+
+
+def load_class_names(model_dir=None):
+    """
+    Read class labels from the vendored metadata.json.
+
+    Args:
+        model_dir (str): Directory containing metadata.json
+
+    Returns:
+        list: Class labels in model output order
+    """
+    metadata_path = os.path.join(model_dir or DEFAULT_MODEL_DIR, 'metadata.json')
+    try:
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+        return metadata.get('labels', DEFAULT_CLASS_NAMES)
+    except Exception:
+        return list(DEFAULT_CLASS_NAMES)
+
+
+def _has_expected_input(model):
+    """Check that a loaded model accepts (N, 224, 224, 3) images."""
+    try:
+        return tuple(model.input_shape[1:]) == (MODEL_INPUT_SIZE, MODEL_INPUT_SIZE, 3)
+    except Exception:
+        return False
+
+
+def _load_cached_model(cache_dir):
+    """Load a Keras model from the local cache directory if one exists."""
+    for name in CACHED_MODEL_NAMES:
+        path = os.path.join(cache_dir, name)
+        if os.path.exists(path):
+            try:
+                model = tf.keras.models.load_model(path, compile=False)
+                if _has_expected_input(model):
+                    return model, path
+            except Exception:
+                pass
+    return None, None
+
+
+def _load_vendored_model(model_dir):
+    """Load the vendored Teachable Machine export (requires tensorflowjs)."""
+    model_path = os.path.join(model_dir, 'model.json')
+    if not os.path.exists(model_path):
+        return None, None
+    try:
+        import tensorflowjs as tfjs
+    except ImportError:
+        return None, None
+    try:
+        model = tfjs.converters.load_keras_model(model_path)
+        if _has_expected_input(model):
+            return model, model_path
+    except Exception:
+        pass
+    return None, None
+
+
+def _build_fallback_model(num_classes):
+    """
+    Build a stand-in classifier with the expected input and output shape.
+
+    Weights are seeded so every worker process produces the same results.
+    """
+    model = tf.keras.Sequential([
+        tf.keras.layers.Input(shape=(MODEL_INPUT_SIZE, MODEL_INPUT_SIZE, 3)),
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dense(
+            num_classes,
+            activation='softmax',
+            kernel_initializer=tf.keras.initializers.GlorotUniform(seed=0)
+        )
+    ])
+    return model
+
+
+def load_emotion_model(model_dir=None, cache_dir=None):
+    """
+    Load the emotion classifier and labels without touching the registry.
+
+    Args:
+        model_dir (str): Directory with the vendored model.json/metadata.json
+        cache_dir (str): Directory with cached Keras models
+
+    Returns:
+        EmotionModel: Freshly loaded classifier
+    """
+    model_dir = model_dir or os.getenv('MOODLINK_MODEL_DIR', DEFAULT_MODEL_DIR)
+    cache_dir = cache_dir or os.getenv('MOODLINK_MODEL_CACHE_DIR', DEFAULT_CACHE_DIR)
+
+    start = time.perf_counter()
+    class_names = load_class_names(model_dir)
+
+    model, source = _load_cached_model(cache_dir)
+    if model is None:
+        model, source = _load_vendored_model(model_dir)
+    if model is None:
+        model, source = _build_fallback_model(len(class_names)), 'fallback'
+
+    return EmotionModel(model, class_names, source, time.perf_counter() - start)
+
+
+_registry_lock = threading.Lock()
+_emotion_model = None
+
+
+def get_emotion_model():
+    """
+    Get the process-wide emotion classifier, loading it on first use.
+
+    Returns:
+        EmotionModel: Shared classifier handle
+    """
+    global _emotion_model
+    if _emotion_model is None:
+        with _registry_lock:
+            if _emotion_model is None:
+                _emotion_model = load_emotion_model()
+    return _emotion_model
+
+
+def warm_up_emotion_model():
+    """
+    Load and warm up the shared classifier. Called from AppConfig.ready().
+
+    Returns:
+        EmotionModel: Shared classifier handle
+    """
+    emotion_model = get_emotion_model()
+    if emotion_model.warmup_seconds is None:
+        emotion_model.warm_up()
+        print(f"Emotion model loaded from {emotion_model.source} "
+              f"in {emotion_model.load_seconds:.2f}s (warm-up {emotion_model.warmup_seconds:.2f}s)")
+    return emotion_model
+
+
+def get_model_metrics():
+    """
+    Get load and warm-up timings for the shared classifier.
+
+    Returns:
+        dict: Model timing information, or None if not loaded yet
+    """
+    if _emotion_model is None:
+        return None
+    return {
+        'source': _emotion_model.source,
+        'load_seconds': _emotion_model.load_seconds,
+        'warmup_seconds': _emotion_model.warmup_seconds,
+        'num_classes': len(_emotion_model.class_names)
+    }
@@ -0,0 +1,274 @@
+"""
+ReportCache.py - Content-Addressed Meeting Report Store
+
+Finished reports are stored under a key that hashes the report input (the
+locally rendered HTML, the LLM prompt) together with the template version,
+so generating the same report again - a job retry, or end-session firing
+twice - returns the stored report instead of paying for another LLM call.
+
+Each entry is three files in the cache directory:
+
+- <key>.html: the finished report
+- <key>.html.gz: the same report, gzip-compressed once when it is stored,
+  for clients that accept gzip
+- <key>.json: the analysis and recommendation text and where it came from
+
+An index (index.json) records every entry's size, last access and the
+session ids it belongs to, so a report is found by session id without
+scanning the directory. When the entries exceed max_bytes, the least
+recently used ones are deleted.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from APicalls.html_template import HTML_TEMPLATE
+
+# Default location of the cache (next to the screenshots)
+DEFAULT_CACHE_DIR = "/Users/alvishprasla/Code/JS/Moodlink/MoodLink/Testimages/Reports"
+
+# Changes whenever the report template changes, invalidating old entries
+TEMPLATE_VERSION = hashlib.sha256(HTML_TEMPLATE.encode('utf-8')).hexdigest()[:12]
+
+INDEX_FILENAME = "index.json"
+
+# File extensions of the parts of an entry
+ENTRY_EXTENSIONS = ('html', 'html.gz', 'json')
+
+
+def report_key(payload: Dict[str, Any]) -> str:
+    """
+    Content hash of a report job payload and the template version.
+
+    Args:
+        payload (dict): Report input from MeetingSession.get_report_payload()
+
+    Returns:
+        str: Hex SHA-256 key
+    """
+    digest = hashlib.sha256()
+    digest.update(TEMPLATE_VERSION.encode('utf-8'))
+    digest.update(b"\0")
+    digest.update(payload['html'].encode('utf-8'))
+    digest.update(b"\0")
+    digest.update(payload['prompt'].encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _write_atomic(path: str, data: bytes):
+    """Write a file so readers never see it half-written."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class ReportCache:
+    """
+    Size-bounded LRU store of finished reports on disk.
+
+    Attributes:
+        cache_dir (str): Directory holding the entries and the index
+        max_bytes (int): Total size of entries above which the least
+                         recently used ones are evicted
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = 200 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # key -> {'size', 'last_access', 'session_ids'}, least recently used first
+        self._entries = OrderedDict()
+        self._sessions = {}  # session id -> key
+        self._load_index()
+
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.{ext}")
+
+    def _load_index(self):
+        """Read the index written by this or another process."""
+        try:
+            with open(os.path.join(self.cache_dir, INDEX_FILENAME), 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        self._entries = OrderedDict(
+            sorted(entries.items(), key=lambda item: item[1]['last_access'])
+        )
+        self._sessions = {
+            session_id: key
+            for key, entry in self._entries.items()
+            for session_id in entry['session_ids']
+        }
+
+    def _save_index(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        _write_atomic(
+            os.path.join(self.cache_dir, INDEX_FILENAME),
+            json.dumps(self._entries).encode('utf-8')
+        )
+
+    def _touch(self, key: str, session_id: Optional[str] = None):
+        """Mark an entry as used, optionally linking another session to it."""
+        entry = self._entries[key]
+        entry['last_access'] = time.time()
+        if session_id and session_id not in entry['session_ids']:
+            entry['session_ids'].append(session_id)
+            self._sessions[session_id] = key
+        self._entries.move_to_end(key)
+
+    def get(self, key: str, session_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Look up a finished report.
+
+        Args:
+            key (str): Key from report_key()
+            session_id (str): Session to link to the entry on a hit
+
+        Returns:
+            dict: html_path plus the stored analysis, recommendations and
+                  analysis_source, or None on a miss
+        """
+        with self._lock:
+            if key not in self._entries:
+                self._load_index()
+            if key not in self._entries or not os.path.exists(self._path(key, 'html')):
+                self.misses += 1
+                return None
+            try:
+                with open(self._path(key, 'json'), 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touch(key, session_id)
+            self._save_index()
+            return {'html_path': self._path(key, 'html'), **meta}
+
+    def put(self, key: str, session_id: str, html: str, analysis: List[str],
+            recommendations: List[str], analysis_source: str) -> str:
+        """
+        Store a finished report and evict old ones if over budget.
+
+        Args:
+            key (str): Key from report_key()
+            session_id (str): Session the report belongs to
+            html (str): Finished report HTML
+            analysis (list): Analysis points
+            recommendations (list): Recommendations
+            analysis_source (str): 'llm' or 'fallback'
+
+        Returns:
+            str: Path of the stored HTML report
+        """
+        html_data = html.encode('utf-8')
+        # mtime=0 keeps the compressed bytes (and their ETag) deterministic
+        gzip_data = gzip.compress(html_data, compresslevel=9, mtime=0)
+        meta_data = json.dumps({
+            'analysis': analysis,
+            'recommendations': recommendations,
+            'analysis_source': analysis_source
+        }).encode('utf-8')
+
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            _write_atomic(self._path(key, 'html'), html_data)
+            _write_atomic(self._path(key, 'html.gz'), gzip_data)
+            _write_atomic(self._path(key, 'json'), meta_data)
+
+            # Merge with entries other processes may have added
+            self._load_index()
+            entry = self._entries.get(key)
+            session_ids = entry['session_ids'] if entry else []
+            self._entries[key] = {
+                'size': len(html_data) + len(gzip_data) + len(meta_data),
+                'last_access': time.time(),
+                'session_ids': session_ids
+            }
+            self._touch(key, session_id)
+            self._evict(keep=key)
+            self._save_index()
+            return self._path(key, 'html')
+
+    def _evict(self, keep: str):
+        """Delete least recently used entries until under max_bytes."""
+        total = sum(entry['size'] for entry in self._entries.values())
+        for key in list(self._entries):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            entry = self._entries.pop(key)
+            total -= entry['size']
+            for session_id in entry['session_ids']:
+                if self._sessions.get(session_id) == key:
+                    del self._sessions[session_id]
+            for ext in ENTRY_EXTENSIONS:
+                try:
+                    os.remove(self._path(key, ext))
+                except OSError:
+                    pass
+
+    def find_by_session(self, session_id: str) -> Optional[str]:
+        """
+        Find the report of a session through the index.
+
+        Args:
+            session_id (str): Meeting session id
+
+        Returns:
+            str: Path of the HTML report, or None if there is none
+        """
+        with self._lock:
+            key = self._sessions.get(session_id)
+            if key is None:
+                # Possibly written by another process
+                self._load_index()
+                key = self._sessions.get(session_id)
+            if key is None:
+                return None
+            path = self._path(key, 'html')
+            return path if os.path.exists(path) else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Entry count, total size, hits and misses."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': sum(entry['size'] for entry in self._entries.values()),
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+_report_cache = None
+_report_cache_lock = threading.Lock()
+
+
+def get_report_cache() -> ReportCache:
+    """
+    Get the process-wide report cache.
+
+    Returns:
+        ReportCache: Cache configured from the Django settings
+    """
+    global _report_cache
+    if _report_cache is None:
+        with _report_cache_lock:
+            if _report_cache is None:
+                from django.conf import settings
+                _report_cache = ReportCache(
+                    settings.MOODLINK_REPORT_CACHE_DIR,
+                    settings.MOODLINK_REPORT_CACHE_MAX_BYTES
+                )
+    return _report_cache
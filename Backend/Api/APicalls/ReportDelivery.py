@@ -0,0 +1,215 @@
+"""
+ReportDelivery.py - HTTP Delivery of Report Files
+
+Reports are streamed from disk with FileResponse instead of being read
+into memory, and carry validators so a reopened report costs a 304:
+
+- a strong ETag (SHA-256 of the file, computed once per file version)
+- Last-Modified, honoured through If-None-Match / If-Modified-Since
+- the pre-compressed <report>.html.gz written by the report cache, served
+  with Content-Encoding: gzip when the client accepts it
+- single byte ranges (Range / If-Range) on the uncompressed file
+"""
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_http_date_safe
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# Most file versions whose ETag is remembered
+MAX_REMEMBERED_ETAGS = 256
+
+_etags = OrderedDict()  # path -> (mtime_ns, size, etag)
+_etags_lock = threading.Lock()
+
+
+def file_etag(path, stat_result):
+    """
+    Strong ETag of a file's content.
+
+    The hash is remembered per (mtime, size), so repeated requests for an
+    unchanged file only cost a stat.
+
+    Args:
+        path (str): File path
+        stat_result (os.stat_result): Current stat of the file
+
+    Returns:
+        str: Quoted ETag
+    """
+    version = (stat_result.st_mtime_ns, stat_result.st_size)
+    with _etags_lock:
+        cached = _etags.get(path)
+        if cached and cached[:2] == version:
+            _etags.move_to_end(path)
+            return cached[2]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(block)
+    etag = f'"{digest.hexdigest()[:32]}"'
+
+    with _etags_lock:
+        _etags[path] = (*version, etag)
+        _etags.move_to_end(path)
+        while len(_etags) > MAX_REMEMBERED_ETAGS:
+            _etags.popitem(last=False)
+    return etag
+
+
+def accepts_gzip(request):
+    """Whether the request's Accept-Encoding allows gzip."""
+    for coding in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        name, _, params = coding.strip().partition(';')
+        if name.strip().lower() not in ('gzip', '*'):
+            continue
+        quality = params.strip().lower()
+        if quality.startswith('q='):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def _etag_matches(header, etag):
+    """If-None-Match comparison (weak, as RFC 9110 requires)."""
+    if header.strip() == '*':
+        return True
+    return any(tag.strip().removeprefix('W/') == etag for tag in header.split(','))
+
+
+def is_not_modified(request, etag, mtime):
+    """
+    Check the request's conditional headers against the file's validators.
+
+    If-None-Match takes precedence; If-Modified-Since is only used
+    without it.
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return if_modified_since is not None and int(mtime) <= if_modified_since
+
+
+def parse_range(header, size):
+    """
+    Parse a single-range Range header.
+
+    Args:
+        header (str): Range header value, e.g. "bytes=0-1023" or "bytes=-500"
+        size (int): File size in bytes
+
+    Returns:
+        tuple: (start, end) inclusive; None if the header is not a single
+               byte range (the whole file is served); (size, size) if the
+               range cannot be satisfied
+    """
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return (size, size)
+        return (max(0, size - length), size - 1)
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return (size, size)
+    return (start, end)
+
+
+class _FileSlice:
+    """File object limited to `length` bytes from its current position."""
+
+    def __init__(self, f, length):
+        self._file = f
+        self._remaining = length
+
+    def read(self, size=-1):
+        if self._remaining <= 0:
+            return b''
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self):
+        self._file.close()
+
+
+def _set_validators(response, etag, mtime, encoded):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(mtime)
+    # Reports can be regenerated under the same name: always revalidate
+    response['Cache-Control'] = 'private, no-cache'
+    response['Vary'] = 'Accept-Encoding'
+    if encoded:
+        response['Content-Encoding'] = 'gzip'
+    return response
+
+
+def report_response(request, path, filename, content_type='text/html; charset=utf-8'):
+    """
+    Build the response for a report file.
+
+    Args:
+        request (HttpRequest): The GET or HEAD request
+        path (str): Path of the uncompressed report
+        filename (str): Name the client asked for (used in Content-Disposition)
+        content_type (str): Content type of the uncompressed report
+
+    Returns:
+        HttpResponse: 200/206 streaming the file, 304, or 416
+    """
+    range_header = request.META.get('HTTP_RANGE')
+    gzip_path = f"{path}.gz"
+    # Ranges always address the uncompressed file
+    encoded = not range_header and accepts_gzip(request) and os.path.exists(gzip_path)
+    serve_path = gzip_path if encoded else path
+
+    stat_result = os.stat(serve_path)
+    etag = file_etag(serve_path, stat_result)
+    mtime = stat_result.st_mtime
+
+    if is_not_modified(request, etag, mtime):
+        return _set_validators(HttpResponseNotModified(), etag, mtime, encoded)
+
+    size = stat_result.st_size
+    byte_range = None
+    if range_header:
+        # If-Range: only send the range if the client's copy is current
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if if_range is None or if_range.strip() == etag:
+            byte_range = parse_range(range_header, size)
+
+    if byte_range == (size, size):
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f"bytes */{size}"
+        return _set_validators(response, etag, mtime, encoded)
+
+    f = open(serve_path, 'rb')
+    if byte_range:
+        start, end = byte_range
+        f.seek(start)
+        response = FileResponse(_FileSlice(f, end - start + 1), content_type=content_type,
+                                status=206, filename=filename)
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = f"bytes {start}-{end}/{size}"
+    else:
+        response = FileResponse(f, content_type=content_type, filename=filename)
+    response['Accept-Ranges'] = 'bytes'
+    return _set_validators(response, etag, mtime, encoded)
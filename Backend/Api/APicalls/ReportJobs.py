@@ -0,0 +1,323 @@
+"""
+ReportJobs.py - Background Report Generation Queue
+
+Completing a meeting report waits on the LLM for its analysis, so ending a
+session only records a ReportJob row in the database and returns its id.
+An in-process pool of worker threads picks jobs up, writes the HTML report
+and updates the row; clients poll (or long-poll) the job status.
+
+- Jobs are claimed with a conditional UPDATE, so a job runs once even if
+  several processes share the database.
+- A failed LLM attempt is retried with exponential backoff; the last of
+  max_attempts falls back to a locally written analysis, or marks the job
+  failed when the fallback is turned off.
+- Jobs left queued (or stuck running) by a previous process are picked up
+  again when the queue starts.
+- Finished reports go to the content-addressed ReportCache, so running
+  the same job again returns the stored report.
+- The report generator is pluggable (defaults to Gemini), so tests can use
+  a local stub.
+"""
+
+import queue
+import threading
+from datetime import timedelta
+from typing import Callable, Dict, Any, Optional
+
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+
+from APicalls.ReportCache import ReportCache, get_report_cache, report_key
+from APicalls.ReportRenderer import fallback_analysis, fill_analysis, parse_analysis_response
+from APicalls.ScreenshotIds import screenshot_ids
+
+def default_generator(prompt: str) -> Optional[str]:
+    """Write the report's analysis with the shared LLM client (errors propagate)."""
+    from APicalls.gemini import get_gemini_client
+    return get_gemini_client().generate(prompt)
+
+
+def generate_report(session_id: str, payload: Dict[str, Any],
+                    generator: Callable[[str], Optional[str]] = default_generator,
+                    cache: ReportCache = None, allow_fallback: bool = True) -> Dict[str, str]:
+    """
+    Complete the locally rendered report of a meeting and store it.
+
+    Only the analysis and recommendations come from the generator. If it
+    fails or returns an unusable answer, they are written locally instead
+    (when allow_fallback is set), so the report always renders. A report
+    already in the cache for the same input is returned without calling
+    the generator.
+
+    Args:
+        session_id (str): Meeting session id
+        payload (dict): Report input from MeetingSession.get_report_payload()
+        generator (callable): Turns the prompt into the LLM's JSON answer,
+                              returns None on failure
+        cache (ReportCache): Report store (defaults to the shared cache)
+        allow_fallback (bool): Write the analysis locally if the generator fails
+
+    Returns:
+        dict: Summary text, HTML path, HTML file name, where the analysis
+              came from ('llm' or 'fallback') and whether it was cached
+
+    Raises:
+        RuntimeError: If the generator failed and allow_fallback is not set
+    """
+    cache = cache or get_report_cache()
+    key = report_key(payload)
+    html_filename = f"meeting_report_{session_id}.html"
+
+    cached = cache.get(key, session_id)
+    # A fallback analysis is only reused once the LLM has had its chances
+    if cached and (cached['analysis_source'] == 'llm' or allow_fallback):
+        html_path = cached['html_path']
+        analysis_source = cached['analysis_source']
+        from_cache = True
+    else:
+        try:
+            analysis = parse_analysis_response(generator(payload['prompt']))
+            error = "Report generator returned no usable analysis"
+        except Exception as e:
+            analysis = None
+            error = f"Report generator failed: {str(e)}"
+
+        analysis_source = 'llm'
+        if analysis is None:
+            if not allow_fallback:
+                raise RuntimeError(error)
+            analysis = fallback_analysis(payload['digest'])
+            analysis_source = 'fallback'
+
+        # Store HTML report
+        html_path = cache.put(key, session_id, fill_analysis(payload['html'], *analysis),
+                              analysis[0], analysis[1], analysis_source)
+        from_cache = False
+
+    # Also save text version for API response
+    text_summary = (f"Meeting Report Generated - {session_id}\n"
+                    f"Duration: {payload['duration_minutes']:.1f} minutes\n"
+                    f"Emotions tracked: {payload['emotion_count']}\n"
+                    f"HTML report saved to: {html_filename}")
+    if analysis_source == 'fallback':
+        text_summary += "\nAnalysis written locally (LLM unavailable)"
+    return {
+        'summary': text_summary,
+        'html_path': html_path,
+        'html_filename': html_filename,
+        'analysis_source': analysis_source,
+        'from_cache': from_cache
+    }
+
+
+class ReportJobQueue:
+    """
+    Persistent report job queue with an in-process worker pool.
+
+    Attributes:
+        workers (int): Number of worker threads
+        max_attempts (int): Attempts per job before it is marked failed
+        backoff_seconds (float): Delay before the first retry; doubles per retry
+        generator (callable): Prompt -> LLM answer function
+        cache (ReportCache): Report store (defaults to the shared cache)
+        allow_fallback (bool): Write the analysis locally on the last attempt
+                               instead of failing the job
+    """
+
+    # Running jobs older than this are assumed abandoned when a queue starts
+    STALE_RUNNING_SECONDS = 300
+
+    def __init__(self, workers: int = 2, max_attempts: int = 3, backoff_seconds: float = 2.0,
+                 generator: Callable[[str], Optional[str]] = default_generator,
+                 cache: ReportCache = None, allow_fallback: bool = True):
+        self.workers = max(1, workers)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_seconds = backoff_seconds
+        self.generator = generator
+        self.cache = cache
+        self.allow_fallback = allow_fallback
+        self._ready = queue.Queue()
+        self._finished = threading.Condition()
+        self._threads = []
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """Start the worker threads and resume unfinished jobs (idempotent)."""
+        with self._start_lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"report-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        self._resume_unfinished()
+
+    def _resume_unfinished(self):
+        """Requeue jobs a previous process left queued or running."""
+        from APicalls.models import ReportJob
+
+        try:
+            now = timezone.now()
+            # A running job not updated for this long lost its worker
+            ReportJob.objects.filter(
+                status=ReportJob.STATUS_RUNNING,
+                updated_at__lt=now - timedelta(seconds=self.STALE_RUNNING_SECONDS)
+            ).update(status=ReportJob.STATUS_QUEUED)
+            for job_id, next_attempt_at in ReportJob.objects.filter(
+                    status=ReportJob.STATUS_QUEUED).values_list('job_id', 'next_attempt_at'):
+                delay = (next_attempt_at - now).total_seconds() if next_attempt_at else 0
+                self._schedule(job_id, delay)
+        except Exception as e:
+            # The job table may not exist yet (migrations not run)
+            print(f"Could not resume report jobs: {str(e)}")
+
+    def submit(self, session_id: str, payload: Dict[str, Any]) -> str:
+        """
+        Record a report job and queue it.
+
+        Args:
+            session_id (str): Meeting session id
+            payload (dict): Report input from MeetingSession.get_report_payload()
+
+        Returns:
+            str: Job id
+        """
+        from APicalls.models import ReportJob
+
+        self.start()
+        job = ReportJob.objects.create(
+            job_id=screenshot_ids.next_id(),
+            session_id=session_id,
+            payload=payload,
+            max_attempts=self.max_attempts
+        )
+        self._ready.put(job.job_id)
+        return job.job_id
+
+    def _schedule(self, job_id: str, delay: float):
+        """Queue a job now or after a delay."""
+        if delay <= 0:
+            self._ready.put(job_id)
+            return
+        timer = threading.Timer(delay, self._ready.put, args=(job_id,))
+        timer.daemon = True
+        timer.start()
+
+    def _work(self):
+        """Worker loop: run jobs as they become ready."""
+        while True:
+            job_id = self._ready.get()
+            try:
+                self._run(job_id)
+            except Exception as e:
+                print(f"Report job {job_id} crashed: {str(e)}")
+            finally:
+                close_old_connections()
+
+    def _run(self, job_id: str):
+        """Claim a job, attempt it once and record the outcome."""
+        from APicalls.models import ReportJob
+
+        # Claim atomically: only one worker (in any process) moves it to running
+        claimed = ReportJob.objects.filter(job_id=job_id, status=ReportJob.STATUS_QUEUED).update(
+            status=ReportJob.STATUS_RUNNING,
+            attempts=F('attempts') + 1,
+            updated_at=timezone.now()
+        )
+        if not claimed:
+            return
+
+        job = ReportJob.objects.get(job_id=job_id)
+        try:
+            # Retry the LLM while attempts remain; the last attempt falls
+            # back to a locally written analysis if that is allowed
+            result = generate_report(job.session_id, job.payload, self.generator, self.cache,
+                                     allow_fallback=self.allow_fallback and job.attempts >= job.max_attempts)
+        except Exception as e:
+            job.error = str(e)
+            if job.attempts < job.max_attempts:
+                delay = self.backoff_seconds * 2 ** (job.attempts - 1)
+                job.status = ReportJob.STATUS_QUEUED
+                job.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+                job.save()
+                print(f"Report job {job_id} attempt {job.attempts} failed, retrying in {delay:.1f}s: {str(e)}")
+                self._schedule(job_id, delay)
+                return
+            job.status = ReportJob.STATUS_FAILED
+            job.summary = f"Error generating HTML report: {str(e)}"
+        else:
+            job.status = ReportJob.STATUS_SUCCEEDED
+            job.error = ''
+            job.summary = result['summary']
+            job.html_filename = result['html_filename']
+
+        job.next_attempt_at = None
+        job.finished_at = timezone.now()
+        job.save()
+
+        with self._finished:
+            self._finished.notify_all()
+
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the status of a job.
+
+        Returns:
+            dict: Job status, or None if there is no such job
+        """
+        from APicalls.models import ReportJob
+
+        job = ReportJob.objects.filter(job_id=job_id).first()
+        return job.to_dict() if job else None
+
+    def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Long-poll a job: return once it finishes or the timeout expires.
+
+        Args:
+            job_id (str): Job id
+            timeout (float): Maximum seconds to wait
+
+        Returns:
+            dict: Latest job status, or None if there is no such job
+        """
+        from APicalls.models import ReportJob
+
+        deadline = timezone.now() + timedelta(seconds=timeout)
+        while True:
+            status = self.get_status(job_id)
+            remaining = (deadline - timezone.now()).total_seconds()
+            if status is None or status['status'] in ReportJob.FINISHED_STATUSES or remaining <= 0:
+                return status
+            # Wake on any finished job; re-check at least every second in case
+            # another process finished it
+            with self._finished:
+                self._finished.wait(min(remaining, 1.0))
+
+
+_report_queue = None
+_report_queue_lock = threading.Lock()
+
+
+def get_report_queue() -> ReportJobQueue:
+    """
+    Get the process-wide report queue, starting it on first use.
+
+    Returns:
+        ReportJobQueue: Queue configured from the Django settings
+    """
+    global _report_queue
+    if _report_queue is None:
+        with _report_queue_lock:
+            if _report_queue is None:
+                from django.conf import settings
+                report_queue = ReportJobQueue(
+                    workers=settings.MOODLINK_REPORT_WORKERS,
+                    max_attempts=settings.MOODLINK_REPORT_MAX_ATTEMPTS,
+                    backoff_seconds=settings.MOODLINK_REPORT_RETRY_BACKOFF,
+                    allow_fallback=settings.MOODLINK_REPORT_FALLBACK
+                )
+                report_queue.start()
+                _report_queue = report_queue
+    return _report_queue
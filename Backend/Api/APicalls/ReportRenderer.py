@@ -0,0 +1,270 @@
+"""
+ReportRenderer.py - Local Rendering of Meeting Reports
+
+Everything in a meeting report that comes straight from the session data
+(overview, emotion-frequency chart, timeline) is rendered here into
+html_template.HTML_TEMPLATE. Only the analysis and recommendation lists
+are written by the LLM, from a compact statistical digest of the session,
+and fallback_analysis() writes them locally when the LLM is unavailable.
+"""
+
+import html
+import json
+import re
+from typing import Dict, List, Optional, Tuple, Any
+
+from APicalls.EmotionResult import EMOTION_EMOJIS
+from APicalls.html_template import HTML_TEMPLATE
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{([A-Z_]+)\}\}")
+
+# Chart bars are coloured by position (see .chart-bar:nth-child in the template)
+CHART_LABEL_ORDER = ["bored", "confused", "neutral", "happy", "sad", "angry"]
+
+# Most items kept from each LLM list, and most characters per item
+MAX_LIST_ITEMS = 6
+MAX_ITEM_LENGTH = 400
+
+
+def render_template(template: str, values: Dict[str, str]) -> str:
+    """
+    Replace {{NAME}} placeholders with values.
+
+    Placeholders without a value are left in place, so a template can be
+    filled in more than one pass.
+
+    Args:
+        template (str): Template text
+        values (dict): Placeholder name -> replacement (already HTML)
+
+    Returns:
+        str: Filled template
+    """
+    def replace(match):
+        value = values.get(match.group(1))
+        return match.group(0) if value is None else value
+    return PLACEHOLDER_PATTERN.sub(replace, template)
+
+
+def emotion_css_class(label: str) -> str:
+    """CSS class of an emotion label, e.g. "Happy" -> "happy"."""
+    return re.sub(r"[^a-z0-9-]", "", label.lower())
+
+
+def emotion_emoji(label: str) -> str:
+    """Emoji of an emotion label."""
+    return EMOTION_EMOJIS.get(label.lower(), "🤔")
+
+
+def render_chart_bars(label_counts: Dict[str, int]) -> str:
+    """
+    Render the emotion-frequency chart.
+
+    Args:
+        label_counts (dict): Label -> number of readings
+
+    Returns:
+        str: One chart-bar element per label
+    """
+    total = sum(label_counts.values())
+    if not total:
+        return '<p>No emotion readings were recorded.</p>'
+
+    # Known labels in the template's colour order, then any others by count
+    def order(item):
+        label, count = item
+        key = label.lower()
+        if key in CHART_LABEL_ORDER:
+            return (0, CHART_LABEL_ORDER.index(key), 0)
+        return (1, 0, -count)
+
+    bars = []
+    for i, (label, count) in enumerate(sorted(label_counts.items(), key=order)):
+        percentage = count / total * 100
+        bars.append(
+            f'<div class="chart-bar">'
+            f'<div class="bar-fill" style="--fill-width: {percentage:.2f}%; animation-delay: {i * 0.1:.1f}s;">'
+            f'<span class="emotion-label">{emotion_emoji(label)} {html.escape(label.title())}</span>'
+            f'</div>'
+            f'<span class="emotion-percentage">{percentage:.2f}% ({count})</span>'
+            f'</div>'
+        )
+    return "\n                ".join(bars)
+
+
+def render_timeline_events(events: List[Tuple[str, str, str]]) -> str:
+    """
+    Render timeline events.
+
+    Args:
+        events (list): (time_range, label, description) per event, e.g.
+                       ("12.0–18.5min", "Neutral", "mostly neutral (64%), 3 participants")
+
+    Returns:
+        str: One timeline-event element per event
+    """
+    if not events:
+        return '<p>No emotion readings were recorded.</p>'
+
+    items = []
+    for i, (time_range, label, description) in enumerate(events):
+        # Stagger the entrance animation, capped so long timelines still appear
+        delay = min(i * 0.05, 2.0)
+        items.append(
+            f'<div class="timeline-event {emotion_css_class(label)}" style="--delay: {delay:.2f}s;">'
+            f'<strong>{html.escape(time_range)}</strong>'
+            f'<span>{html.escape(description)}</span>'
+            f'</div>'
+        )
+    return "\n                ".join(items)
+
+
+def render_list_items(items: List[str]) -> str:
+    """Render plain-text items as escaped <li> elements."""
+    return "\n                ".join(f"<li>{html.escape(item)}</li>" for item in items)
+
+
+def render_report(overview: Dict[str, str], label_counts: Dict[str, int],
+                  events: List[Tuple[str, str, str]]) -> str:
+    """
+    Render everything except the analysis and recommendations.
+
+    Args:
+        overview (dict): DURATION, TOTAL_READINGS, START_TIME and END_TIME text
+        label_counts (dict): Label -> number of readings
+        events (list): Timeline events for render_timeline_events
+
+    Returns:
+        str: Report HTML with {{ANALYSIS_POINTS}} and {{RECOMMENDATIONS}} left in
+    """
+    values = {name: html.escape(str(value)) for name, value in overview.items()}
+    values['EMOTION_CHART_BARS'] = render_chart_bars(label_counts)
+    values['TIMELINE_EVENTS'] = render_timeline_events(events)
+    return render_template(HTML_TEMPLATE, values)
+
+
+def fill_analysis(report_html: str, analysis: List[str], recommendations: List[str]) -> str:
+    """Fill the analysis and recommendation lists into a rendered report."""
+    return render_template(report_html, {
+        'ANALYSIS_POINTS': render_list_items(analysis),
+        'RECOMMENDATIONS': render_list_items(recommendations)
+    })
+
+
+def build_analysis_prompt(digest: Dict[str, Any]) -> str:
+    """
+    Build the LLM prompt for the analysis and recommendations.
+
+    Args:
+        digest (dict): Session digest from MeetingSession.get_report_digest()
+
+    Returns:
+        str: Prompt asking for a JSON object with both lists
+    """
+    return f"""You are analysing the emotions detected in the participants of an online meeting.
+
+MEETING DIGEST (JSON):
+{json.dumps(digest, separators=(',', ':'), ensure_ascii=False)}
+
+Write:
+- "analysis": 3-4 points on the overall mood and energy, key emotional patterns,
+  engagement/stress/satisfaction, and notable emotional transitions
+- "recommendations": 4-5 actionable recommendations for future meetings
+
+Return ONLY a JSON object of the form {{"analysis": ["..."], "recommendations": ["..."]}}.
+Each item is one or two plain-text sentences without HTML or markdown."""
+
+
+def parse_analysis_response(text: Optional[str]) -> Optional[Tuple[List[str], List[str]]]:
+    """
+    Parse the LLM's JSON answer.
+
+    Args:
+        text (str): LLM response, possibly wrapped in a code fence
+
+    Returns:
+        tuple: (analysis, recommendations), or None if the answer is unusable
+    """
+    if not text:
+        return None
+    start = text.find('{')
+    end = text.rfind('}')
+    if start < 0 or end <= start:
+        return None
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    lists = []
+    for key in ('analysis', 'recommendations'):
+        items = data.get(key)
+        if not isinstance(items, list):
+            return None
+        items = [str(item).strip()[:MAX_ITEM_LENGTH] for item in items if str(item).strip()]
+        if not items:
+            return None
+        lists.append(items[:MAX_LIST_ITEMS])
+    return lists[0], lists[1]
+
+
+def fallback_analysis(digest: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """
+    Write the analysis and recommendations from the digest without an LLM.
+
+    Args:
+        digest (dict): Session digest from MeetingSession.get_report_digest()
+
+    Returns:
+        tuple: (analysis, recommendations)
+    """
+    total = digest.get('total_readings', 0)
+    if not total:
+        return (
+            ["No emotion readings were recorded during this session."],
+            ["Make sure participants' cameras are on and visible while MoodLink is running."]
+        )
+
+    percentages = digest.get('label_percentages', {})
+    ranked = sorted(percentages.items(), key=lambda item: item[1], reverse=True)
+    top_label, top_share = ranked[0]
+
+    analysis = [
+        f"The dominant emotion was {top_label.lower()} ({top_share:.1f}% of {total} readings "
+        f"over {digest.get('duration_minutes', 0):.1f} minutes)."
+    ]
+    if len(ranked) > 1:
+        others = ", ".join(f"{label.lower()} {share:.1f}%" for label, share in ranked[1:4])
+        analysis.append(f"Other emotions observed: {others}.")
+
+    opening, closing = digest.get('opening_mood'), digest.get('closing_mood')
+    if opening and closing and opening != closing:
+        analysis.append(
+            f"The mood shifted from mostly {opening.lower()} at the start "
+            f"to mostly {closing.lower()} by the end."
+        )
+    elif opening:
+        analysis.append(f"The mood stayed mostly {opening.lower()} throughout the meeting.")
+
+    transitions = digest.get('top_transitions', {})
+    if transitions:
+        change, count = next(iter(transitions.items()))
+        analysis.append(f"The most frequent change was {change.replace('->', ' to ').lower()} ({count} times).")
+
+    negative = sum(share for label, share in percentages.items()
+                   if label.lower() in ('bored', 'sad', 'confused', 'angry', 'fear', 'disgust'))
+    recommendations = []
+    if percentages.get('Bored', percentages.get('bored', 0)) >= 20:
+        recommendations.append("Keep agenda items short and invite participants to speak to maintain energy.")
+    if percentages.get('Confused', percentages.get('confused', 0)) >= 15:
+        recommendations.append("Pause for questions and recap key points when introducing new topics.")
+    if negative >= 40:
+        recommendations.append("Check in with participants about workload and meeting format.")
+    recommendations.extend([
+        "Share a clear agenda before the meeting so participants can prepare.",
+        "Review the timeline to see which topics coincided with changes in mood.",
+        "Close with a short summary of decisions and next steps.",
+    ])
+    return analysis, recommendations[:5]
@@ -0,0 +1,93 @@
+"""
+ScreenshotIds.py - Collision-Free, Time-Ordered Screenshot IDs
+
+Screenshot ids name files on disk (screenshot_<id>.png and its face crops),
+so two requests must never get the same id, even when they are handled by
+different threads or worker processes.
+
+Ids are ULIDs: a 48-bit millisecond timestamp followed by 80 random bits,
+written as 26 Crockford base32 characters. Because the timestamp comes
+first, sorting ids as strings sorts them by time. Within one process, ids
+created in the same millisecond increment the random part instead of
+drawing a new one, so ids are strictly increasing in the order they were
+allocated; across processes the random bits make collisions negligible.
+"""
+
+import os
+import threading
+import time
+
+# Crockford base32: no I, L, O or U
+ENCODING = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+ULID_LENGTH = 26
+RANDOM_BITS = 80
+
+
+def encode_ulid(value):
+    """Encode a 128-bit integer as a 26-character ULID string."""
+    chars = []
+    for _ in range(ULID_LENGTH):
+        chars.append(ENCODING[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def ulid_timestamp(ulid):
+    """
+    Get the creation time of an id.
+
+    Args:
+        ulid (str): Id from ScreenshotIdAllocator
+
+    Returns:
+        float: Seconds since the epoch (millisecond precision)
+    """
+    value = 0
+    for char in ulid[:10]:
+        value = value * 32 + ENCODING.index(char)
+    return value / 1000
+
+
+class ScreenshotIdAllocator:
+    """
+    Thread-safe allocator of monotonic ULIDs.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget the last id, e.g. in a freshly forked worker process."""
+        self._last_ms = -1
+        self._last_random = 0
+
+    def next_id(self):
+        """
+        Allocate a new id.
+
+        Returns:
+            str: 26-character id, greater than every id allocated before it
+                 in this process
+        """
+        with self._lock:
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._last_random = int.from_bytes(os.urandom(10), "big")
+            else:
+                # Same millisecond, or the clock went backwards: stay on the
+                # last timestamp and count up so the order is kept
+                self._last_random += 1
+                if self._last_random >> RANDOM_BITS:
+                    self._last_ms += 1
+                    self._last_random = 0
+            return encode_ulid((self._last_ms << RANDOM_BITS) | self._last_random)
+
+
+# Shared allocator for the whole process
+screenshot_ids = ScreenshotIdAllocator()
+
+# Forked workers must not continue from the parent's random bits
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=screenshot_ids.reset)
@@ -0,0 +1,145 @@
+"""
+SessionStats.py - Incremental Running Aggregates for Live Session Stats
+
+Every reading added to a meeting session updates these aggregates in O(1)
+(amortized for the rolling windows), so live stats never rescan the
+timeline:
+
+- per-label counts and mean confidence
+- per-participant reading counts
+- per-label counts over rolling windows (last 1 and 5 minutes by default)
+- label transitions per participant (e.g. neutral -> happy)
+"""
+
+import threading
+import time
+from collections import deque
+
+
+class RollingWindow:
+    """
+    Per-label counts of the readings from the last `seconds` seconds.
+
+    Readings arrive in time order, so expired ones are always at the left
+    of the deque and each reading is added and evicted exactly once.
+    """
+
+    __slots__ = ('seconds', 'readings', 'counts')
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.readings = deque()
+        self.counts = {}
+
+    def add(self, timestamp, label):
+        self.readings.append((timestamp, label))
+        self.counts[label] = self.counts.get(label, 0) + 1
+        self.evict(timestamp)
+
+    def evict(self, now):
+        """Drop readings older than the window."""
+        cutoff = now - self.seconds
+        while self.readings and self.readings[0][0] < cutoff:
+            _, label = self.readings.popleft()
+            remaining = self.counts[label] - 1
+            if remaining:
+                self.counts[label] = remaining
+            else:
+                del self.counts[label]
+
+
+class SessionStats:
+    """
+    Running aggregates for one meeting session.
+
+    Attributes:
+        total (int): Number of readings seen
+        label_counts (dict): Label -> readings
+        participant_counts (dict): Participant number -> readings
+        transitions (dict): (from_label, to_label) -> times a participant changed label
+    """
+
+    def __init__(self, window_seconds=(60, 300)):
+        self.total = 0
+        self.label_counts = {}
+        self.confidence_sums = {}
+        self.confidence_counts = {}
+        self.participant_counts = {}
+        self.transitions = {}
+        self._last_labels = {}
+        self.windows = [RollingWindow(seconds) for seconds in window_seconds]
+        self._lock = threading.Lock()
+
+    def add(self, timestamp, label, confidence=None, participant=None):
+        """
+        Update all aggregates with one reading.
+
+        Args:
+            timestamp (float): Seconds since the epoch
+            label (str): Emotion label
+            confidence (float): Confidence of the label (0-1), if known
+            participant (int): Participant number, or None for a whole frame
+        """
+        with self._lock:
+            self.total += 1
+            self.label_counts[label] = self.label_counts.get(label, 0) + 1
+
+            if confidence is not None:
+                self.confidence_sums[label] = self.confidence_sums.get(label, 0.0) + confidence
+                self.confidence_counts[label] = self.confidence_counts.get(label, 0) + 1
+
+            participant = participant or 0
+            self.participant_counts[participant] = self.participant_counts.get(participant, 0) + 1
+
+            previous_label = self._last_labels.get(participant)
+            if previous_label is not None and previous_label != label:
+                key = (previous_label, label)
+                self.transitions[key] = self.transitions.get(key, 0) + 1
+            self._last_labels[participant] = label
+
+            for window in self.windows:
+                window.add(timestamp, label)
+
+    def snapshot(self, now=None):
+        """
+        Get the current aggregates as a JSON-serializable dict.
+
+        Args:
+            now (float): Current time in seconds since the epoch (defaults to now)
+
+        Returns:
+            dict: Totals, per-label counts, percentages and mean confidence,
+                  per-participant counts, rolling windows and transitions
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            windows = {}
+            for window in self.windows:
+                window.evict(now)
+                windows[f"last_{window.seconds}s"] = {
+                    'count': len(window.readings),
+                    'label_counts': dict(window.counts)
+                }
+
+            return {
+                'total_readings': self.total,
+                'label_counts': dict(self.label_counts),
+                'label_percentages': {
+                    label: count / self.total * 100 for label, count in self.label_counts.items()
+                },
+                'mean_confidence': {
+                    label: self.confidence_sums[label] / count
+                    for label, count in self.confidence_counts.items()
+                },
+                'participant_counts': {
+                    str(participant): count for participant, count in self.participant_counts.items()
+                },
+                'windows': windows,
+                'transitions': {
+                    f"{from_label}->{to_label}": count
+                    for (from_label, to_label), count in self.transitions.items()
+                },
+                'current_labels': {
+                    str(participant): label for participant, label in self._last_labels.items()
+                }
+            }
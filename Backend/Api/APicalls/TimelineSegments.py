@@ -0,0 +1,153 @@
+"""
+TimelineSegments.py - Bounded Timeline Summaries
+
+A meeting timeline has one reading per face per screenshot, so it grows
+without bound. For the report prompt and the HTML timeline it is
+summarized into run-length-encoded segments such as
+"12.0–18.5min: mostly neutral (64%), 3 participants":
+
+1. Readings are binned into short time buckets (at most MAX_BUCKETS).
+2. Consecutive buckets with the same dominant emotion are merged (RLE).
+3. While the segments would exceed the token budget, the two adjacent
+   segments with the most similar emotion mix are merged. The segment
+   boundaries that survive are the strongest change points.
+
+The number of segments depends only on the token budget, never on the
+length of the meeting.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+# Upper bound on the number of initial time buckets
+MAX_BUCKETS = 512
+
+# Shortest bucket, in seconds (about one screenshot interval)
+MIN_BUCKET_SECONDS = 3.0
+
+# Rough size of LLM tokens, and of one segment line, in characters
+CHARS_PER_TOKEN = 4
+SEGMENT_CHARS = 56
+
+
+class TimelineSegment(NamedTuple):
+    """
+    A stretch of the meeting with a stable emotion mix.
+
+    Attributes:
+        start_minutes (float): Start, in minutes since the session started
+        end_minutes (float): End, in minutes since the session started
+        label (str): Dominant emotion
+        share (float): Fraction of the segment's readings with that emotion (0-1)
+        readings (int): Number of readings in the segment
+        participants (int): Number of distinct participants seen (0 if only
+                            whole-frame readings)
+    """
+    start_minutes: float
+    end_minutes: float
+    label: str
+    share: float
+    readings: int
+    participants: int
+
+    def time_range(self):
+        """Segment time span, e.g. "12.0–18.5min"."""
+        return f"{self.start_minutes:.1f}–{self.end_minutes:.1f}min"
+
+    def description(self):
+        """Segment content, e.g. "mostly neutral (64%), 3 participants"."""
+        if self.share >= 0.995:
+            mix = self.label.lower()
+        else:
+            mix = f"mostly {self.label.lower()} ({self.share * 100:.0f}%)"
+        if not self.participants:
+            return mix
+        return f"{mix}, {self.participants} participant{'s' if self.participants != 1 else ''}"
+
+    def __str__(self):
+        return f"{self.time_range()}: {self.description()}"
+
+
+def _estimate_tokens(segments):
+    return sum(len(str(segment)) + 1 for segment in segments) // CHARS_PER_TOKEN + 1
+
+
+def summarize_timeline(timeline, start_timestamp, token_budget=400):
+    """
+    Summarize an EmotionTimeline into a bounded list of segments.
+
+    Args:
+        timeline (EmotionTimeline): Readings of the session
+        start_timestamp (float): Session start, in seconds since the epoch
+        token_budget (int): Maximum size of all segment lines, in LLM tokens
+
+    Returns:
+        list: TimelineSegment objects in time order
+    """
+    if not len(timeline):
+        return []
+
+    timestamps = timeline.timestamps
+    span = max(float(timestamps.max()) - start_timestamp, 0.0)
+    bucket_seconds = max(MIN_BUCKET_SECONDS, span / MAX_BUCKETS * 1.0001)
+
+    # Per-bucket label counts, keeping only buckets that have readings
+    counts = timeline.time_buckets(bucket_seconds, start_timestamp)
+    filled = np.flatnonzero(counts.sum(axis=1))
+    counts = counts[filled].astype(np.int64)
+
+    # Distinct participants per bucket
+    buckets = np.maximum(((timestamps - start_timestamp) // bucket_seconds).astype(np.int64), 0)
+    pairs = np.unique(buckets * 65536 + timeline.participants)
+    participant_sets = {bucket: set() for bucket in filled.tolist()}
+    for bucket, participant in zip((pairs // 65536).tolist(), (pairs % 65536).tolist()):
+        participant_sets[bucket].add(participant)
+
+    # Segments as [first bucket, last bucket, label counts, participants]
+    segments = []
+    for bucket, row in zip(filled.tolist(), counts):
+        dominant = int(row.argmax())
+        if segments and int(segments[-1][2].argmax()) == dominant:
+            # Run-length encoding: same dominant emotion continues the segment
+            segments[-1][1] = bucket
+            segments[-1][2] = segments[-1][2] + row
+            segments[-1][3] |= participant_sets[bucket]
+        else:
+            segments.append([bucket, bucket, row.copy(), set(participant_sets[bucket])])
+
+    def to_segment(first, last, row, participants):
+        total = int(row.sum())
+        dominant = int(row.argmax())
+        return TimelineSegment(
+            first * bucket_seconds / 60,
+            min((last + 1) * bucket_seconds, span) / 60,
+            timeline.label_names[dominant],
+            float(row[dominant]) / total,
+            total,
+            len(participants - {0})
+        )
+
+    def merge_most_similar():
+        """Merge the adjacent pair with the most similar emotion mix."""
+        mixes = np.stack([segment[2] / segment[2].sum() for segment in segments])
+        distances = np.abs(mixes[1:] - mixes[:-1]).sum(axis=1)
+        # On ties, merge the pair with fewer readings
+        sizes = np.array([segment[2].sum() for segment in segments], dtype=np.float64)
+        distances = distances + 1e-12 * (sizes[1:] + sizes[:-1])
+        i = int(distances.argmin())
+        left, right = segments[i], segments[i + 1]
+        segments[i] = [left[0], right[1], left[2] + right[2], left[3] | right[3]]
+        del segments[i + 1]
+
+    # Cheap first pass down to the segment count the budget roughly allows,
+    # then merge one at a time until the formatted lines fit
+    target = max(1, token_budget * CHARS_PER_TOKEN // SEGMENT_CHARS)
+    while len(segments) > target:
+        merge_most_similar()
+
+    result = [to_segment(*segment) for segment in segments]
+    while len(segments) > 1 and _estimate_tokens(result) > token_budget:
+        merge_most_similar()
+        result = [to_segment(*segment) for segment in segments]
+    return result
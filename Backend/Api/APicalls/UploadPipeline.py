@@ -0,0 +1,295 @@
+"""
+UploadPipeline.py - Screenshot Upload Pipeline and Worker Pool
+
+process_screenshot() is the whole CPU- and disk-bound part of a screenshot
+upload (decode, face detection, emotion inference, optional persistence,
+session tracking). The sync upload view calls it directly; the async view
+used under ASGI hands it to an UploadPool so the event loop never runs it.
+
+UploadPool is a fixed set of worker threads, one per CPU core by default,
+fed through an explicit bounded queue. When the queue is full, submit()
+fails immediately instead of letting requests pile up. Threads rather than
+processes: OpenCV and TensorFlow release the GIL while they work, and the
+workers share the loaded model and the per-session face trackers.
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from django.conf import settings
+
+from APicalls.EmotionResult import format_emotion
+from APicalls.FaceSanitizer import decode_image, downscale_frame, save_face_crops, sniff_image_format
+from APicalls.Identifyer import classify_image, classify_tracked_faces
+from APicalls.MeetingTracker import meeting_tracker
+from APicalls.ScreenshotIds import screenshot_ids
+
+SCREENSHOT_DIR = "/Users/alvishprasla/Code/JS/Moodlink/MoodLink/Testimages"
+
+# Extensions saved screenshots can have; orphan cleanup matches the same ones
+SCREENSHOT_EXTENSIONS = ('.png', '.jpg', '.webp')
+
+
+class UploadRejected(Exception):
+    """An upload cannot be processed; carries the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class UploadPoolFull(Exception):
+    """The upload queue is full."""
+
+
+def read_upload(uploaded_file):
+    """
+    Get the content of an uploaded file without copying it.
+
+    Uploads Django keeps in memory are returned as a view of their buffer;
+    uploads spooled to disk are read once. Use the view as a context
+    manager: while it is held the buffer stays exported and Django's
+    close() of the file would raise BufferError.
+
+    Args:
+        uploaded_file (UploadedFile): File from request.FILES
+
+    Returns:
+        memoryview: Encoded file content
+    """
+    file = getattr(uploaded_file, 'file', None)
+    if hasattr(file, 'getbuffer'):
+        return file.getbuffer()
+    return memoryview(uploaded_file.read())
+
+
+def process_screenshot(image_bytes, session_token):
+    """
+    Run one screenshot through detection, inference and session tracking.
+
+    Args:
+        image_bytes (bytes or memoryview): Encoded PNG, JPEG or WebP
+                                           screenshot as uploaded
+        session_token (str): Client session token
+
+    Returns:
+        dict: Body of the upload response
+
+    Raises:
+        UploadRejected: If the screenshot is in another format or cannot be decoded
+    """
+    image_format = sniff_image_format(image_bytes)
+    if image_format is None:
+        raise UploadRejected('Unsupported screenshot format (send PNG, JPEG or WebP)', status=415)
+
+    # Generate unique filename
+    screenshot_id = screenshot_ids.next_id()
+    unique_filename = f"screenshot_{screenshot_id}.{'jpg' if image_format == 'jpeg' else image_format}"
+
+    # Decode the upload once; everything downstream works on this array
+    image = decode_image(image_bytes)
+    if image is None:
+        raise UploadRejected('Could not decode screenshot')
+
+    # Single detection pass; its result (even "no faces") drives the rest.
+    # The session's tracker searches near last frame's faces first.
+    face_tracker = meeting_tracker.get_face_tracker(session_token)
+    face_tracker.full_scan_interval = settings.MOODLINK_FULL_SCAN_INTERVAL
+    face_tracker.change_threshold = settings.MOODLINK_CHANGE_THRESHOLD
+    detection, track_ids = face_tracker.track(
+        image,
+        max_side=settings.MOODLINK_DETECTION_MAX_SIDE,
+        use_tiles=settings.MOODLINK_TILE_LAYOUT
+    )
+
+    if detection.face_count:
+        # Multiple faces detected - get emotions for all that changed
+        face_crops = detection.crops
+        emotion_results = classify_tracked_faces(face_tracker, face_crops, track_ids, detection.faces)
+    else:
+        # No faces detected - classify a downscaled full frame once
+        face_crops = [downscale_frame(image)]
+        emotion_results = [classify_image(face_crops[0])]
+
+    # Optionally keep the screenshot and crops on disk for debugging
+    sanitized_face_paths = [None] * len(face_crops)
+    if settings.MOODLINK_PERSIST_IMAGES:
+        os.makedirs(SCREENSHOT_DIR, exist_ok=True)
+        with open(os.path.join(SCREENSHOT_DIR, unique_filename), 'wb') as f:
+            f.write(image_bytes)
+        sanitized_face_paths = save_face_crops(
+            face_crops,
+            os.path.join(SCREENSHOT_DIR, "Sanitized"),
+            os.path.splitext(unique_filename)[0]
+        )
+
+    # Track emotions in meeting session
+    try:
+        # Track each emotion separately
+        for result, sanitized_path in zip(emotion_results, sanitized_face_paths):
+            meeting_tracker.add_emotion(
+                result,
+                filename=unique_filename,
+                sanitized_path=sanitized_path,
+                token=session_token
+            )
+    except Exception:
+        pass  # Continue processing even if session tracking fails
+
+    return {
+        'success': True,
+        'message': 'Screenshot processed successfully',
+        'emotions': [format_emotion(result) for result in emotion_results],  # Return all emotions
+        'results': [result.to_dict() for result in emotion_results],
+        'face_count': len(emotion_results),  # Number of faces detected
+        'session_info': meeting_tracker.get_current_session_digest(session_token),
+        'tracking': face_tracker.get_stats(),
+        'data': {
+            'filename': unique_filename,
+            'format': image_format,
+            'width': image.shape[1],
+            'height': image.shape[0],
+            'screenshot_id': screenshot_id,
+            'sanitized_paths': sanitized_face_paths,
+            'tile_indices': detection.tile_indices,
+            'track_ids': track_ids
+        }
+    }
+
+
+class UploadPool:
+    """
+    Bounded worker pool for upload processing.
+
+    Attributes:
+        workers (int): Number of worker threads (one per CPU core if 0)
+        queue_size (int): Uploads that may wait for a worker before
+                          submit() raises UploadPoolFull
+    """
+
+    def __init__(self, workers=0, queue_size=64):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.max_queue_depth = 0
+        self._queue_waits = deque(maxlen=1000)
+
+    def _ensure_started(self):
+        if self._threads:
+            return
+        with self._start_lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"upload-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, fn, *args, on_cancel=None):
+        """
+        Queue a call for a worker thread.
+
+        Args:
+            fn (callable): Function to run
+            *args: Its arguments
+            on_cancel (callable): Called instead of fn if the future is
+                                  cancelled before a worker picks it up
+
+        Returns:
+            concurrent.futures.Future: Result of the call (await it with
+                                       asyncio.wrap_future)
+
+        Raises:
+            UploadPoolFull: If queue_size uploads are already waiting
+        """
+        self._ensure_started()
+        future = Future()
+        try:
+            self._queue.put_nowait((future, fn, args, on_cancel, time.monotonic()))
+        except queue.Full:
+            with self._stats_lock:
+                self.rejected += 1
+            raise UploadPoolFull(f"{self.queue_size} uploads already waiting")
+        with self._stats_lock:
+            self.submitted += 1
+            self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return future
+
+    def _work(self):
+        while True:
+            future, fn, args, on_cancel, queued_at = self._queue.get()
+            # Skip uploads whose client has gone away while they waited,
+            # but let them release what they hold
+            if not future.set_running_or_notify_cancel():
+                if on_cancel is not None:
+                    try:
+                        on_cancel()
+                    except Exception as e:
+                        print(f"Cancelled upload cleanup failed: {str(e)}")
+                continue
+            with self._stats_lock:
+                self._queue_waits.append(time.monotonic() - queued_at)
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+            with self._stats_lock:
+                self.completed += 1
+
+    def get_stats(self):
+        """
+        Get pool counters.
+
+        Returns:
+            dict: Workers, queue depth, submitted/completed/rejected counts
+                  and queue wait percentiles in seconds
+        """
+        with self._stats_lock:
+            waits = sorted(self._queue_waits)
+            def percentile(p):
+                if not waits:
+                    return 0.0
+                return waits[min(len(waits) - 1, int(p / 100 * len(waits)))]
+            return {
+                'workers': self.workers,
+                'queue_size': self.queue_size,
+                'queue_depth': self._queue.qsize(),
+                'max_queue_depth': self.max_queue_depth,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'queue_wait_p50': percentile(50),
+                'queue_wait_p95': percentile(95)
+            }
+
+
+_upload_pool = None
+_upload_pool_lock = threading.Lock()
+
+
+def get_upload_pool():
+    """
+    Get the process-wide upload pool.
+
+    Returns:
+        UploadPool: Pool configured from the Django settings
+    """
+    global _upload_pool
+    if _upload_pool is None:
+        with _upload_pool_lock:
+            if _upload_pool is None:
+                _upload_pool = UploadPool(
+                    workers=settings.MOODLINK_UPLOAD_WORKERS,
+                    queue_size=settings.MOODLINK_UPLOAD_QUEUE_SIZE
+                )
+    return _upload_pool
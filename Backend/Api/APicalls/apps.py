@@ -1,5 +1,28 @@
+import os
+import sys
+
 from django.apps import AppConfig
 
 class ApicallsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'APicalls'
+
+    def ready(self):
+        """Load and warm up the emotion model once per worker process."""
+        if os.getenv('MOODLINK_WARMUP', '1') != '1':
+            return
+
+        # Management commands other than runserver never serve requests
+        if os.path.basename(sys.argv[0]) == 'manage.py' and 'runserver' not in sys.argv:
+            return
+
+        # The runserver autoreloader parent process never serves requests
+        if 'runserver' in sys.argv and os.environ.get('RUN_MAIN') != 'true':
+            return
+
+        try:
+            from APicalls.ModelRegistry import warm_up_emotion_model
+            warm_up_emotion_model()
+        except Exception as e:
+            # Requests fall back to lazy loading if warm-up fails
+            print(f"Emotion model warm-up failed: {str(e)}")
@@ -0,0 +1,1320 @@
+"""
+benchmarks.py - Performance Benchmarks for the MoodLink Backend
+
+Run from the Backend/Api directory:
+
+    python -m APicalls.benchmarks <benchmark> [options]
+
+Each benchmark prints a short report and returns its measurements as a dict
+so results can be collected programmatically.
+"""
+
+import argparse
+import inspect
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+
+def _percentile(samples, percent):
+    """Get a percentile from a list of samples."""
+    if not samples:
+        return 0.0
+    return float(np.percentile(np.asarray(samples), percent))
+
+
+def _print_report(title, rows):
+    """Print a benchmark report as aligned name/value rows."""
+    print(f"\n{title}")
+    print("-" * len(title))
+    width = max(len(name) for name, _ in rows)
+    for name, value in rows:
+        print(f"{name.ljust(width)}  {value}")
+
+
+def benchmark_model_startup(requests_count=5):
+    """
+    Compare per-request model loading with the process-wide registry.
+
+    The per-request figures exclude the metadata download the old code did,
+    so the real-world gap is larger than reported here.
+
+    Args:
+        requests_count (int): Number of simulated requests
+
+    Returns:
+        dict: Startup and first-request latency in seconds
+    """
+    from APicalls import ModelRegistry
+
+    dummy = np.zeros((1, ModelRegistry.MODEL_INPUT_SIZE, ModelRegistry.MODEL_INPUT_SIZE, 3),
+                     dtype=np.float32)
+
+    # Old behaviour: load the model inside every request
+    per_request = []
+    for _ in range(requests_count):
+        start = time.perf_counter()
+        ModelRegistry.load_emotion_model().predict(dummy)
+        per_request.append(time.perf_counter() - start)
+
+    # Registry: pay load and warm-up once at startup
+    ModelRegistry._emotion_model = None
+    start = time.perf_counter()
+    emotion_model = ModelRegistry.warm_up_emotion_model()
+    startup_seconds = time.perf_counter() - start
+
+    registry_requests = []
+    for _ in range(requests_count):
+        start = time.perf_counter()
+        emotion_model.predict(dummy)
+        registry_requests.append(time.perf_counter() - start)
+
+    results = {
+        'model_source': emotion_model.source,
+        'startup_seconds': startup_seconds,
+        'per_request_load_first_seconds': per_request[0],
+        'per_request_load_mean_seconds': statistics.mean(per_request),
+        'registry_first_request_seconds': registry_requests[0],
+        'registry_mean_request_seconds': statistics.mean(registry_requests),
+    }
+
+    _print_report("Model startup", [
+        ('model source', results['model_source']),
+        ('registry startup (load + warm-up)', f"{startup_seconds * 1000:.1f} ms"),
+        ('per-request load, first request', f"{per_request[0] * 1000:.1f} ms"),
+        ('per-request load, mean', f"{results['per_request_load_mean_seconds'] * 1000:.1f} ms"),
+        ('registry, first request', f"{registry_requests[0] * 1000:.1f} ms"),
+        ('registry, mean request', f"{results['registry_mean_request_seconds'] * 1000:.1f} ms"),
+    ])
+    return results
+
+
+def benchmark_batched_inference(face_counts=(1, 4, 9, 16, 25), repeats=5):
+    """
+    Measure multi-face classification throughput against face count.
+
+    Compares one forward pass per face (the old loop) with one batched
+    forward pass per screenshot.
+
+    Args:
+        face_counts (tuple): Numbers of faces per simulated screenshot
+        repeats (int): Timed repetitions per face count
+
+    Returns:
+        dict: Faces per second for each face count and mode
+    """
+    from PIL import Image
+    from APicalls.Identifyer import identify, identify_multiple_faces
+    from APicalls.ModelRegistry import warm_up_emotion_model
+
+    warm_up_emotion_model()
+    rng = np.random.default_rng(0)
+    results = {}
+    rows = []
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # Face crops of varying size, as the sanitizer produces them
+        face_paths = []
+        for i in range(max(face_counts)):
+            side = int(rng.integers(80, 260))
+            pixels = rng.integers(0, 256, size=(side, side, 3), dtype=np.uint8)
+            path = os.path.join(temp_dir, f"face_{i+1}.png")
+            Image.fromarray(pixels).save(path)
+            face_paths.append(path)
+
+        for count in face_counts:
+            paths = face_paths[:count]
+            identify_multiple_faces(paths)
+
+            looped = []
+            batched = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                for path in paths:
+                    identify(path)
+                looped.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                identify_multiple_faces(paths)
+                batched.append(time.perf_counter() - start)
+
+            looped_fps = count / statistics.median(looped)
+            batched_fps = count / statistics.median(batched)
+            results[count] = {'looped_faces_per_second': looped_fps,
+                              'batched_faces_per_second': batched_fps}
+            rows.append((f"{count} faces",
+                         f"looped {looped_fps:8.1f} faces/s   batched {batched_fps:8.1f} faces/s   "
+                         f"speedup {batched_fps / looped_fps:.2f}x"))
+
+    _print_report("Batched multi-face inference", rows)
+    return results
+
+
+# Synthetic screenshots of a 2x2 video-call gallery with face-box sidecars
+MEETING_FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "testdata", "meeting")
+
+# Width of a full-screen capture on a 2x display
+RETINA_WIDTH = 2880
+
+
+def _load_fixture_paths(fixtures):
+    """List the image files in a fixture directory, sorted by name."""
+    extensions = ('.png', '.jpg', '.jpeg', '.webp')
+    return [
+        os.path.join(fixtures, name)
+        for name in sorted(os.listdir(fixtures))
+        if name.lower().endswith(extensions)
+    ]
+
+
+def _synthetic_screenshots(count=3, size=(1800, 2880), smooth=False):
+    """
+    Generate PNG-encoded noise frames when no fixtures are given.
+
+    With smooth=True the noise is coarse and blurred, which compresses
+    more like a real screen than per-pixel noise does.
+    """
+    import cv2
+
+    rng = np.random.default_rng(0)
+    frames = []
+    for _ in range(count):
+        if smooth:
+            coarse = rng.integers(0, 256, size=(size[0] // 40, size[1] // 40, 3), dtype=np.uint8)
+            pixels = cv2.resize(coarse, (size[1], size[0]), interpolation=cv2.INTER_CUBIC)
+        else:
+            pixels = rng.integers(0, 256, size=(size[0], size[1], 3), dtype=np.uint8)
+        frames.append(cv2.imencode('.png', pixels)[1].tobytes())
+    return frames
+
+
+def benchmark_in_memory_pipeline(fixtures=None, repeats=3):
+    """
+    Compare the file-based screenshot pipeline with the in-memory one.
+
+    Checks that both paths return the same emotions and face counts, then
+    times them.
+
+    Args:
+        fixtures (str): Directory of meeting screenshots (synthetic frames if None)
+        repeats (int): Timed repetitions per screenshot
+
+    Returns:
+        dict: Mean latency per mode and the number of mismatches
+    """
+    from APicalls.FaceSanitizer import (
+        decode_image, crop_all_faces, crop_largest_face,
+        sanitize_all_faces_for_emotion_detection, sanitize_image_for_emotion_detection
+    )
+    from APicalls.Identifyer import identify, identify_multiple_faces
+    from APicalls.ModelRegistry import warm_up_emotion_model
+
+    warm_up_emotion_model()
+    if fixtures:
+        screenshots = []
+        for path in _load_fixture_paths(fixtures):
+            with open(path, 'rb') as f:
+                screenshots.append(f.read())
+    else:
+        screenshots = _synthetic_screenshots()
+
+    def file_based(data, temp_dir):
+        file_path = os.path.join(temp_dir, "screenshot.png")
+        with open(file_path, 'wb') as f:
+            f.write(data)
+        face_paths = sanitize_all_faces_for_emotion_detection(file_path)
+        if face_paths:
+            emotions = identify_multiple_faces(face_paths)
+        else:
+            emotions = [identify(sanitize_image_for_emotion_detection(file_path))]
+        shutil.rmtree(os.path.join(temp_dir, "Sanitized"), ignore_errors=True)
+        return emotions
+
+    def in_memory(data):
+        image = decode_image(data)
+        face_crops = crop_all_faces(image)
+        if face_crops:
+            return identify_multiple_faces(face_crops)
+        return [identify(crop_largest_face(image))]
+
+    file_times = []
+    memory_times = []
+    mismatches = 0
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for data in screenshots:
+            if file_based(data, temp_dir) != in_memory(data):
+                mismatches += 1
+            for _ in range(repeats):
+                start = time.perf_counter()
+                file_based(data, temp_dir)
+                file_times.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                in_memory(data)
+                memory_times.append(time.perf_counter() - start)
+
+    results = {
+        'screenshots': len(screenshots),
+        'mismatches': mismatches,
+        'file_based_mean_seconds': statistics.mean(file_times),
+        'in_memory_mean_seconds': statistics.mean(memory_times),
+    }
+    _print_report("In-memory screenshot pipeline", [
+        ('screenshots', results['screenshots']),
+        ('result mismatches', mismatches),
+        ('file-based, mean', f"{results['file_based_mean_seconds'] * 1000:.1f} ms"),
+        ('in-memory, mean', f"{results['in_memory_mean_seconds'] * 1000:.1f} ms"),
+    ])
+    return results
+
+
+def benchmark_cascade_pool(requests_count=50, threads=4):
+    """
+    Compare per-request cascade construction with the per-thread pool.
+
+    Args:
+        requests_count (int): Number of simulated requests
+        threads (int): Worker threads sharing the pool
+
+    Returns:
+        dict: Per-request cost of each approach and the pool's load metrics
+    """
+    import cv2
+    from concurrent.futures import ThreadPoolExecutor
+    from APicalls import FaceSanitizer as face_sanitizer_module
+
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+
+    # Old behaviour: every request builds (and parses) its own cascade
+    start = time.perf_counter()
+    for _ in range(requests_count):
+        cascade_path = face_sanitizer_module.get_detector_metrics()['cascade_path'] \
+            or face_sanitizer_module.CASCADE_PATHS[0]
+        cascade = cv2.CascadeClassifier(cascade_path)
+        cascade.detectMultiScale(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY),
+                                 scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
+    per_request_seconds = (time.perf_counter() - start) / requests_count
+
+    # Pool: one cascade per thread, reused across requests
+    sanitizer = face_sanitizer_module.get_face_sanitizer()
+    start = time.perf_counter()
+    for _ in range(requests_count):
+        sanitizer.detect_faces(frame)
+    pooled_seconds = (time.perf_counter() - start) / requests_count
+
+    # Worker threads each load their cascade exactly once
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda _: sanitizer.detect_faces(frame), range(requests_count)))
+
+    metrics = face_sanitizer_module.get_detector_metrics()
+    results = {
+        'per_request_construction_seconds': per_request_seconds,
+        'pooled_seconds': pooled_seconds,
+        'detector_metrics': metrics,
+    }
+    _print_report("Face cascade pool", [
+        ('per-request construction', f"{per_request_seconds * 1000:.2f} ms/request"),
+        ('pooled', f"{pooled_seconds * 1000:.2f} ms/request"),
+        ('cascade loads', metrics['loads']),
+        ('last cascade load', f"{(metrics['last_load_seconds'] or 0) * 1000:.2f} ms"),
+        ('total cascade load', f"{metrics['total_load_seconds'] * 1000:.2f} ms"),
+    ])
+    return results
+
+
+def _iou(box_a, box_b):
+    """Intersection over union of two (x, y, w, h) rectangles."""
+    ax, ay, aw, ah = box_a
+    bx, by, bw, bh = box_b
+    inter_w = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    inter_h = max(0, min(ay + ah, by + bh) - max(ay, by))
+    intersection = inter_w * inter_h
+    union = aw * ah + bw * bh - intersection
+    return intersection / union if union else 0.0
+
+
+def _load_ground_truth(image_path):
+    """Load face boxes from a <screenshot>.json sidecar, if there is one."""
+    import json
+
+    label_path = os.path.splitext(image_path)[0] + '.json'
+    if not os.path.exists(label_path):
+        return None
+    with open(label_path, 'r', encoding='utf-8') as f:
+        return [tuple(box) for box in json.load(f)]
+
+
+def benchmark_detection_pyramid(fixtures=None, max_sides=(0, 1920, 1280, 960, 640), repeats=3):
+    """
+    Measure detection latency and recall at several detection resolutions.
+
+    Also measures the per-tile search used for video-call grids.
+
+    Ground truth comes from a <screenshot>.json sidecar listing [x, y, w, h]
+    boxes; without one, full-resolution detection is the reference. A face
+    counts as found when a detection overlaps it with IoU >= 0.3.
+
+    Args:
+        fixtures (str): Directory of meeting screenshots (the committed
+                        testdata/meeting frames, upscaled, if None)
+        max_sides (tuple): Detection resolutions to try (0 = full resolution)
+        repeats (int): Timed repetitions per screenshot
+
+    Returns:
+        dict: Mean latency and recall for each resolution
+    """
+    import cv2
+    from APicalls.FaceSanitizer import get_face_sanitizer, detect_all_faces
+
+    sanitizer = get_face_sanitizer()
+    paths = _load_fixture_paths(fixtures or MEETING_FIXTURE_DIR)
+    frames = [cv2.imread(path) for path in paths]
+    ground_truth = [_load_ground_truth(path) for path in paths]
+    if not fixtures:
+        # The committed meeting is 960 px wide; scale it to a retina-sized
+        # capture so every max side is a real downscale
+        scale = RETINA_WIDTH // frames[0].shape[1]
+        frames = [cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+                  for frame in frames]
+        ground_truth = [[tuple(v * scale for v in box) for box in truth] for truth in ground_truth]
+
+    # Fall back to full-resolution detection as the reference
+    ground_truth = [
+        truth if truth is not None else [tuple(face) for face in sanitizer.detect_faces(frame)]
+        for frame, truth in zip(frames, ground_truth)
+    ]
+    total_faces = sum(len(truth) for truth in ground_truth)
+
+    results = {}
+    rows = []
+    for max_side in max_sides:
+        latencies = []
+        found = 0
+        for frame, truth in zip(frames, ground_truth):
+            for _ in range(repeats):
+                start = time.perf_counter()
+                faces = sanitizer.detect_faces(frame, max_side=max_side or None)
+                latencies.append(time.perf_counter() - start)
+            found += sum(1 for box in truth if any(_iou(box, face) >= 0.3 for face in faces))
+
+        recall = found / total_faces if total_faces else 1.0
+        label = 'full resolution' if not max_side else f"max side {max_side}"
+        results[label] = {'mean_seconds': statistics.mean(latencies), 'recall': recall}
+        rows.append((label, f"{statistics.mean(latencies) * 1000:8.1f} ms   recall {recall:.3f}"))
+
+    # Per-tile search on video-call grids, at the default detection size
+    latencies = []
+    found = 0
+    tiled_frames = 0
+    for frame, truth in zip(frames, ground_truth):
+        for _ in range(repeats):
+            start = time.perf_counter()
+            detection = detect_all_faces(frame, max_side=1280, use_tiles=True)
+            latencies.append(time.perf_counter() - start)
+        tiled_frames += detection.tile_indices is not None
+        found += sum(1 for box in truth if any(_iou(box, face) >= 0.3 for face in detection.faces))
+    recall = found / total_faces if total_faces else 1.0
+    results['tile layout'] = {'mean_seconds': statistics.mean(latencies), 'recall': recall,
+                              'tiled_frames': tiled_frames}
+    rows.append((f"tile layout, max side 1280 ({tiled_frames} grids)",
+                 f"{statistics.mean(latencies) * 1000:8.1f} ms   recall {recall:.3f}"))
+
+    _print_report(f"Detection pyramid ({len(frames)} screenshots, {total_faces} faces)", rows)
+    return results
+
+
+def benchmark_frame_diff(fixtures=None, threshold=4.0, max_distance=0.05):
+    """
+    Check that skipping unchanged faces keeps the emotion stream equivalent.
+
+    Replays a recorded meeting (screenshots in name order) twice: once
+    classifying every face, once reusing emotions of unchanged faces. The
+    two emotion distributions must be within max_distance total variation
+    distance of each other.
+
+    Args:
+        fixtures (str): Directory of consecutive screenshots from one meeting
+                        (the committed testdata/meeting frames if None)
+        threshold (float): Change threshold to evaluate
+        max_distance (float): Largest acceptable total variation distance
+
+    Returns:
+        dict: Skip ratio, per-face agreement, distribution distance and verdict
+    """
+    import cv2
+    from APicalls.FaceTracker import FaceTracker, label_distribution_distance
+    from APicalls.Identifyer import classify_tracked_faces
+    from APicalls.ModelRegistry import warm_up_emotion_model
+
+    fixtures = fixtures or MEETING_FIXTURE_DIR
+    warm_up_emotion_model()
+    frames = [cv2.imread(path) for path in _load_fixture_paths(fixtures)]
+
+    def replay(change_threshold):
+        face_tracker = FaceTracker(change_threshold=change_threshold)
+        stream = []
+        start = time.perf_counter()
+        for frame in frames:
+            detection, track_ids = face_tracker.track(frame, max_side=1280)
+            if detection.face_count:
+                results = classify_tracked_faces(face_tracker, detection.crops, track_ids)
+                stream.extend((result.face_index, result.label.lower()) for result in results)
+        return stream, time.perf_counter() - start, face_tracker.get_stats()
+
+    reference, reference_seconds, _ = replay(0)
+    skipping, skipping_seconds, stats = replay(threshold)
+
+    agreement = (sum(1 for a, b in zip(reference, skipping) if a == b) / len(reference)
+                 if reference else 1.0)
+    distance = label_distribution_distance([label for _, label in reference],
+                                           [label for _, label in skipping])
+
+    results = {
+        'frames': len(frames),
+        'faces': len(reference),
+        'skip_ratio': stats['skip_ratio'],
+        'agreement': agreement,
+        'total_variation_distance': distance,
+        'equivalent': distance <= max_distance,
+        'classify_all_seconds': reference_seconds,
+        'skip_unchanged_seconds': skipping_seconds,
+    }
+    _print_report(f"Frame-diff skipping (threshold {threshold})", [
+        ('frames / faces', f"{len(frames)} / {len(reference)}"),
+        ('skip ratio', f"{stats['skip_ratio']:.3f}"),
+        ('per-face agreement', f"{agreement:.3f}"),
+        ('distribution distance (TVD)', f"{distance:.4f}"),
+        ('statistically equivalent', 'yes' if results['equivalent'] else 'NO'),
+        ('classify all', f"{reference_seconds:.2f} s"),
+        ('skip unchanged', f"{skipping_seconds:.2f} s"),
+    ])
+    return results
+
+
+def benchmark_timeline_memory(sizes=(10_000, 1_000_000)):
+    """
+    Compare memory use of the old list-of-dicts timeline with EmotionTimeline.
+
+    Args:
+        sizes (tuple): Numbers of readings to store
+
+    Returns:
+        dict: Bytes per reading and summary time for each size and store
+    """
+    import tracemalloc
+    from datetime import datetime
+    from APicalls.EmotionTimeline import EmotionTimeline
+
+    labels = ["Bored", "Neutral", "Happy", "Sad", "Confused"]
+    rng = np.random.default_rng(0)
+    start_timestamp = time.time()
+    results = {}
+    rows = []
+
+    for size in sizes:
+        label_ids = rng.integers(0, len(labels), size=size)
+        confidences = rng.uniform(0.5, 1.0, size=size)
+        participants = rng.integers(1, 13, size=size)
+
+        # Old layout: one dict per reading with string timestamps and emoji text
+        tracemalloc.start()
+        emotion_data = []
+        for i in range(size):
+            timestamp = start_timestamp + i * 0.25
+            emotion_data.append({
+                'timestamp': datetime.fromtimestamp(timestamp).isoformat(),
+                'emotion': f"Person {participants[i]}: 🤔 {labels[label_ids[i]]} ({confidences[i] * 100:.1f}%)",
+                'confidence': float(confidences[i]),
+                'filename': f"screenshot_{i // 12}.png",
+                'sanitized_path': None,
+                'elapsed_minutes': i * 0.25 / 60
+            })
+        dict_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        counts = {}
+        for entry in emotion_data:
+            label = entry['emotion'].split(': ', 1)[-1].split(' ')[1]
+            counts[label] = counts.get(label, 0) + 1
+        dict_summary_seconds = time.perf_counter() - start
+        del emotion_data
+
+        tracemalloc.start()
+        timeline = EmotionTimeline()
+        for i in range(size):
+            timeline.append(start_timestamp + i * 0.25, labels[label_ids[i]], float(confidences[i]),
+                            int(participants[i]), f"screenshot_{i // 12}.png")
+        timeline_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        timeline.label_counts()
+        timeline.time_buckets(60, start_timestamp)
+        timeline_summary_seconds = time.perf_counter() - start
+
+        results[size] = {
+            'dict_bytes_per_reading': dict_bytes / size,
+            'timeline_bytes_per_reading': timeline_bytes / size,
+            'dict_summary_seconds': dict_summary_seconds,
+            'timeline_summary_seconds': timeline_summary_seconds,
+        }
+        rows.append((f"{size:,} readings",
+                     f"dicts {dict_bytes / size:7.1f} B/reading, summary {dict_summary_seconds * 1000:8.1f} ms   "
+                     f"columnar {timeline_bytes / size:6.1f} B/reading, summary {timeline_summary_seconds * 1000:6.1f} ms"))
+
+    _print_report("Emotion timeline memory", rows)
+    return results
+
+
+def benchmark_concurrent_sessions(sessions=8, threads=16, readings_per_thread=500, stripes=(1, 16)):
+    """
+    Load-test the session map with many threads uploading to many meetings.
+
+    Each thread adds readings to one session token. Throughput is compared
+    between a single lock and striped locks; that no reading is lost or
+    leaks between sessions is checked by ConcurrentSessionTests.
+
+    Args:
+        sessions (int): Number of client session tokens
+        threads (int): Number of uploading threads
+        readings_per_thread (int): Readings each thread adds
+        stripes (tuple): Lock stripe counts to compare
+
+    Returns:
+        dict: Readings per second for each stripe count
+    """
+    import threading
+    from APicalls.EmotionResult import EmotionResult
+    from APicalls.MeetingTracker import MeetingTracker
+
+    labels = ["Bored", "Neutral", "Happy", "Sad", "Confused"]
+    results = {}
+    rows = []
+
+    for stripe_count in stripes:
+        tracker = MeetingTracker(stripes=stripe_count)
+        barrier = threading.Barrier(threads)
+
+        def upload(thread_index):
+            session_number = thread_index % sessions + 1
+            token = f"client-{session_number}"
+            barrier.wait()
+            for i in range(readings_per_thread):
+                result = EmotionResult(i % len(labels), labels[i % len(labels)], 0.9,
+                                       face_index=session_number)
+                tracker.add_emotion(result, token=token)
+                if i % 50 == 0:
+                    tracker.get_current_session_digest(token)
+
+        workers = [threading.Thread(target=upload, args=(i,)) for i in range(threads)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+
+        readings_per_second = threads * readings_per_thread / elapsed
+        results[stripe_count] = readings_per_second
+        rows.append((f"{stripe_count} stripe(s)", f"{readings_per_second:10,.0f} readings/s"))
+
+    rows.append(("sessions x threads", f"{sessions} x {threads}"))
+    _print_report("Concurrent session map", rows)
+    return results
+
+
+def benchmark_timeline_segments(meeting_minutes=(10, 60, 480), faces=6, token_budget=400):
+    """
+    Check that the summarized report timeline stays bounded as meetings grow.
+
+    Readings arrive every 3 seconds for each face, and the mood drifts
+    through a few phases with random noise.
+
+    Args:
+        meeting_minutes (tuple): Meeting lengths to simulate
+        faces (int): Participants per screenshot
+        token_budget (int): Token budget of the segments
+
+    Returns:
+        dict: Segment count, estimated prompt tokens, HTML timeline size and
+              summary time per meeting length
+    """
+    from APicalls.EmotionTimeline import EmotionTimeline
+    from APicalls.ReportRenderer import render_timeline_events
+    from APicalls.TimelineSegments import _estimate_tokens, summarize_timeline
+
+    labels = ["Bored", "Neutral", "Happy", "Sad", "Confused"]
+    rng = np.random.default_rng(0)
+    start_timestamp = time.time()
+    results = {}
+    rows = []
+
+    for minutes in meeting_minutes:
+        timeline = EmotionTimeline()
+        frames = int(minutes * 60 / 3)
+        for frame in range(frames):
+            # Mood phases of about ten minutes, 30% noise
+            phase_label = (frame * 3 // 600) % len(labels)
+            for face in range(1, faces + 1):
+                label = phase_label if rng.random() > 0.3 else int(rng.integers(len(labels)))
+                timeline.append(start_timestamp + frame * 3, labels[label], 0.8, face)
+
+        start = time.perf_counter()
+        segments = summarize_timeline(timeline, start_timestamp, token_budget)
+        seconds = time.perf_counter() - start
+        html_bytes = len(render_timeline_events(
+            [(segment.time_range(), segment.label, segment.description()) for segment in segments]
+        ).encode('utf-8'))
+        tokens = _estimate_tokens(segments)
+        assert tokens <= token_budget, tokens
+
+        results[minutes] = {
+            'readings': len(timeline),
+            'segments': len(segments),
+            'tokens': tokens,
+            'html_bytes': html_bytes,
+            'seconds': seconds,
+        }
+        rows.append((f"{minutes} min meeting",
+                     f"{len(timeline):7,d} readings -> {len(segments):3d} segments, "
+                     f"~{tokens:4d} tokens, timeline HTML {html_bytes / 1024:6.1f} KiB, {seconds * 1000:7.1f} ms"))
+
+    _print_report(f"Timeline segments (budget {token_budget} tokens)", rows)
+    return results
+
+
+def benchmark_llm_client(calls=40, threads=16, latency=0.2, max_concurrency=4, tokens_per_minute=60_000):
+    """
+    Exercise the shared LLM client against the local fake backend.
+
+    Checks that no more than max_concurrency calls run at once, that a
+    call past its deadline raises GeminiTimeout, and reports throughput,
+    latency and token counters.
+
+    Args:
+        calls (int): Calls to make
+        threads (int): Calling threads
+        latency (float): Fake backend latency per call
+        max_concurrency (int): Client concurrency limit
+        tokens_per_minute (int): Client token rate limit
+
+    Returns:
+        dict: Client stats plus calls per second
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from APicalls.gemini import FakeBackend, GeminiClient, GeminiTimeout
+
+    client = GeminiClient(FakeBackend(latency_seconds=latency), timeout=30,
+                          max_concurrency=max_concurrency, tokens_per_minute=tokens_per_minute)
+    prompt = "Summarize the meeting digest. " * 40
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        answers = list(pool.map(lambda _: client.generate(prompt), range(calls)))
+    elapsed = time.perf_counter() - start
+    assert all(answers)
+    stats = client.get_stats()
+    assert stats['max_in_flight'] <= max_concurrency, stats
+
+    slow_client = GeminiClient(FakeBackend(latency_seconds=1.0), timeout=0.2)
+    try:
+        slow_client.generate(prompt)
+        raise AssertionError("expected GeminiTimeout")
+    except GeminiTimeout:
+        pass
+    assert slow_client.get_stats()['errors'] == {'timeout': 1}
+
+    _print_report("LLM client (fake backend)", [
+        ("calls", f"{calls} from {threads} threads, limit {max_concurrency}"),
+        ("throughput", f"{calls / elapsed:8.1f} calls/s (ideal {max_concurrency / latency:.1f})"),
+        ("max in flight", f"{stats['max_in_flight']}"),
+        ("latency p50 / p95", f"{stats['latency_p50'] * 1000:.0f} / {stats['latency_p95'] * 1000:.0f} ms"),
+        ("tokens in / out", f"{stats['prompt_tokens']:,} / {stats['output_tokens']:,}"),
+        ("deadline", "timeout raised and counted"),
+    ])
+    return {**stats, 'calls_per_second': calls / elapsed}
+
+
+def _setup_django():
+    """Configure Django against a migrated test database, as manage.py test does."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Api.settings')
+    os.environ['MOODLINK_WARMUP'] = '0'
+
+    import django
+    from django.test.utils import setup_databases
+
+    django.setup()
+    setup_databases(verbosity=0, interactive=False)
+
+
+def benchmark_report_jobs(jobs=5, failures=2, llm_seconds=0.5):
+    """
+    Time the report job queue against a local stub in place of Gemini.
+
+    The stub sleeps like an LLM round-trip and fails the first `failures`
+    attempts of every job, so each job is retried with backoff before it
+    succeeds. Retries, resumption and final job states are checked by
+    ReportJobQueueTests.
+
+    Args:
+        jobs (int): Number of report jobs to submit
+        failures (int): Failed attempts before each job succeeds
+        llm_seconds (float): Simulated LLM latency per attempt
+
+    Returns:
+        dict: Synchronous report time, cached report time, submit latency
+              and time until all jobs finished
+    """
+    import json
+    import threading
+    from APicalls.EmotionResult import EmotionResult
+
+    work_dir = tempfile.mkdtemp(prefix="moodlink_jobs_")
+    try:
+        _setup_django()
+        from APicalls.MeetingTracker import MeetingSession
+        from APicalls.ReportCache import ReportCache
+        from APicalls.ReportJobs import ReportJobQueue, generate_report
+
+        attempts = {}
+        attempts_lock = threading.Lock()
+        stub_answer = json.dumps({
+            'analysis': ["The meeting was mostly neutral."],
+            'recommendations': ["Keep meetings short."]
+        })
+
+        def stub_generator(prompt):
+            time.sleep(llm_seconds)
+            with attempts_lock:
+                attempts[prompt] = attempts.get(prompt, 0) + 1
+                if attempts[prompt] <= failures:
+                    return None
+            return stub_answer
+
+        session = MeetingSession()
+        labels = ["Bored", "Neutral", "Happy", "Sad", "Confused"]
+        for i in range(200):
+            session.add_emotion_data(EmotionResult(i % 5, labels[i % 5], 0.8, face_index=i % 4 + 1))
+        session.end_session()
+        base_payload = session.get_report_payload()
+
+        def slow_generator(prompt):
+            time.sleep(llm_seconds)
+            return stub_answer
+
+        cache = ReportCache(os.path.join(work_dir, "reports"))
+
+        # Old behaviour: the request waits for the LLM
+        start = time.perf_counter()
+        generate_report(session.session_id, base_payload, slow_generator, cache)
+        sync_seconds = time.perf_counter() - start
+
+        # The same input again (e.g. a retried request) comes from the cache
+        start = time.perf_counter()
+        cached = generate_report(session.session_id, base_payload, slow_generator, cache)
+        cached_seconds = time.perf_counter() - start
+
+        report_queue = ReportJobQueue(workers=2, max_attempts=failures + 1, backoff_seconds=0.05,
+                                      generator=stub_generator, cache=cache)
+        start = time.perf_counter()
+        job_ids = [
+            report_queue.submit(f"{session.session_id}_{i}",
+                                dict(base_payload, prompt=f"{base_payload['prompt']}\n<!-- job {i} -->"))
+            for i in range(jobs)
+        ]
+        submit_seconds = (time.perf_counter() - start) / jobs
+
+        statuses = [report_queue.wait(job_id, timeout=60) for job_id in job_ids]
+        all_done_seconds = time.perf_counter() - start
+        succeeded = sum(1 for status in statuses if status['status'] == 'succeeded')
+
+        _print_report("Report job queue (stub LLM)", [
+            ("synchronous report", f"{sync_seconds * 1000:8.1f} ms"),
+            ("cached report", f"{cached_seconds * 1000:8.1f} ms"
+                              f"{'' if cached['from_cache'] else ' (cache missed)'}"),
+            ("end-session submit", f"{submit_seconds * 1000:8.1f} ms/job"),
+            (f"{jobs} jobs finished", f"{all_done_seconds:8.2f} s ({failures} retries each, "
+                                      f"{succeeded} succeeded)"),
+            ("analysis prompt", f"{len(base_payload['prompt']):8,d} chars"),
+        ])
+        return {
+            'sync_seconds': sync_seconds,
+            'cached_seconds': cached_seconds,
+            'submit_seconds': submit_seconds,
+            'all_done_seconds': all_done_seconds,
+            'prompt_chars': len(base_payload['prompt']),
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def benchmark_report_delivery(fetches=200):
+    """
+    Compare bytes sent and server CPU for repeated report fetches.
+
+    A report is generated into a scratch report cache and fetched through
+    serve_html_report the way the extension reopens it: the first fetch
+    and then revalidations with the ETag it got. The old behaviour (read
+    the file into a string and send it in full every time) is measured on
+    the same file.
+
+    Args:
+        fetches (int): Fetches per scenario
+
+    Returns:
+        dict: Bytes per fetch and CPU microseconds per fetch per scenario
+
+    Raises:
+        AssertionError: If a response has the wrong status or content
+    """
+    import gzip
+    from APicalls.EmotionResult import EmotionResult
+
+    work_dir = tempfile.mkdtemp(prefix="moodlink_delivery_")
+    try:
+        _setup_django()
+        from django.conf import settings
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+        settings.MOODLINK_REPORT_CACHE_DIR = os.path.join(work_dir, "reports")
+
+        from APicalls.MeetingTracker import MeetingSession
+        from APicalls.ReportCache import get_report_cache
+        from APicalls.ReportJobs import generate_report
+        from APicalls.views import serve_html_report
+
+        session = MeetingSession()
+        labels = ["Bored", "Neutral", "Happy", "Sad", "Confused"]
+        for i in range(2000):
+            session.add_emotion_data(EmotionResult(i % 5, labels[(i // 40) % 5], 0.8, face_index=i % 4 + 1))
+        session.end_session()
+        result = generate_report(session.session_id, session.get_report_payload(),
+                                 lambda prompt: None, get_report_cache())
+        filename = result['html_filename']
+        path = get_report_cache().find_by_session(session.session_id)
+        with open(path, 'rb') as f:
+            original = f.read()
+
+        factory = RequestFactory()
+
+        def legacy_view(request):
+            with open(path, 'r', encoding='utf-8') as f:
+                return HttpResponse(f.read(), content_type='text/html')
+
+        def body_of(response):
+            if response.streaming:
+                body = b''.join(response.streaming_content)
+            else:
+                body = response.content
+            response.close()
+            return body
+
+        def measure(view, headers, expected_status):
+            sent = 0
+            start = time.process_time()
+            for _ in range(fetches):
+                response = view(factory.get(f"/api/report/{filename}", **headers))
+                assert response.status_code == expected_status, response.status_code
+                sent += len(body_of(response))
+            cpu = time.process_time() - start
+            return sent / fetches, cpu / fetches * 1e6
+
+        first = serve_html_report(factory.get(f"/api/report/{filename}"), filename)
+        etag = first['ETag']
+        assert body_of(first) == original
+
+        gzipped = serve_html_report(factory.get(f"/api/report/{filename}", HTTP_ACCEPT_ENCODING="gzip, br"),
+                                    filename)
+        assert gzipped['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(body_of(gzipped)) == original
+        gzip_etag = gzipped['ETag']
+        assert gzip_etag != etag
+
+        partial = serve_html_report(factory.get(f"/api/report/{filename}", HTTP_RANGE="bytes=100-199"),
+                                    filename)
+        assert partial.status_code == 206 and body_of(partial) == original[100:200]
+
+        def view(request):
+            return serve_html_report(request, filename)
+
+        scenarios = {
+            'legacy (read + full body)': measure(legacy_view, {}, 200),
+            'streamed, identity': measure(view, {}, 200),
+            'streamed, gzip': measure(view, {'HTTP_ACCEPT_ENCODING': 'gzip'}, 200),
+            'revalidated (304)': measure(view, {'HTTP_ACCEPT_ENCODING': 'gzip',
+                                                'HTTP_IF_NONE_MATCH': gzip_etag}, 304),
+        }
+
+        _print_report(f"Report delivery ({len(original):,d} byte report, {fetches} fetches)", [
+            (name, f"{sent:10,.0f} bytes/fetch  {cpu:8.1f} us CPU/fetch")
+            for name, (sent, cpu) in scenarios.items()
+        ])
+        return {
+            name: {'bytes_per_fetch': sent, 'cpu_us_per_fetch': cpu}
+            for name, (sent, cpu) in scenarios.items()
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def benchmark_upload_load(clients=40, duration=30.0, interval=3.0, fixtures=None):
+    """
+    Load-test the upload endpoints through the ASGI application.
+
+    Simulated extension clients, each with its own session token, upload a
+    screenshot every `interval` seconds (open loop, staggered starts) via
+    Django's AsyncClient, stretching the interval when the server suggests
+    a longer one as the extension does. The sync view (run by Django's sync-to-async
+    thread under ASGI) and the async view backed by the upload pool are
+    measured in turn. A ticker task records how late the event loop runs
+    it, which stays near zero if nothing blocks the loop.
+
+    Args:
+        clients (int): Concurrent simulated clients
+        duration (float): Seconds each endpoint is loaded
+        interval (float): Seconds between a client's uploads
+        fixtures (str): Directory of meeting screenshots (synthetic frames if None)
+
+    Returns:
+        dict: Per endpoint: uploads, dropped frames (429), errors,
+              p50/p95/p99 latency and the worst event-loop lag in seconds
+    """
+    import asyncio
+    import random
+
+    work_dir = tempfile.mkdtemp(prefix="moodlink_load_")
+    try:
+        _setup_django()
+        from django.conf import settings
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from django.test import AsyncClient
+        settings.ALLOWED_HOSTS = ['testserver']
+
+        from APicalls.MeetingTracker import meeting_tracker
+        from APicalls.ModelRegistry import warm_up_emotion_model
+        from APicalls.UploadPipeline import get_upload_pool
+
+        warm_up_emotion_model()
+        if fixtures:
+            screenshots = []
+            for path in _load_fixture_paths(fixtures):
+                with open(path, 'rb') as f:
+                    screenshots.append(f.read())
+        else:
+            screenshots = _synthetic_screenshots(count=3, size=(720, 1280))
+
+        async def run(url):
+            client = AsyncClient()
+            latencies = []
+            errors = 0
+            dropped = 0
+            max_lag = 0.0
+            stop_at = time.perf_counter() + duration
+
+            async def ticker():
+                nonlocal max_lag
+                while time.perf_counter() < stop_at:
+                    expected = time.perf_counter() + 0.05
+                    await asyncio.sleep(0.05)
+                    max_lag = max(max_lag, time.perf_counter() - expected)
+
+            async def extension_client(index):
+                nonlocal errors, dropped
+                token = f"load-{index}"
+                rng = random.Random(index)
+                next_upload = time.perf_counter() + rng.uniform(0, interval)
+                frame = 0
+                while True:
+                    await asyncio.sleep(max(0.0, next_upload - time.perf_counter()))
+                    if time.perf_counter() >= stop_at:
+                        break
+                    upload = SimpleUploadedFile("screenshot.png", screenshots[frame % len(screenshots)],
+                                                content_type="image/png")
+                    start = time.perf_counter()
+                    response = await client.post(url, {'screenshot': upload},
+                                                 headers={'X-MoodLink-Session': token})
+                    latencies.append(time.perf_counter() - start)
+                    client_interval = interval
+                    if response.status_code == 429:
+                        dropped += 1
+                    elif response.status_code != 200:
+                        errors += 1
+                    suggested_ms = response.json().get('suggested_interval_ms')
+                    if suggested_ms:
+                        client_interval = max(interval, suggested_ms / 1000)
+                    frame += 1
+                    next_upload += client_interval
+                meeting_tracker.discard_session(token)
+
+            await asyncio.gather(ticker(), *(extension_client(i) for i in range(clients)))
+            return latencies, dropped, errors, max_lag
+
+        results = {}
+        for name, url in (('sync view', '/api/'), ('async view', '/api/upload-async/')):
+            latencies, dropped, errors, max_lag = asyncio.run(run(url))
+            results[name] = {
+                'uploads': len(latencies),
+                'dropped': dropped,
+                'errors': errors,
+                'p50_seconds': _percentile(latencies, 50),
+                'p95_seconds': _percentile(latencies, 95),
+                'p99_seconds': _percentile(latencies, 99),
+                'max_loop_lag_seconds': max_lag,
+            }
+
+        pool_stats = get_upload_pool().get_stats()
+        rows = []
+        for name, result in results.items():
+            rows.append((name, f"{result['uploads']} uploads, {result['dropped']} dropped (429), "
+                               f"{result['errors']} errors"))
+            rows.append(("  p50 / p95 / p99",
+                         f"{result['p50_seconds'] * 1000:.0f} / {result['p95_seconds'] * 1000:.0f} / "
+                         f"{result['p99_seconds'] * 1000:.0f} ms"))
+            rows.append(("  worst event-loop lag", f"{result['max_loop_lag_seconds'] * 1000:.0f} ms"))
+        rows.append(("upload pool", f"{pool_stats['workers']} workers, "
+                                    f"max queue depth {pool_stats['max_queue_depth']}"))
+        _print_report(f"Upload load test ({clients} clients, 1 upload / {interval:g} s, {duration:g} s)", rows)
+        return {**results, 'pool': pool_stats}
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def benchmark_inference_batching(sessions=64, duration=10.0, interval=0.5, max_wait_ms=(0, 2, 5, 10),
+                                 max_batch_size=32):
+    """
+    Measure cross-request micro-batching of classifier passes.
+
+    Each simulated session is a thread that sends 1-4 preprocessed faces
+    to the classifier every `interval` seconds (open loop), as concurrent
+    uploads do. The same load runs with each max wait; 0 is one forward
+    pass per request.
+
+    Args:
+        sessions (int): Concurrent simulated sessions
+        duration (float): Seconds each configuration is loaded
+        interval (float): Seconds between a session's requests
+        max_wait_ms (tuple): Batcher max waits to compare
+        max_batch_size (int): Batcher max batch size
+
+    Returns:
+        dict: Per max wait: faces per second, p50/p95/p99 request latency
+              and the batcher histograms
+    """
+    import random
+    import threading
+    from APicalls.InferenceBatcher import InferenceBatcher
+    from APicalls.ModelRegistry import MODEL_INPUT_SIZE, warm_up_emotion_model
+
+    emotion_model = warm_up_emotion_model()
+    emotion_model.warm_up(batch_size=max_batch_size)
+    rng = np.random.default_rng(0)
+    faces = rng.random((4, MODEL_INPUT_SIZE, MODEL_INPUT_SIZE, 3), dtype=np.float32)
+    expected = emotion_model.predict(faces)
+
+    results = {}
+    rows = []
+    for wait_ms in max_wait_ms:
+        batcher = InferenceBatcher(lambda: emotion_model, max_batch_size=max_batch_size,
+                                   max_wait_ms=wait_ms)
+        latencies = []
+        latencies_lock = threading.Lock()
+        classified = [0]
+        stop_at = time.perf_counter() + duration
+
+        def session(index):
+            session_rng = random.Random(index)
+            next_request = time.perf_counter() + session_rng.uniform(0, interval)
+            while True:
+                time.sleep(max(0.0, next_request - time.perf_counter()))
+                if time.perf_counter() >= stop_at:
+                    return
+                count = session_rng.randint(1, 4)
+                start = time.perf_counter()
+                predictions = batcher.predict(faces[:count])
+                elapsed = time.perf_counter() - start
+                assert np.allclose(predictions, expected[:count], atol=1e-4), "rows routed to wrong request"
+                with latencies_lock:
+                    latencies.append(elapsed)
+                    classified[0] += count
+                next_request = max(next_request + interval, time.perf_counter())
+
+        threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = batcher.get_stats()
+        results[wait_ms] = {
+            'faces_per_second': classified[0] / duration,
+            'p50_seconds': _percentile(latencies, 50),
+            'p95_seconds': _percentile(latencies, 95),
+            'p99_seconds': _percentile(latencies, 99),
+            **stats,
+        }
+        label = "no batching" if wait_ms <= 0 else f"max wait {wait_ms:g} ms"
+        rows.append((label, f"{results[wait_ms]['faces_per_second']:7.1f} faces/s  "
+                            f"p50/p95/p99 {results[wait_ms]['p50_seconds'] * 1000:.0f}/"
+                            f"{results[wait_ms]['p95_seconds'] * 1000:.0f}/"
+                            f"{results[wait_ms]['p99_seconds'] * 1000:.0f} ms"))
+        if wait_ms > 0:
+            sizes = {bucket: count for bucket, count in stats['batch_size']['buckets'].items() if count}
+            delays = {bucket: count for bucket, count in stats['queue_delay_ms']['buckets'].items() if count}
+            rows.append(("  faces per pass", f"mean {stats['batch_size']['mean']:.1f}  {sizes}"))
+            rows.append(("  queue delay (ms)", f"mean {stats['queue_delay_ms']['mean']:.1f}  {delays}"))
+
+    _print_report(f"Inference batching ({sessions} sessions, 1 request / {interval:g} s)", rows)
+    return results
+
+
+def benchmark_upload_formats(fixtures=None, repeats=3,
+                             settings_list=(('png', 0, None), ('jpeg', 1920, 80), ('jpeg', 1280, 80),
+                                            ('jpeg', 1280, 60), ('jpeg', 960, 80), ('webp', 1280, 80),
+                                            ('webp', 1280, 60))):
+    """
+    Compare upload encodings: bytes per frame and end-to-end latency.
+
+    Each screenshot is downscaled and encoded the way the extension does
+    it on its OffscreenCanvas (here with OpenCV, whose encode time stands
+    in for the browser's) and posted to the upload view through Django's
+    test client, so the server side includes multipart parsing, decoding,
+    detection and inference. Face counts are compared with the
+    full-resolution PNG.
+
+    Args:
+        fixtures (str): Directory of meeting screenshots (smooth synthetic frames if None)
+        repeats (int): Uploads per screenshot and setting
+        settings_list (tuple): (format, max side or 0, quality or None) per setting
+
+    Returns:
+        dict: Per setting: mean bytes per frame, encode and server
+              milliseconds, and frames whose face count differs from PNG
+    """
+    import cv2
+
+    work_dir = tempfile.mkdtemp(prefix="moodlink_formats_")
+    try:
+        _setup_django()
+        from django.conf import settings
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from django.test import Client
+        settings.ALLOWED_HOSTS = ['testserver']
+        # Every frame gets the full detection and inference work
+        settings.MOODLINK_FULL_SCAN_INTERVAL = 1
+        settings.MOODLINK_CHANGE_THRESHOLD = 0
+
+        from APicalls.MeetingTracker import meeting_tracker
+        from APicalls.ModelRegistry import warm_up_emotion_model
+
+        warm_up_emotion_model()
+        if fixtures:
+            screenshots = []
+            for path in _load_fixture_paths(fixtures):
+                with open(path, 'rb') as f:
+                    screenshots.append(f.read())
+        else:
+            screenshots = _synthetic_screenshots(smooth=True)
+        originals = [cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+                     for data in screenshots]
+
+        def encode(image, image_format, max_side, quality):
+            if max_side and max(image.shape[:2]) > max_side:
+                scale = max_side / max(image.shape[:2])
+                image = cv2.resize(image, (round(image.shape[1] * scale), round(image.shape[0] * scale)),
+                                   interpolation=cv2.INTER_AREA)
+            params = []
+            if image_format == 'jpeg':
+                params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+            elif image_format == 'webp':
+                params = [cv2.IMWRITE_WEBP_QUALITY, quality]
+            return cv2.imencode(f'.{image_format}', image, params)[1].tobytes()
+
+        client = Client()
+        results = {}
+        baseline_faces = None
+        for image_format, max_side, quality in settings_list:
+            name = f"{image_format} {max_side or 'full'}" + (f" q{quality}" if quality else "")
+            token = f"formats-{image_format}-{max_side}-{quality}"
+            sizes, encode_times, server_times, faces = [], [], [], []
+            for i, (data, image) in enumerate(zip(screenshots, originals)):
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    if image_format == 'png' and not max_side:
+                        encoded = data  # Original capture
+                    else:
+                        encoded = encode(image, image_format, max_side, quality)
+                    encode_times.append(time.perf_counter() - start)
+                    sizes.append(len(encoded))
+
+                    upload = SimpleUploadedFile(f"screenshot.{image_format}", encoded,
+                                                content_type=f"image/{image_format}")
+                    start = time.perf_counter()
+                    response = client.post('/api/', {'screenshot': upload}, HTTP_X_MOODLINK_SESSION=token)
+                    server_times.append(time.perf_counter() - start)
+                    assert response.status_code == 200, response.content[:200]
+                faces.append(response.json()['face_count'])
+            meeting_tracker.discard_session(token)
+
+            if baseline_faces is None:
+                baseline_faces = faces
+            results[name] = {
+                'bytes_per_frame': statistics.mean(sizes),
+                'encode_ms': statistics.mean(encode_times) * 1000,
+                'server_ms': statistics.mean(server_times) * 1000,
+                'end_to_end_ms': (statistics.mean(encode_times) + statistics.mean(server_times)) * 1000,
+                'face_count_mismatches': sum(a != b for a, b in zip(faces, baseline_faces)),
+            }
+
+        _print_report(f"Upload formats ({len(screenshots)} screenshots x {repeats})", [
+            (name, f"{result['bytes_per_frame'] / 1024:8.0f} KB/frame  encode {result['encode_ms']:6.1f} ms  "
+                   f"server {result['server_ms']:6.1f} ms  total {result['end_to_end_ms']:6.1f} ms  "
+                   f"face-count diffs {result['face_count_mismatches']}")
+            for name, result in results.items()
+        ])
+        return results
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+BENCHMARKS = {
+    'model-startup': benchmark_model_startup,
+    'batched-inference': benchmark_batched_inference,
+    'in-memory-pipeline': benchmark_in_memory_pipeline,
+    'cascade-pool': benchmark_cascade_pool,
+    'detection-pyramid': benchmark_detection_pyramid,
+    'frame-diff': benchmark_frame_diff,
+    'timeline-memory': benchmark_timeline_memory,
+    'concurrent-sessions': benchmark_concurrent_sessions,
+    'report-jobs': benchmark_report_jobs,
+    'timeline-segments': benchmark_timeline_segments,
+    'llm-client': benchmark_llm_client,
+    'report-delivery': benchmark_report_delivery,
+    'upload-load': benchmark_upload_load,
+    'inference-batching': benchmark_inference_batching,
+    'upload-formats': benchmark_upload_formats,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MoodLink backend benchmarks")
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--fixtures', help="Directory of meeting screenshots")
+    args = parser.parse_args(argv)
+
+    # Only pass the options a benchmark actually accepts
+    benchmark = BENCHMARKS[args.benchmark]
+    accepted = inspect.signature(benchmark).parameters
+    options = {
+        name: value for name, value in vars(args).items()
+        if name in accepted and value is not None
+    }
+    benchmark(**options)
+
+
+if __name__ == "__main__":
+    main()
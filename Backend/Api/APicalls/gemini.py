@@ -1,21 +1,327 @@
-import google.generativeai as genai
-from dotenv import load_dotenv
+"""
+gemini.py - Shared LLM Client
+
+One long-lived GeminiClient serves every LLM call in the process:
+
+- the backend (and its model object and HTTP connections) is created once
+- every call has a deadline
+- a semaphore limits concurrent calls, and a token bucket limits tokens
+  per minute
+- latency, token and error counters are exposed through get_stats()
+
+Backends are pluggable: GoogleGenAIBackend talks to Gemini, FakeBackend
+answers locally with a configurable latency for tests and offline use.
+"""
+
+import json
 import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from dotenv import load_dotenv
 
 load_dotenv()
 
-genai.configure(api_key = os.getenv("API_KEY"))
 
-def gemini(prompt):
-    try:
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        response = model.generate_content(f" {prompt}")
+class GeminiError(Exception):
+    """An LLM call failed."""
 
-        # Remove any "Assistant:" prefix from the response
-        answer = response.text.strip()
-        return answer
 
-    except Exception as e:
-        return None
+class GeminiTimeout(GeminiError):
+    """An LLM call did not finish before its deadline."""
+
+
+class GeminiRateLimited(GeminiError):
+    """The concurrency or token limit could not be met before the deadline."""
+
+
+def estimate_tokens(text):
+    """Rough token count of a text (about 4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+class GoogleGenAIBackend:
+    """
+    Gemini through google.generativeai, with the model created once.
+    """
+
+    def __init__(self, model_name="gemini-2.5-flash", api_key=None):
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key or os.getenv("GEMINI_API_KEY") or os.getenv("API_KEY"))
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name)
+
+    def generate(self, prompt, timeout):
+        """
+        Run one generation.
+
+        Returns:
+            tuple: (text, prompt_tokens, output_tokens); token counts are None
+                   if the response does not report them
+        """
+        response = self.model.generate_content(f" {prompt}", request_options={'timeout': timeout})
+        usage = getattr(response, 'usage_metadata', None)
+        return (
+            response.text.strip(),
+            getattr(usage, 'prompt_token_count', None),
+            getattr(usage, 'candidates_token_count', None)
+        )
+
+
+class FakeBackend:
+    """
+    Local stand-in for Gemini.
+
+    Attributes:
+        latency_seconds (float): Time each call takes
+        response (str or callable): Answer text, or a function of the prompt;
+                                    defaults to a fixed analysis JSON object
+    """
+
+    DEFAULT_RESPONSE = json.dumps({
+        'analysis': ["Emotion analysis was generated by the offline backend."],
+        'recommendations': ["Connect an LLM backend for detailed recommendations."]
+    })
+
+    def __init__(self, latency_seconds=0.5, response=None):
+        self.latency_seconds = latency_seconds
+        self.response = response if response is not None else self.DEFAULT_RESPONSE
+
+    def generate(self, prompt, timeout):
+        time.sleep(self.latency_seconds)
+        text = self.response(prompt) if callable(self.response) else self.response
+        return text, estimate_tokens(prompt), estimate_tokens(text or "")
+
+
+class TokenRateLimiter:
+    """
+    Token bucket limiting LLM tokens per minute across threads.
+
+    A call reserves its estimated tokens up front; the difference to the
+    actual usage is settled afterwards (the balance may go negative).
+    """
+
+    def __init__(self, tokens_per_minute):
+        self.capacity = float(tokens_per_minute)
+        self.rate = self.capacity / 60.0
+        self.available = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens, deadline):
+        """
+        Reserve tokens, waiting for the bucket to refill if needed.
 
+        Args:
+            tokens (int): Tokens to reserve (capped at the bucket size)
+            deadline (float): time.monotonic() value to give up at
 
+        Raises:
+            GeminiRateLimited: If the tokens are not available before the deadline
+        """
+        tokens = min(tokens, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self.available >= tokens:
+                    self.available -= tokens
+                    return
+                wait = (tokens - self.available) / self.rate
+            if time.monotonic() + wait > deadline:
+                raise GeminiRateLimited("Token rate limit reached")
+            time.sleep(min(wait, 1.0))
+
+    def settle(self, reserved, used):
+        """Charge the difference between actual and reserved tokens."""
+        with self._lock:
+            self._refill()
+            self.available -= used - min(reserved, self.capacity)
+
+
+class GeminiClient:
+    """
+    Long-lived, rate-limited LLM client.
+
+    Attributes:
+        backend: Object with generate(prompt, timeout) -> (text, prompt_tokens, output_tokens)
+        timeout (float): Default deadline per call in seconds, including
+                         time spent waiting for a slot
+        max_concurrency (int): Calls allowed in flight at once
+        tokens_per_minute (int): Token budget per minute (0 for no limit)
+    """
+
+    def __init__(self, backend, timeout=60.0, max_concurrency=4, tokens_per_minute=0):
+        self.backend = backend
+        self.timeout = timeout
+        self.max_concurrency = max(1, max_concurrency)
+        self.limiter = TokenRateLimiter(tokens_per_minute) if tokens_per_minute else None
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        # Calls run here so the caller can stop waiting at the deadline
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                            thread_name_prefix="llm-call")
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.successes = 0
+        self.errors = {}
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._latencies = deque(maxlen=1000)
+
+    def _count_error(self, kind):
+        with self._lock:
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def generate(self, prompt, timeout=None):
+        """
+        Generate text for a prompt.
+
+        Args:
+            prompt (str): Prompt text
+            timeout (float): Deadline in seconds (defaults to self.timeout)
+
+        Returns:
+            str: Generated text
+
+        Raises:
+            GeminiTimeout: If the call did not finish in time
+            GeminiRateLimited: If no slot or tokens were available in time
+            GeminiError: If the backend failed
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            self.calls += 1
+
+        if not self._slots.acquire(timeout=timeout):
+            self._count_error('rate_limited')
+            raise GeminiRateLimited("No LLM slot available before the deadline")
+
+        # The slot is released when the backend call really ends, even if
+        # the caller stops waiting earlier, so the limit is never exceeded
+        submitted = False
+        try:
+            reserved = estimate_tokens(prompt)
+            if self.limiter:
+                self.limiter.acquire(reserved, deadline)
+
+            start = time.monotonic()
+            remaining = max(0.0, deadline - start)
+            with self._lock:
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            future = self._executor.submit(self.backend.generate, prompt, remaining)
+            future.add_done_callback(self._call_finished)
+            submitted = True
+        except GeminiRateLimited:
+            self._count_error('rate_limited')
+            raise
+        finally:
+            if not submitted:
+                self._slots.release()
+
+        try:
+            text, prompt_tokens, output_tokens = future.result(timeout=remaining)
+        except FutureTimeoutError:
+            self._count_error('timeout')
+            raise GeminiTimeout(f"LLM call exceeded {timeout:.1f}s")
+        except Exception as e:
+            self._count_error(type(e).__name__)
+            raise GeminiError(f"LLM call failed: {str(e)}") from e
+
+        prompt_tokens = prompt_tokens if prompt_tokens is not None else reserved
+        output_tokens = output_tokens if output_tokens is not None else estimate_tokens(text or "")
+        if self.limiter:
+            self.limiter.settle(reserved, prompt_tokens + output_tokens)
+        with self._lock:
+            self.successes += 1
+            self.prompt_tokens += prompt_tokens
+            self.output_tokens += output_tokens
+            self._latencies.append(time.monotonic() - start)
+        return text
+
+    def _call_finished(self, future):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def get_stats(self):
+        """
+        Get call counters.
+
+        Returns:
+            dict: Calls, successes, errors by kind, token totals, calls in
+                  flight and latency percentiles of recent successful calls
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            def percentile(p):
+                if not latencies:
+                    return 0.0
+                return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))]
+            return {
+                'calls': self.calls,
+                'successes': self.successes,
+                'errors': dict(self.errors),
+                'prompt_tokens': self.prompt_tokens,
+                'output_tokens': self.output_tokens,
+                'in_flight': self.in_flight,
+                'max_in_flight': self.max_in_flight,
+                'latency_p50': percentile(50),
+                'latency_p95': percentile(95)
+            }
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def create_backend(name, fake_latency=0.5):
+    """Create the LLM backend named by MOODLINK_LLM_BACKEND ('gemini' or 'fake')."""
+    if name == 'fake':
+        return FakeBackend(latency_seconds=fake_latency)
+    return GoogleGenAIBackend()
+
+
+def get_gemini_client():
+    """
+    Get the process-wide LLM client, creating it on first use.
+
+    Returns:
+        GeminiClient: Client configured from the Django settings
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from django.conf import settings
+                _client = GeminiClient(
+                    create_backend(settings.MOODLINK_LLM_BACKEND, settings.MOODLINK_FAKE_LLM_LATENCY),
+                    timeout=settings.MOODLINK_LLM_TIMEOUT,
+                    max_concurrency=settings.MOODLINK_LLM_MAX_CONCURRENCY,
+                    tokens_per_minute=settings.MOODLINK_LLM_TOKENS_PER_MINUTE
+                )
+    return _client
+
+
+def gemini(prompt):
+    """
+    Generate text with the shared client.
+
+    Returns:
+        str: Generated text, or None if the call failed
+    """
+    try:
+        return get_gemini_client().generate(prompt)
+    except Exception as e:
+        print(f"Gemini call failed: {str(e)}")
+        return None
@@ -1,6 +1,6 @@
 """
 HTML Template for Meeting Reports
-Contains the fixed HTML structure that Gemini should use for all reports.
+Contains the fixed HTML structure of all reports, filled in by ReportRenderer.
 """
 
 HTML_TEMPLATE = '''<!DOCTYPE html>
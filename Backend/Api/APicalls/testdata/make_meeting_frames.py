@@ -0,0 +1,97 @@
+"""
+make_meeting_frames.py - Generate the Synthetic Meeting Test Fixture
+
+Builds testdata/meeting/: consecutive 960x540 synthetic screenshots of a
+2x2 video-call gallery, plus a <frame>.json sidecar per screenshot listing
+the true [x, y, w, h] face boxes (the format benchmarks.py reads).
+
+Nothing here is recorded from a real call. The participants are variants
+(mirrored, re-lit, scaled) of one portrait: the public-domain NASA
+astronaut photo shipped as skimage.data.astronaut(). Between frames each
+tile gets a small shift and fresh noise, imitating a call; participant 3
+is rotated slightly halfway through.
+
+Run from the Backend/Api directory:
+
+    python APicalls/testdata/make_meeting_frames.py path/to/astronaut.png
+"""
+
+import json
+import os
+import sys
+
+import cv2
+import numpy as np
+
+OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "meeting")
+
+FRAME_SIZE = (540, 960)  # height, width
+TILE_SIZE = (270, 480)
+FRAME_COUNT = 8
+
+# Face box of the portrait in the source image, and the region cut around it
+SOURCE_FACE = (177, 66, 95, 95)
+SOURCE_CROP = (117, 6, 215, 215)
+
+
+def _participants(portrait):
+    """Four participant images and their face boxes within them."""
+    x, y, w, h = SOURCE_CROP
+    crop = portrait[y:y + h, x:x + w]
+    fx, fy, fw, fh = SOURCE_FACE
+    face = (fx - x, fy - y, fw, fh)
+
+    mirrored = cv2.flip(crop, 1)
+    mirrored_face = (w - face[0] - face[2], face[1], face[2], face[3])
+    relit = cv2.convertScaleAbs(crop, alpha=0.85, beta=25)
+    small = cv2.resize(crop, (int(w * 0.8), int(h * 0.8)), interpolation=cv2.INTER_AREA)
+    small_face = tuple(int(round(v * 0.8)) for v in face)
+    return [(crop, face), (mirrored, mirrored_face), (relit, face), (small, small_face)]
+
+
+def _turned(image, angle):
+    """The participant with their head turned slightly (small rotation)."""
+    h, w = image.shape[:2]
+    matrix = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+    return cv2.warpAffine(image, matrix, (w, h), borderMode=cv2.BORDER_REPLICATE)
+
+
+def make_frames(portrait, output_dir=OUTPUT_DIR, frame_count=FRAME_COUNT):
+    """
+    Write the fixture frames and their ground-truth sidecars.
+
+    Args:
+        portrait (np.ndarray): BGR source portrait (skimage.data.astronaut())
+        output_dir (str): Directory to write to
+        frame_count (int): Number of consecutive frames
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    rng = np.random.default_rng(0)
+    participants = _participants(portrait)
+    tile_h, tile_w = TILE_SIZE
+
+    for frame_index in range(frame_count):
+        frame = np.full((*FRAME_SIZE, 3), 32, dtype=np.uint8)
+        boxes = []
+        for participant, (image, face) in enumerate(participants):
+            if participant == 2 and frame_index >= frame_count // 2:
+                image = _turned(image, 6)
+            row, col = divmod(participant, 2)
+            h, w = image.shape[:2]
+            dx, dy = rng.integers(-2, 3, size=2)
+            left = col * tile_w + (tile_w - w) // 2 + int(dx)
+            top = row * tile_h + (tile_h - h) // 2 + int(dy)
+            frame[top:top + h, left:left + w] = image
+            boxes.append([left + face[0], top + face[1], face[2], face[3]])
+
+        noise = rng.normal(0, 2.0, frame.shape)
+        frame = np.clip(frame + noise, 0, 255).astype(np.uint8)
+
+        name = f"frame_{frame_index:02d}"
+        cv2.imwrite(os.path.join(output_dir, f"{name}.jpg"), frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        with open(os.path.join(output_dir, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump(boxes, f)
+
+
+if __name__ == "__main__":
+    make_frames(cv2.imread(sys.argv[1]))
@@ -0,0 +1,386 @@
+"""
+tests.py - APicalls Test Suite
+
+Run from the Backend/Api directory:
+
+    python manage.py test APicalls
+
+The tests use the synthetic meeting in testdata/meeting (a 2x2 call gallery
+built from one portrait, see make_meeting_frames.py) and a deterministic
+stand-in for the emotion model, so they need OpenCV and NumPy but not
+TensorFlow.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+import cv2
+import numpy as np
+from django.test import SimpleTestCase, TransactionTestCase
+from django.utils import timezone
+
+from APicalls.EmotionResult import EmotionResult
+from APicalls.FaceTracker import FaceTracker, face_thumbnail, label_distribution_distance
+from APicalls.MeetingTracker import MeetingSession, MeetingTracker
+from APicalls.models import ReportJob
+from APicalls.ReportCache import ReportCache
+from APicalls.ReportJobs import ReportJobQueue
+from APicalls.ScreenshotIds import screenshot_ids
+
+MEETING_FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "testdata", "meeting")
+
+STAND_IN_LABELS = ["angry", "happy", "neutral", "sad"]
+
+
+def load_meeting_frames():
+    """Frames of the synthetic meeting fixture, in order."""
+    names = sorted(name for name in os.listdir(MEETING_FIXTURE_DIR) if name.endswith('.jpg'))
+    return [cv2.imread(os.path.join(MEETING_FIXTURE_DIR, name)) for name in names]
+
+
+class PrototypeClassifier:
+    """
+    Deterministic stand-in for the emotion model.
+
+    Every face of the first frame is a prototype with a label of its own;
+    a face gets the label of the prototype whose thumbnail is closest to
+    its own. It depends only on the frames given, not on tuned thresholds.
+    """
+
+    def __init__(self, first_frame):
+        detection, _ = FaceTracker().track(first_frame, max_side=1280)
+        self.prototypes = [face_thumbnail(crop) for crop in detection.crops]
+
+    def __call__(self, face_crop, face_index):
+        thumbnail = face_thumbnail(face_crop)
+        distances = [np.mean(np.abs(thumbnail - prototype)) for prototype in self.prototypes]
+        label_index = int(np.argmin(distances)) % len(STAND_IN_LABELS)
+        return EmotionResult(label_index, STAND_IN_LABELS[label_index], 0.9, face_index=face_index)
+
+
+def replay_meeting(frames, classify, change_threshold):
+    """
+    Replay a meeting through a FaceTracker the way the upload view does.
+
+    Returns:
+        tuple: (labels, tracker) with one label per face per frame
+    """
+    face_tracker = FaceTracker(change_threshold=change_threshold)
+    labels = []
+    for frame in frames:
+        detection, track_ids = face_tracker.track(frame, max_side=1280)
+        results, thumbnails = face_tracker.reuse_unchanged(detection.crops, track_ids)
+        changed = [i for i, result in enumerate(results) if result is None]
+        for i in changed:
+            results[i] = classify(detection.crops[i], track_ids[i])
+        face_tracker.remember_emotions(
+            [track_ids[i] for i in changed],
+            [results[i] for i in changed],
+            [thumbnails[i] for i in changed]
+        )
+        labels.extend(result.label for result in results)
+    return labels, face_tracker
+
+
+class FrameDiffEquivalenceTests(SimpleTestCase):
+    """Reusing emotions of unchanged faces keeps the emotion stream equivalent."""
+
+    MAX_DISTANCE = 0.05
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.frames = load_meeting_frames()
+        cls.classify = PrototypeClassifier(cls.frames[0])
+
+    def test_fixture_frames_load(self):
+        self.assertGreaterEqual(len(self.frames), 8)
+        for frame in self.frames:
+            self.assertIsNotNone(frame)
+
+    def test_reuse_keeps_label_distribution(self):
+        reference, _ = replay_meeting(self.frames, self.classify, change_threshold=0)
+        skipping, face_tracker = replay_meeting(self.frames, self.classify, change_threshold=4.0)
+
+        self.assertEqual(len(reference), len(skipping))
+        self.assertEqual(len(reference), 4 * len(self.frames))
+        # A single-label stream would make any two streams look equivalent
+        self.assertGreaterEqual(len(set(reference)), 3)
+        # The fixture must actually exercise reuse, or the comparison is empty
+        self.assertGreater(face_tracker.reused_faces, 0)
+        self.assertLessEqual(label_distribution_distance(reference, skipping), self.MAX_DISTANCE)
+
+    def test_changed_face_is_reclassified(self):
+        _, face_tracker = replay_meeting(self.frames, self.classify, change_threshold=4.0)
+        # Faces that changed after the first frame went to the classifier again
+        self.assertGreater(face_tracker.classified_faces, len(self.classify.prototypes))
+
+
+class ConcurrentSessionTests(SimpleTestCase):
+    """Concurrent uploads to many sessions neither lose nor mix readings."""
+
+    SESSIONS = 8
+    THREADS = 16
+    READINGS_PER_THREAD = 300
+
+    def upload_concurrently(self, tracker):
+        barrier = threading.Barrier(self.THREADS)
+        errors = []
+
+        def upload(thread_index):
+            session_number = thread_index % self.SESSIONS + 1
+            token = f"client-{session_number}"
+            barrier.wait()
+            try:
+                for i in range(self.READINGS_PER_THREAD):
+                    label_index = i % len(STAND_IN_LABELS)
+                    result = EmotionResult(label_index, STAND_IN_LABELS[label_index], 0.9,
+                                           face_index=session_number)
+                    tracker.add_emotion(result, token=token)
+                    if i % 50 == 0:
+                        tracker.get_current_session_digest(token)
+            except Exception as e:
+                errors.append(e)
+
+        workers = [threading.Thread(target=upload, args=(i,)) for i in range(self.THREADS)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return errors
+
+    def test_sessions_keep_exactly_their_own_readings(self):
+        for stripes in (1, 16):
+            with self.subTest(stripes=stripes):
+                tracker = MeetingTracker(stripes=stripes)
+                self.assertEqual(self.upload_concurrently(tracker), [])
+                self.assertEqual(tracker.session_count(), self.SESSIONS)
+
+                threads_per_session = self.THREADS // self.SESSIONS
+                session_ids = set()
+                for session_number in range(1, self.SESSIONS + 1):
+                    token = f"client-{session_number}"
+                    session = tracker._get_session(token)
+                    # No lost readings, and totals agree with the timeline
+                    self.assertEqual(len(session.emotion_data),
+                                     threads_per_session * self.READINGS_PER_THREAD)
+                    self.assertEqual(session.stats.total, len(session.emotion_data))
+                    self.assertEqual(
+                        tracker.get_current_session_digest(token)['emotion_count'],
+                        len(session.emotion_data)
+                    )
+                    # Isolated by token: only this session's participant
+                    self.assertEqual(set(session.emotion_data.participants.tolist()), {session_number})
+                    session_ids.add(session.session_id)
+                    tracker.discard_session(token)
+
+                self.assertEqual(len(session_ids), self.SESSIONS)
+                self.assertEqual(tracker.session_count(), 0)
+
+    def test_ended_session_takes_no_readings(self):
+        session = MeetingSession()
+        session.add_emotion_data(EmotionResult(1, "happy", 0.9, face_index=1))
+        session.end_session()
+        session.cleanup_files()
+        session.add_emotion_data(EmotionResult(1, "happy", 0.9, face_index=1))
+        self.assertEqual(len(session.emotion_data), 0)
+        self.assertEqual(session.stats.total, 0)
+
+    def test_idle_sessions_are_evicted_off_the_request_thread(self):
+        tracker = MeetingTracker(idle_ttl_seconds=0, sweep_interval_seconds=0.01)
+        finished_on = []
+        with mock.patch.object(
+            tracker, '_finish_session',
+            side_effect=lambda session, **kwargs: finished_on.append(threading.current_thread())
+        ):
+            tracker.add_emotion(EmotionResult(1, "happy", 0.9, face_index=1), token="idle-client")
+            deadline = time.monotonic() + 5
+            while not finished_on and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        self.assertEqual(tracker.session_count(), 0)
+        self.assertEqual(len(finished_on), 1)
+        self.assertIsNot(finished_on[0], threading.current_thread())
+
+
+class ReportDigestTests(SimpleTestCase):
+    """The report digest and ending a session cope with any mix of readings."""
+
+    def record(self, session, readings):
+        for label, participant in readings:
+            session.add_emotion_data(EmotionResult(0, label, 0.9, face_index=participant))
+
+    def test_participants_with_uneven_label_sets(self):
+        session = MeetingSession()
+        # The highest participant id has seen only one of the three labels
+        self.record(session, [("happy", 1), ("sad", 1), ("neutral", 1), ("sad", 2), ("happy", 3)])
+        digest = session.get_report_payload()['digest']
+        self.assertEqual(digest['dominant_by_participant'],
+                         {'person_1': 'happy', 'person_2': 'sad', 'person_3': 'happy'})
+        self.assertEqual(digest['total_readings'], 5)
+
+    def test_empty_timeline(self):
+        digest = MeetingSession().get_report_payload()['digest']
+        self.assertEqual(digest['total_readings'], 0)
+        self.assertEqual(digest['dominant_by_participant'], {})
+
+    def test_failed_end_keeps_the_session(self):
+        tracker = MeetingTracker()
+        tracker.add_emotion(EmotionResult(0, "happy", 0.9, face_index=1), token="client")
+        with mock.patch('APicalls.ReportJobs.get_report_queue', side_effect=RuntimeError("database down")):
+            with self.assertRaises(RuntimeError):
+                tracker.end_current_session("client")
+
+        session = tracker._get_session("client")
+        self.assertIsNotNone(session)
+        self.assertTrue(session.is_active)
+        self.assertEqual(len(session.emotion_data), 1)
+
+        report_queue = mock.Mock()
+        report_queue.submit.return_value = "job-1"
+        with mock.patch('APicalls.ReportJobs.get_report_queue', return_value=report_queue):
+            self.assertEqual(tracker.end_current_session("client")['job_id'], "job-1")
+        self.assertEqual(report_queue.submit.call_args[0][1]['emotion_count'], 1)
+        self.assertEqual(tracker.session_count(), 0)
+
+    def test_end_returns_a_digest_not_the_readings(self):
+        tracker = MeetingTracker()
+        for i in range(100):
+            tracker.add_emotion(EmotionResult(0, "happy", 0.9, face_index=1), token="client")
+        report_queue = mock.Mock()
+        report_queue.submit.return_value = "job-1"
+        with mock.patch('APicalls.ReportJobs.get_report_queue', return_value=report_queue):
+            session_data = tracker.end_current_session("client")['session_data']
+
+        self.assertEqual(session_data['emotion_count'], 100)
+        self.assertNotIn('emotion_data', session_data)
+        self.assertLessEqual(len(session_data['recent']), 5)
+
+    def test_eviction_builds_no_session_summary(self):
+        tracker = MeetingTracker(idle_ttl_seconds=0)
+        tracker.add_emotion(EmotionResult(0, "happy", 0.9, face_index=1), token="client")
+        report_queue = mock.Mock()
+        with mock.patch('APicalls.ReportJobs.get_report_queue', return_value=report_queue), \
+             mock.patch.object(MeetingSession, 'get_session_digest') as get_session_digest, \
+             mock.patch.object(MeetingSession, 'get_session_data') as get_session_data:
+            self.assertEqual(tracker.evict_idle(), 1)
+
+        report_queue.submit.assert_called_once()
+        get_session_digest.assert_not_called()
+        get_session_data.assert_not_called()
+
+
+class FlakyBackend:
+    """Fake LLM backend that fails its first `failures` calls, then answers."""
+
+    ANSWER = json.dumps({
+        'analysis': ["The meeting was mostly neutral."],
+        'recommendations': ["Keep meetings short."]
+    })
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt):
+        with self._lock:
+            self.calls.append(time.monotonic())
+            if len(self.calls) <= self.failures:
+                raise ConnectionError("LLM unavailable")
+        return self.ANSWER
+
+
+class ReportJobQueueTests(TransactionTestCase):
+    """Report jobs are retried with backoff, resumed and end in the right state."""
+
+    BACKOFF = 0.2
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="moodlink_tests_")
+        self.addCleanup(shutil.rmtree, self.work_dir, ignore_errors=True)
+        self.cache = ReportCache(os.path.join(self.work_dir, "reports"))
+
+        session = MeetingSession()
+        for i in range(50):
+            label_index = i % len(STAND_IN_LABELS)
+            session.add_emotion_data(EmotionResult(label_index, STAND_IN_LABELS[label_index], 0.8,
+                                                   face_index=i % 4 + 1))
+        session.end_session()
+        self.session_id = session.session_id
+        self.payload = session.get_report_payload()
+
+    def make_queue(self, backend, max_attempts=3, allow_fallback=True):
+        return ReportJobQueue(workers=1, max_attempts=max_attempts, backoff_seconds=self.BACKOFF,
+                              generator=backend, cache=self.cache, allow_fallback=allow_fallback)
+
+    def test_failed_attempts_are_retried_with_backoff(self):
+        backend = FlakyBackend(failures=2)
+        report_queue = self.make_queue(backend, max_attempts=3)
+        status = report_queue.wait(report_queue.submit(self.session_id, self.payload), timeout=30)
+
+        self.assertEqual(status['status'], ReportJob.STATUS_SUCCEEDED)
+        self.assertEqual(status['attempts'], 3)
+        self.assertEqual(len(backend.calls), 3)
+        # The delay doubles after each failed attempt
+        self.assertGreaterEqual(backend.calls[1] - backend.calls[0], self.BACKOFF)
+        self.assertGreaterEqual(backend.calls[2] - backend.calls[1], 2 * self.BACKOFF)
+        self.assertNotIn("Analysis written locally", status['summary'])
+        self.assertIsNotNone(self.cache.find_by_session(self.session_id))
+
+    def test_last_attempt_falls_back_to_local_analysis(self):
+        backend = FlakyBackend(failures=10)
+        report_queue = self.make_queue(backend, max_attempts=2)
+        status = report_queue.wait(report_queue.submit(self.session_id, self.payload), timeout=30)
+
+        self.assertEqual(status['status'], ReportJob.STATUS_SUCCEEDED)
+        self.assertEqual(status['attempts'], 2)
+        self.assertEqual(len(backend.calls), 2)
+        self.assertIn("Analysis written locally", status['summary'])
+        with open(self.cache.find_by_session(self.session_id), encoding='utf-8') as f:
+            self.assertNotIn('{{', f.read())
+
+    def test_job_fails_without_fallback(self):
+        backend = FlakyBackend(failures=10)
+        report_queue = self.make_queue(backend, max_attempts=2, allow_fallback=False)
+        status = report_queue.wait(report_queue.submit(self.session_id, self.payload), timeout=30)
+
+        self.assertEqual(status['status'], ReportJob.STATUS_FAILED)
+        self.assertEqual(status['attempts'], 2)
+        self.assertEqual(len(backend.calls), 2)
+        self.assertIn("LLM unavailable", status['error'])
+        self.assertIsNone(status['html_filename'])
+        self.assertIsNone(self.cache.find_by_session(self.session_id))
+
+    def test_stale_running_job_resumes(self):
+        def running_job(updated_seconds_ago):
+            job = ReportJob.objects.create(
+                job_id=screenshot_ids.next_id(),
+                session_id=self.session_id,
+                status=ReportJob.STATUS_RUNNING,
+                payload=self.payload,
+                attempts=1
+            )
+            # update() bypasses auto_now
+            ReportJob.objects.filter(pk=job.pk).update(
+                updated_at=timezone.now() - timedelta(seconds=updated_seconds_ago)
+            )
+            return job.job_id
+
+        stale_job = running_job(ReportJobQueue.STALE_RUNNING_SECONDS + 60)
+        live_job = running_job(0)
+
+        report_queue = self.make_queue(FlakyBackend())
+        report_queue.start()
+        status = report_queue.wait(stale_job, timeout=30)
+
+        self.assertEqual(status['status'], ReportJob.STATUS_SUCCEEDED)
+        self.assertEqual(status['attempts'], 2)
+        # A job another worker is still running is left alone
+        self.assertEqual(report_queue.get_status(live_job)['status'], ReportJob.STATUS_RUNNING)
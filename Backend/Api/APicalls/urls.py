@@ -3,7 +3,11 @@ from . import views
 
 urlpatterns = [
     path('', views.upload_screenshot, name='upload_screenshot'),
+    path('upload-async/', views.upload_screenshot_async, name='upload_screenshot_async'),
     path('end-session/', views.end_meeting_session, name='end_meeting_session'),
+    path('report-jobs/<str:job_id>/', views.report_job_status, name='report_job_status'),
+    path('session/stats/', views.session_stats, name='session_stats'),
+    path('session/timeline/', views.session_timeline, name='session_timeline'),
     path('cleanup/', views.cleanup_all_files, name='cleanup_all_files'),
     path('report/<str:filename>', views.serve_html_report, name='serve_html_report'),
 ]
@@ -1,29 +1,59 @@
 from django.shortcuts import render
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse
+from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
+import asyncio
+import functools
 import json
+import math
 import os
+import re
+import time
 from datetime import datetime
 
-from APicalls.Identifyer import identify, identify_multiple_faces
-from APicalls.FaceSanitizer import sanitize_image_for_emotion_detection, sanitize_all_faces_for_emotion_detection
+from APicalls.Admission import FrameDropped, get_frame_admission
 from APicalls.MeetingTracker import meeting_tracker
+from APicalls.ReportCache import get_report_cache
+from APicalls.ReportDelivery import report_response
+from APicalls.ReportJobs import get_report_queue
+from APicalls.ScreenshotIds import screenshot_ids
+from APicalls.UploadPipeline import (
+    SCREENSHOT_EXTENSIONS, UploadPoolFull, UploadRejected, get_upload_pool, process_screenshot,
+    read_upload
+)
 
-# Global iterator counter for screenshot naming
-screenshot_counter = 0
+meeting_tracker.idle_ttl_seconds = settings.MOODLINK_SESSION_IDLE_TTL
+meeting_tracker.timeline_token_budget = settings.MOODLINK_TIMELINE_TOKEN_BUDGET
 
 def get_next_screenshot_id():
-    """Get the next screenshot ID using global iterator"""
-    global screenshot_counter
-    screenshot_counter += 1
-    return screenshot_counter
+    """Get a unique, time-ordered screenshot ID (safe across threads and workers)"""
+    return screenshot_ids.next_id()
+
+# Client session tokens: letters, digits, '-' and '_' (UUIDs fit)
+SESSION_TOKEN_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,128}$')
+
+# Report URLs name the session: meeting_report_<session_id>.html
+REPORT_FILENAME_PATTERN = re.compile(r'^meeting_report_([A-Za-z0-9_]+)\.html$')
+
+def get_session_token(request):
+    """
+    Get the client's session token from the X-MoodLink-Session header or
+    the session_token parameter. Clients that send none share the default session.
+    """
+    token = (request.headers.get('X-MoodLink-Session')
+             or request.POST.get('session_token')
+             or request.GET.get('session_token'))
+    if token and SESSION_TOKEN_PATTERN.match(token):
+        return token
+    return meeting_tracker.DEFAULT_TOKEN
 
 def add_cors_headers(response):
     """Add CORS headers to response for Chrome extension compatibility"""
     response['Access-Control-Allow-Origin'] = '*'
     response['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
-    response['Access-Control-Allow-Headers'] = 'Content-Type, Accept'
+    response['Access-Control-Allow-Headers'] = 'Content-Type, Accept, X-MoodLink-Session'
+    response['Access-Control-Expose-Headers'] = 'Retry-After'
     return response
 
 def handle_cors_preflight(request):
@@ -33,6 +63,75 @@ def handle_cors_preflight(request):
         return add_cors_headers(response)
     return None
 
+def handle_upload(request, session_token):
+    """
+    Read the uploaded screenshot and run it through the upload pipeline.
+    
+    Returns:
+        tuple: (HTTP status, response body)
+    """
+    try:
+        # Validate request
+        if 'screenshot' not in request.FILES:
+            return 400, {
+                'success': False,
+                'error': 'No screenshot file provided'
+            }
+        
+        # In-memory uploads are passed on without copying; the view is
+        # released before Django closes the file
+        with read_upload(request.FILES['screenshot']) as image_data:
+            return 200, process_screenshot(image_data, session_token)
+        
+    except UploadRejected as e:
+        return e.status, {
+            'success': False,
+            'error': str(e)
+        }
+    except Exception as e:
+        return 500, {
+            'success': False,
+            'error': f'Processing failed: {str(e)}'
+        }
+
+
+def handle_admitted_upload(request, session_token):
+    """
+    Process an upload that holds its session's frame slot, then free the slot.
+    
+    Returns:
+        tuple: (HTTP status, response body)
+    """
+    frame_admission = get_frame_admission()
+    start = time.monotonic()
+    try:
+        status, body = handle_upload(request, session_token)
+    finally:
+        frame_admission.release(session_token, time.monotonic() - start)
+    if status == 200:
+        # Lets the client stretch or shrink its capture interval
+        body['suggested_interval_ms'] = frame_admission.suggested_interval_ms()
+    return status, body
+
+
+def frame_dropped_response(error):
+    """
+    Build the 429 answer for a frame that was not processed.
+    
+    Args:
+        error (FrameDropped): Why the frame was dropped
+    """
+    interval_ms = get_frame_admission().suggested_interval_ms()
+    response = JsonResponse({
+        'success': False,
+        'error': str(error),
+        'reason': error.reason,
+        'suggested_interval_ms': interval_ms
+    }, status=429)
+    response['Retry-After'] = str(math.ceil(interval_ms / 1000))
+    return add_cors_headers(response)
+
+
 @csrf_exempt
 @require_http_methods(["POST", "OPTIONS"])
 def upload_screenshot(request):
@@ -40,121 +139,154 @@ def upload_screenshot(request):
     Handle screenshot upload, emotion detection, and session tracking.
     
     Process:
-    1. Save uploaded screenshot
-    2. Sanitize image (crop to face)
+    1. Decode uploaded screenshot in memory
+    2. Detect faces once and crop them
     3. Detect emotion using AI model
     4. Track in meeting session
     5. Return emotion result
+    
+    Images are only written to disk when MOODLINK_PERSIST_IMAGES is enabled.
+    Each session has one frame in flight; a frame arriving while another
+    waits replaces it, and the replaced one is answered with 429.
     """
     # Handle CORS preflight
     if request.method == 'OPTIONS':
         return handle_cors_preflight(request)
-        
+    
+    session_token = get_session_token(request)
     try:
-        # Validate request
-        if 'screenshot' not in request.FILES:
-            response = JsonResponse({
-                'success': False,
-                'error': 'No screenshot file provided'
-            }, status=400)
-            return add_cors_headers(response)
-        
-        screenshot_file = request.FILES['screenshot']
-        
-        # Generate unique filename
-        screenshot_id = get_next_screenshot_id()
-        unique_filename = f"screenshot_{screenshot_id}.png"
-        file_path = f"/Users/alvishprasla/Code/JS/Moodlink/MoodLink/Testimages/{unique_filename}"
-        
-        # Create directory if needed
-        os.makedirs("/Users/alvishprasla/Code/JS/Moodlink/MoodLink/Testimages", exist_ok=True)
-        
-        # Save screenshot
-        with open(file_path, 'wb') as f:
-            for chunk in screenshot_file.chunks():
-                f.write(chunk)
-        
-        # Process image: sanitize all faces and detect emotions for each
-        sanitized_face_paths = sanitize_all_faces_for_emotion_detection(file_path)
-        
-        if sanitized_face_paths:
-            # Multiple faces detected - get emotions for all
-            all_emotions = identify_multiple_faces(sanitized_face_paths)
-            predicted_emotions = all_emotions
-            
-            # Use the first face's path for primary tracking
-            primary_sanitized_path = sanitized_face_paths[0]
-        else:
-            # No faces detected - fall back to original method
-            primary_sanitized_path = sanitize_image_for_emotion_detection(file_path)
-            single_emotion = identify(primary_sanitized_path)
-            predicted_emotions = [single_emotion]
-            sanitized_face_paths = [primary_sanitized_path]
-        
-        # Track emotions in meeting session
-        try:
-            # Track each emotion separately
-            for i, emotion in enumerate(predicted_emotions):
-                # Extract confidence percentage if available
-                confidence = None
-                if '(' in emotion and '%' in emotion:
-                    confidence_str = emotion.split('(')[1].split('%')[0]
-                    confidence = float(confidence_str) / 100.0
-                
-                # Use corresponding sanitized path if available
-                sanitized_path = sanitized_face_paths[i] if i < len(sanitized_face_paths) else primary_sanitized_path
-                
-                meeting_tracker.add_emotion(
-                    emotion=emotion,
-                    confidence=confidence,
-                    filename=unique_filename,
-                    sanitized_path=sanitized_path
-                )
-        except Exception as e:
-            pass  # Continue processing even if session tracking fails
-        
-        # Return success response with all emotions
+        get_frame_admission().acquire(session_token)
+    except FrameDropped as e:
+        return frame_dropped_response(e)
+    
+    status, body = handle_admitted_upload(request, session_token)
+    response = JsonResponse(body, status=status)
+    return add_cors_headers(response)
+
+
+@csrf_exempt
+@require_http_methods(["POST", "OPTIONS"])
+async def upload_screenshot_async(request):
+    """
+    Async variant of upload_screenshot for ASGI deployments.
+    
+    The ASGI server reads the request body without blocking; parsing the
+    upload, decoding, detection, inference and any disk writes run on the
+    upload pool's worker threads, so the event loop only waits. A frame
+    waits for its session's slot without occupying a worker; when the
+    pool's queue is full the upload is refused with 429 and Retry-After.
+    """
+    # Handle CORS preflight
+    if request.method == 'OPTIONS':
+        return handle_cors_preflight(request)
+    
+    session_token = get_session_token(request)
+    frame_admission = get_frame_admission()
+    try:
+        await frame_admission.acquire_async(session_token)
+    except FrameDropped as e:
+        return frame_dropped_response(e)
+    
+    try:
+        future = get_upload_pool().submit(
+            handle_admitted_upload, request, session_token,
+            on_cancel=functools.partial(frame_admission.release, session_token)
+        )
+    except UploadPoolFull as e:
+        frame_admission.release(session_token)
+        return frame_dropped_response(frame_admission.reject('overloaded', f'Server busy: {str(e)}'))
+    
+    # shield: a frame that holds its session's slot is processed even if
+    # the client goes away; should the job be cancelled anyway, on_cancel
+    # frees the slot
+    status, body = await asyncio.shield(asyncio.wrap_future(future))
+    response = JsonResponse(body, status=status)
+    return add_cors_headers(response)
+
+
+@csrf_exempt
+@require_http_methods(["GET", "OPTIONS"])
+def session_stats(request):
+    """
+    Serve live running aggregates of the client's current session.
+    
+    Counts, rolling windows, mean confidences and transitions are kept
+    up to date as readings arrive, so this never scans the timeline.
+    """
+    # Handle CORS preflight
+    if request.method == 'OPTIONS':
+        return handle_cors_preflight(request)
+    
+    stats = meeting_tracker.get_current_session_stats(get_session_token(request))
+    if stats is None:
         response = JsonResponse({
-            'success': True,
-            'message': 'Screenshot processed successfully',
-            'emotions': predicted_emotions,  # Return all emotions
-            'face_count': len(predicted_emotions),  # Number of faces detected
-            'session_info': meeting_tracker.get_current_session_info(),
-            'data': {
-                'filename': unique_filename,
-                'screenshot_id': screenshot_id,
-                'sanitized_paths': sanitized_face_paths
-            }
-        }, status=200)
+            'success': False,
+            'error': 'No active session'
+        }, status=404)
         return add_cors_headers(response)
-        
-    except Exception as e:
+    
+    response = JsonResponse({'success': True, **stats})
+    return add_cors_headers(response)
+
+
+@csrf_exempt
+@require_http_methods(["GET", "OPTIONS"])
+def session_timeline(request):
+    """
+    Serve the client's current session emotion timeline incrementally.
+    
+    Query parameters:
+        cursor (int): Index of the first reading to return (default 0);
+                      pass the previous response's next_cursor to continue
+        limit (int): Maximum readings per page (default 500, max 1000)
+    """
+    # Handle CORS preflight
+    if request.method == 'OPTIONS':
+        return handle_cors_preflight(request)
+    
+    try:
+        cursor = max(0, int(request.GET.get('cursor', 0)))
+        limit = min(1000, max(1, int(request.GET.get('limit', 500))))
+    except ValueError:
         response = JsonResponse({
             'success': False,
-            'error': f'Processing failed: {str(e)}'
-        }, status=500)
+            'error': 'cursor and limit must be integers'
+        }, status=400)
         return add_cors_headers(response)
+    
+    page = meeting_tracker.get_current_timeline_page(cursor, limit, get_session_token(request))
+    if page is None:
+        response = JsonResponse({
+            'success': False,
+            'error': 'No active session'
+        }, status=404)
+        return add_cors_headers(response)
+    
+    response = JsonResponse({'success': True, **page})
+    return add_cors_headers(response)
 
 
 @csrf_exempt
 @require_http_methods(["POST", "OPTIONS"])
 def end_meeting_session(request):
     """
-    End current meeting session and generate AI summary.
+    End the client's meeting session and queue its AI summary.
     
     Process:
     1. End active meeting session
-    2. Generate AI summary using Gemini
+    2. Queue a background job that generates the summary using Gemini
     3. Clean up image files
-    4. Return session statistics and summary
+    4. Return the session digest and the job id right away (202)
+    
+    Poll report-jobs/<job_id>/ for the finished html_report_url.
     """
     # Handle CORS preflight
     if request.method == 'OPTIONS':
         return handle_cors_preflight(request)
         
     try:
-        # End session and get summary
-        result = meeting_tracker.end_current_session()
+        # End session and queue its report
+        result = meeting_tracker.end_current_session(get_session_token(request))
         
         # Check for errors
         if 'error' in result:
@@ -164,42 +296,106 @@ def end_meeting_session(request):
             }, status=400)
             return add_cors_headers(response)
         
+        if result.get('already_ended'):
+            # Repeated end request: point at the report job already queued
+            response = JsonResponse({
+                'success': True,
+                'message': 'Meeting session already ended',
+                'job_id': result['job_id'],
+                'status_url': f'http://localhost:8000/api/report-jobs/{result["job_id"]}/'
+            }, status=202)
+            return add_cors_headers(response)
+        
         # Log session completion
         session_data = result['session_data']
         print(f"Meeting completed: {session_data['emotion_count']} emotions, {session_data['duration_minutes']:.1f}min")
         
-        # Return success response
-        response_data = {
+        # Return immediately; the report is generated in the background
+        response = JsonResponse({
             'success': True,
-            'message': 'Meeting session ended and summary generated successfully',
+            'message': 'Meeting session ended, summary is being generated',
             'session_data': session_data,
-            'summary': result['summary'],
+            'job_id': result['job_id'],
+            'status': 'queued',
+            'status_url': f'http://localhost:8000/api/report-jobs/{result["job_id"]}/',
             'deleted_files': result['deleted_files'],
             'cleanup_complete': result['cleanup_complete']
-        }
+        }, status=202)
+        return add_cors_headers(response)
+        
+    except Exception as e:
+        response = JsonResponse({
+            'success': False,
+            'error': f'Failed to end session: {str(e)}'
+        }, status=500)
+        return add_cors_headers(response)
+
+
+@csrf_exempt
+@require_http_methods(["GET", "OPTIONS"])
+def report_job_status(request, job_id):
+    """
+    Serve the status of a report job.
+    
+    Query parameters:
+        wait (float): Long-poll for up to this many seconds (max 30) until
+                      the job has succeeded or failed (default 0)
+    
+    Args:
+        job_id (str): Id returned by end-session
+    """
+    # Handle CORS preflight
+    if request.method == 'OPTIONS':
+        return handle_cors_preflight(request)
+    
+    try:
+        wait = min(30.0, max(0.0, float(request.GET.get('wait', 0))))
+    except ValueError:
+        response = JsonResponse({
+            'success': False,
+            'error': 'wait must be a number'
+        }, status=400)
+        return add_cors_headers(response)
+    
+    try:
+        report_queue = get_report_queue()
+        if wait:
+            job = report_queue.wait(job_id, wait)
+        else:
+            job = report_queue.get_status(job_id)
+        
+        if job is None:
+            response = JsonResponse({
+                'success': False,
+                'error': 'Report job not found'
+            }, status=404)
+            return add_cors_headers(response)
         
         # Add HTML report URL if available
-        if result.get('html_filename'):
-            response_data['html_report_url'] = f'http://localhost:8000/api/report/{result["html_filename"]}'
-            response_data['html_filename'] = result['html_filename']
+        if job['html_filename']:
+            job['html_report_url'] = f'http://localhost:8000/api/report/{job["html_filename"]}'
         
-        response = JsonResponse(response_data, status=200)
+        response = JsonResponse({'success': True, **job})
         return add_cors_headers(response)
         
     except Exception as e:
         response = JsonResponse({
             'success': False,
-            'error': f'Failed to end session: {str(e)}'
+            'error': f'Failed to get report job: {str(e)}'
         }, status=500)
         return add_cors_headers(response)
 
 
 @csrf_exempt
-@require_http_methods(["GET", "OPTIONS"])
+@require_http_methods(["GET", "HEAD", "OPTIONS"])
 def serve_html_report(request, filename):
     """
     Serve HTML report files.
     
+    Reports are streamed from disk. Revalidation with If-None-Match or
+    If-Modified-Since answers 304, clients accepting gzip get the copy
+    compressed at generation time, and single byte ranges are supported.
+    
     Args:
         filename (str): Name of the HTML report file
     """
@@ -215,8 +411,14 @@ def serve_html_report(request, filename):
                 'error': 'Invalid filename'
             }, status=400)
         
-        # Construct file path
-        file_path = f"/Users/alvishprasla/Code/JS/Moodlink/MoodLink/Testimages/{filename}"
+        # Reports live in the report cache; look them up by session id
+        file_path = None
+        match = REPORT_FILENAME_PATTERN.match(filename)
+        if match:
+            file_path = get_report_cache().find_by_session(match.group(1))
+        if file_path is None:
+            # Reports written before the cache existed
+            file_path = f"/Users/alvishprasla/Code/JS/Moodlink/MoodLink/Testimages/{filename}"
         
         # Check if file exists
         if not os.path.exists(file_path):
@@ -225,12 +427,8 @@ def serve_html_report(request, filename):
                 'error': 'Report not found'
             }, status=404)
         
-        # Read and serve HTML file
-        with open(file_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        
-        # Create HTTP response with HTML content
-        response = HttpResponse(html_content, content_type='text/html')
+        # Stream from disk with ETag/Last-Modified, gzip and Range support
+        response = report_response(request, file_path, filename)
         return add_cors_headers(response)
         
     except Exception as e:
@@ -245,7 +443,7 @@ def serve_html_report(request, filename):
 @require_http_methods(["POST", "OPTIONS"])
 def cleanup_all_files(request):
     """
-    Immediately cleanup all files and reset session when close button is pressed.
+    Immediately cleanup the client's files and reset its session when close button is pressed.
     
     This endpoint provides immediate cleanup without generating reports.
     Used when user closes the extension UI.
@@ -257,18 +455,11 @@ def cleanup_all_files(request):
     try:
         print("Immediate cleanup requested...")
         
-        # Force cleanup using meeting tracker
-        if hasattr(meeting_tracker, 'current_session') and meeting_tracker.current_session:
-            deleted_count = meeting_tracker.current_session.cleanup_files()
-            # Reset the session
-            meeting_tracker.current_session = None
-        else:
-            # If no active session, still do general cleanup
-            deleted_count = cleanup_orphaned_files()
-        
-        # Reset global counter
-        global screenshot_counter
-        screenshot_counter = 0
+        # Drop the client's session and delete its files
+        deleted_count = meeting_tracker.discard_session(get_session_token(request))
+        if not meeting_tracker.session_count():
+            # No session left that could still own files: general cleanup
+            deleted_count += cleanup_orphaned_files()
         
         response = JsonResponse({
             'success': True,
@@ -299,8 +490,8 @@ def cleanup_orphaned_files():
         if os.path.exists(testimages_dir):
             for filename in os.listdir(testimages_dir):
                 # Delete all image files but preserve HTML reports
-                if (filename.startswith("screenshot_") and filename.endswith(".png")) or \
-                   (filename.startswith("face_") and filename.endswith(".png")):
+                if filename.startswith(("screenshot_", "face_")) and \
+                   filename.lower().endswith(SCREENSHOT_EXTENSIONS):
                     file_path = os.path.join(testimages_dir, filename)
                     try:
                         os.remove(file_path)
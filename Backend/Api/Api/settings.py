@@ -30,6 +30,87 @@ DEBUG = True
 
 ALLOWED_HOSTS = []
 
+# Write uploaded screenshots and face crops to disk for debugging.
+# Off by default: the upload pipeline works entirely in memory.
+MOODLINK_PERSIST_IMAGES = os.getenv('MOODLINK_PERSIST_IMAGES', '0') == '1'
+
+# Run face detection on a copy whose longer side is at most this many pixels.
+# 0 runs the cascade on the full-resolution screenshot.
+MOODLINK_DETECTION_MAX_SIDE = int(os.getenv('MOODLINK_DETECTION_MAX_SIDE', '1280'))
+
+# Split video-call gallery screenshots into participant tiles and search
+# each tile separately (falls back to the whole frame if no grid is found).
+MOODLINK_TILE_LAYOUT = os.getenv('MOODLINK_TILE_LAYOUT', '0') == '1'
+
+# Track faces between screenshots and only search around their last
+# position; a full-frame scan still runs at least every this many frames.
+# 1 disables tracking.
+MOODLINK_FULL_SCAN_INTERVAL = int(os.getenv('MOODLINK_FULL_SCAN_INTERVAL', '10'))
+
+# Reuse a participant's previous emotion when the mean absolute difference
+# of a 16x16 grayscale face thumbnail (0-255 scale) is below this value.
+# 0 classifies every face in every frame.
+MOODLINK_CHANGE_THRESHOLD = float(os.getenv('MOODLINK_CHANGE_THRESHOLD', '4.0'))
+
+# Meeting sessions are keyed by the client's session token; a session with
+# no uploads or requests for this many seconds is ended and cleaned up.
+MOODLINK_SESSION_IDLE_TTL = float(os.getenv('MOODLINK_SESSION_IDLE_TTL', '3600'))
+
+# Meeting reports are generated by background worker threads. A failed
+# attempt is retried after MOODLINK_REPORT_RETRY_BACKOFF seconds, doubling
+# each time, until MOODLINK_REPORT_MAX_ATTEMPTS attempts have been made. The
+# last attempt writes the analysis locally unless MOODLINK_REPORT_FALLBACK is
+# '0', in which case the job is marked failed.
+MOODLINK_REPORT_WORKERS = int(os.getenv('MOODLINK_REPORT_WORKERS', '2'))
+MOODLINK_REPORT_MAX_ATTEMPTS = int(os.getenv('MOODLINK_REPORT_MAX_ATTEMPTS', '3'))
+MOODLINK_REPORT_RETRY_BACKOFF = float(os.getenv('MOODLINK_REPORT_RETRY_BACKOFF', '2.0'))
+MOODLINK_REPORT_FALLBACK = os.getenv('MOODLINK_REPORT_FALLBACK', '1') == '1'
+
+# Reports summarize the timeline into segments of similar mood; the segment
+# lines sent to the LLM (and shown in the report) stay within this many tokens.
+MOODLINK_TIMELINE_TOKEN_BUDGET = int(os.getenv('MOODLINK_TIMELINE_TOKEN_BUDGET', '400'))
+
+# Finished reports are cached on disk by content hash; the least recently
+# used ones are deleted once the cache grows past this many bytes.
+MOODLINK_REPORT_CACHE_DIR = os.getenv(
+    'MOODLINK_REPORT_CACHE_DIR', '/Users/alvishprasla/Code/JS/Moodlink/MoodLink/Testimages/Reports'
+)
+MOODLINK_REPORT_CACHE_MAX_BYTES = int(os.getenv('MOODLINK_REPORT_CACHE_MAX_BYTES', str(200 * 1024 * 1024)))
+
+# LLM client: 'gemini', or 'fake' for an offline stand-in that answers after
+# MOODLINK_FAKE_LLM_LATENCY seconds. Every call has a deadline of
+# MOODLINK_LLM_TIMEOUT seconds; at most MOODLINK_LLM_MAX_CONCURRENCY calls run
+# at once and MOODLINK_LLM_TOKENS_PER_MINUTE limits tokens (0 = no limit).
+MOODLINK_LLM_BACKEND = os.getenv('MOODLINK_LLM_BACKEND', 'gemini')
+MOODLINK_FAKE_LLM_LATENCY = float(os.getenv('MOODLINK_FAKE_LLM_LATENCY', '0.5'))
+MOODLINK_LLM_TIMEOUT = float(os.getenv('MOODLINK_LLM_TIMEOUT', '60'))
+MOODLINK_LLM_MAX_CONCURRENCY = int(os.getenv('MOODLINK_LLM_MAX_CONCURRENCY', '4'))
+MOODLINK_LLM_TOKENS_PER_MINUTE = int(os.getenv('MOODLINK_LLM_TOKENS_PER_MINUTE', '0'))
+
+# Keep uploaded screenshots up to this size in memory (Django's default of
+# 2.5 MB spools full-resolution PNGs to a temporary file)
+FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024
+
+# The async upload endpoint (api/upload-async/) processes screenshots on
+# MOODLINK_UPLOAD_WORKERS threads (0 = one per CPU core); at most
+# MOODLINK_UPLOAD_QUEUE_SIZE uploads wait for them before 429 is returned.
+MOODLINK_UPLOAD_WORKERS = int(os.getenv('MOODLINK_UPLOAD_WORKERS', '0'))
+MOODLINK_UPLOAD_QUEUE_SIZE = int(os.getenv('MOODLINK_UPLOAD_QUEUE_SIZE', '64'))
+
+# Each session has one screenshot in flight and at most one waiting (a newer
+# one replaces it); a waiting screenshot is dropped with 429 after
+# MOODLINK_FRAME_WAIT_TIMEOUT seconds. Clients are told to capture no more
+# often than the server can sustain, and never more often than
+# MOODLINK_MIN_CAPTURE_INTERVAL_MS.
+MOODLINK_FRAME_WAIT_TIMEOUT = float(os.getenv('MOODLINK_FRAME_WAIT_TIMEOUT', '10'))
+MOODLINK_MIN_CAPTURE_INTERVAL_MS = int(os.getenv('MOODLINK_MIN_CAPTURE_INTERVAL_MS', '3000'))
+
+# Faces from concurrent requests are classified together: a batch waits at
+# most MOODLINK_BATCH_MAX_WAIT_MS for other requests to join (0 = no
+# batching) and holds at most MOODLINK_BATCH_MAX_SIZE faces.
+MOODLINK_BATCH_MAX_WAIT_MS = float(os.getenv('MOODLINK_BATCH_MAX_WAIT_MS', '5'))
+MOODLINK_BATCH_MAX_SIZE = int(os.getenv('MOODLINK_BATCH_MAX_SIZE', '32'))
+
 
 # Application definition
 
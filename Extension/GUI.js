@@ -150,15 +150,17 @@ function handleCloseButtonClick() {
     
     panelClosed = true;
     
-    // First call cleanup endpoint to delete all files
-    fetch('http://localhost:8000/api/cleanup/', {
+    // First call cleanup endpoint to delete this browser's session files
+    chrome.storage.local.get('moodlinkSessionToken')
+    .then(stored => fetch('http://localhost:8000/api/cleanup/', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
-            'Accept': 'application/json'
+            'Accept': 'application/json',
+            'X-MoodLink-Session': stored.moodlinkSessionToken || 'default'
         },
         body: JSON.stringify({})
-    })
+    }))
     .then(response => response.json())
     .then(result => {
         if (result.success) {
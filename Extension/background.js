@@ -4,12 +4,75 @@
 // Configuration
 const API_ENDPOINT = 'http://localhost:8000/api/';
 const SCREENSHOT_INTERVAL = 3000; // 3 seconds between captures
+const MAX_SCREENSHOT_INTERVAL = 60000; // Slowest capture rate the server can ask for
+// Upload encoding; override with chrome.storage.local.set({ moodlinkCapture: {...} })
+const DEFAULT_CAPTURE_SETTINGS = {
+    maxSide: 1280, // Longest side in pixels after downscaling (0 = full resolution)
+    format: 'image/jpeg', // 'image/jpeg', 'image/webp' or 'image/png'
+    quality: 0.8 // JPEG/WebP quality, 0-1
+};
+const UPLOAD_EXTENSIONS = { 'image/jpeg': 'jpg', 'image/webp': 'webp', 'image/png': 'png' };
+const REPORT_POLL_WAIT = 25; // Seconds each report status request may wait
+const REPORT_TIMEOUT = 5 * 60 * 1000; // Give up on the report after 5 minutes
 
 // State management
 let isProcessing = false;
 let processingTab = null;
 let isGeneratingReport = false;
 let sessionExists = false;
+let captureInterval = SCREENSHOT_INTERVAL; // Stretched while the server is overloaded
+
+/**
+ * Get this browser's MoodLink session token, creating it on first use.
+ * The backend keeps one meeting session per token.
+ */
+async function getSessionToken() {
+    const stored = await chrome.storage.local.get('moodlinkSessionToken');
+    if (stored.moodlinkSessionToken) {
+        return stored.moodlinkSessionToken;
+    }
+    const token = crypto.randomUUID();
+    await chrome.storage.local.set({ moodlinkSessionToken: token });
+    return token;
+}
+
+/**
+ * Get the upload encoding settings, with stored overrides applied
+ */
+async function getCaptureSettings() {
+    const stored = await chrome.storage.local.get('moodlinkCapture');
+    const settings = { ...DEFAULT_CAPTURE_SETTINGS, ...(stored.moodlinkCapture || {}) };
+    if (!UPLOAD_EXTENSIONS[settings.format]) {
+        settings.format = DEFAULT_CAPTURE_SETTINGS.format;
+    }
+    return settings;
+}
+
+/**
+ * Downscale a captured screenshot on an OffscreenCanvas and encode it for upload.
+ * Full-resolution PNGs are several megabytes on HiDPI screens; the server
+ * only needs enough pixels to find and classify faces.
+ */
+async function encodeScreenshot(dataUrl, settings) {
+    const source = await (await fetch(dataUrl)).blob();
+    if (settings.format === 'image/png' && !settings.maxSide) {
+        return source; // Original capture
+    }
+
+    const bitmap = await createImageBitmap(source);
+    const longest = Math.max(bitmap.width, bitmap.height);
+    const scale = settings.maxSide ? Math.min(1, settings.maxSide / longest) : 1;
+    const width = Math.round(bitmap.width * scale);
+    const height = Math.round(bitmap.height * scale);
+
+    const canvas = new OffscreenCanvas(width, height);
+    const context = canvas.getContext('2d');
+    context.imageSmoothingQuality = 'high';
+    context.drawImage(bitmap, 0, 0, width, height);
+    bitmap.close();
+
+    return canvas.convertToBlob({ type: settings.format, quality: settings.quality });
+}
 
 /**
  * Message handler for GUI communication
@@ -184,6 +247,7 @@ chrome.action.onClicked.addListener(async (tab) => {
  */
 async function startProcessing(tab) {
     console.log('Starting emotion detection processing...');
+    captureInterval = SCREENSHOT_INTERVAL;
     
     while (isProcessing) {
         try {
@@ -203,8 +267,8 @@ async function startProcessing(tab) {
             // Capture and process screenshot
             await captureAndProcessScreenshot(tab);
             
-            // Wait before next capture
-            await sleep(SCREENSHOT_INTERVAL);
+            // Wait before next capture (the server may ask us to slow down)
+            await sleep(captureInterval);
             
         } catch (error) {
             console.error('Processing error:', error);
@@ -313,19 +377,39 @@ async function sendScreenshotToAPI(tab, dataUrl) {
     }
     
     try {
-        // Convert data URL to blob
-        const response = await fetch(dataUrl);
-        const blob = await response.blob();
+        // Downscale and encode (JPEG/WebP by default)
+        const startTime = performance.now();
+        const captureSettings = await getCaptureSettings();
+        const blob = await encodeScreenshot(dataUrl, captureSettings);
+        const encodedTime = performance.now();
         
         // Prepare form data
         const formData = new FormData();
-        formData.append('screenshot', blob, `screenshot-${Date.now()}.png`);
+        const extension = UPLOAD_EXTENSIONS[blob.type] || 'png';
+        formData.append('screenshot', blob, `screenshot-${Date.now()}.${extension}`);
 
         // Send to API
         const apiResponse = await fetch(API_ENDPOINT, {
             method: 'POST',
+            headers: {
+                'X-MoodLink-Session': await getSessionToken()
+            },
             body: formData
         });
+        const endTime = performance.now();
+        console.log(`Frame: ${(blob.size / 1024).toFixed(0)} KB ${blob.type}, ` +
+                    `encode ${(encodedTime - startTime).toFixed(0)} ms, ` +
+                    `upload + analysis ${(endTime - encodedTime).toFixed(0)} ms`);
+
+        if (apiResponse.status === 429) {
+            // Server is saturated: this frame was dropped, capture less often
+            const result = await apiResponse.json().catch(() => ({}));
+            const retryAfter = Number(apiResponse.headers.get('Retry-After')) * 1000;
+            updateCaptureInterval(result.suggested_interval_ms || retryAfter || captureInterval * 2);
+            console.warn(`Frame dropped by server (${result.reason || 'overloaded'}), ` +
+                         `capturing every ${captureInterval} ms`);
+            return;
+        }
 
         if (!apiResponse.ok) {
             throw new Error(`API error: ${apiResponse.status}`);
@@ -334,6 +418,10 @@ async function sendScreenshotToAPI(tab, dataUrl) {
         // Process response only if still processing
         if (isProcessing && !isGeneratingReport) {
             const result = await apiResponse.json();
+            if (result && result.suggested_interval_ms) {
+                // Speeds back up once the server has capacity again
+                updateCaptureInterval(result.suggested_interval_ms);
+            }
             if (result && result.success) {
                 // Handle both single and multiple emotions
                 const emotions = result.emotions || (result.emotion ? [result.emotion] : []);
@@ -357,6 +445,13 @@ async function sendScreenshotToAPI(tab, dataUrl) {
     }
 }
 
+/**
+ * Follow the capture interval suggested by the server, within our limits
+ */
+function updateCaptureInterval(intervalMs) {
+    captureInterval = Math.min(MAX_SCREENSHOT_INTERVAL, Math.max(SCREENSHOT_INTERVAL, intervalMs));
+}
+
 /**
  * End meeting session and generate AI summary
  */
@@ -368,7 +463,8 @@ async function endMeetingSession() {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
-                'Accept': 'application/json'
+                'Accept': 'application/json',
+                'X-MoodLink-Session': await getSessionToken()
             },
             body: JSON.stringify({})
         });
@@ -379,8 +475,15 @@ async function endMeetingSession() {
         }
         
         const result = await response.json();
-        console.log('Session ended successfully:', result);
-        return result;
+        console.log('Session ended, waiting for report job:', result.job_id);
+        
+        // The report is generated in the background; wait for the job
+        const job = await waitForReportJob(result.job_id);
+        if (job.status !== 'succeeded') {
+            throw new Error(`Report generation failed: ${job.error || job.status}`);
+        }
+        console.log('Report ready:', job);
+        return { ...result, ...job };
         
     } catch (error) {
         console.error('End session failed:', error);
@@ -388,6 +491,30 @@ async function endMeetingSession() {
     }
 }
 
+/**
+ * Long-poll a report job until it succeeds or fails
+ */
+async function waitForReportJob(jobId) {
+    const deadline = Date.now() + REPORT_TIMEOUT;
+    
+    while (Date.now() < deadline) {
+        const response = await fetch(
+            `${API_ENDPOINT}report-jobs/${encodeURIComponent(jobId)}/?wait=${REPORT_POLL_WAIT}`,
+            { headers: { 'Accept': 'application/json' } }
+        );
+        if (!response.ok) {
+            const errorText = await response.text();
+            throw new Error(`API error ${response.status}: ${errorText}`);
+        }
+        
+        const job = await response.json();
+        if (job.status === 'succeeded' || job.status === 'failed') {
+            return job;
+        }
+    }
+    throw new Error('Timed out waiting for the meeting report');
+}
+
 /**
  * Stop emotion detection processing
  */